@@ -14,6 +14,7 @@ from numpy import linalg as LA
 
 # from fast_obstacle_avoidance.obstacle_avoider._base import SampledAvoider
 from fast_obstacle_avoidance.obstacle_avoider.lidar_avoider import SampledAvoider
+from fast_obstacle_avoidance.utils import PolarScan
 
 
 # from fast_obstacle_avoidance.comparison.vfh_python.lib.robot import Robot as VFH_Robot
@@ -177,6 +178,15 @@ class VFH_Avoider:
         self.normal_direction = np.zeros((data_points.shape[0]))
 
     def update_laserscan(self, points, in_robot_frame=False):
+        if isinstance(points, PolarScan):
+            # The polar scan is in the robot frame and has bearings / ranges already
+            self.datapoints = self.robot.pose.transform_positions_from_relative(
+                points.positions
+            )
+            self.angles = points.bearings
+            self.ranges = points.ranges
+            return
+
         if in_robot_frame:
             self.datapoints = self.robot.pose.transform_position_from_relative(points)
             # Set global datapoints
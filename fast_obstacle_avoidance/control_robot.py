@@ -3,6 +3,7 @@ Various Robot models
 """
 import os
 import math
+import warnings
 
 from dataclasses import dataclass, field
 
@@ -19,7 +20,7 @@ from vartools.states import ObjectPose
 from dynamic_obstacle_avoidance import containers
 from dynamic_obstacle_avoidance.obstacles import Sphere
 
-from .utils import laserscan_to_numpy
+from .utils import buffer_to_numpy, LaserscanProjector, PolarScan
 
 
 class BaseRobot:
@@ -249,14 +250,38 @@ class QoloRobot(BaseRobot):
         self.laser_data = {}
         self.robot_image = None
 
+        # Projectors from ranges to positions (per topic) to reuse the directions
+        self.laser_projectors = {}
+
         self.intensity_data = {}
 
+        # Merged scan of all lidars (sorted by bearing), created on request
+        self._polar_scan = None
+
         # Maximum normalization - above this full repulsion is taking effect!
         self.weight_max_norm = 6.99580150e04
 
+    def get_polar_scan(self) -> PolarScan:
+        """Returns the scan of all lidars (in the robot frame) sorted by bearing."""
+        if self._polar_scan is None:
+            self._polar_scan = PolarScan.from_scans(list(self.laser_data.values()))
+        return self._polar_scan
+
+    def get_all_intensities(self):
+        """Returns the intensities in the same (bearing) order as the scan."""
+        intensities = super().get_all_intensities()
+        polar_scan = self.get_polar_scan()
+        if intensities.shape[0] != polar_scan.n_points:
+            warnings.warn("Intensities are not stored for all lidars.")
+            return intensities
+
+        return intensities[polar_scan.order]
+
     def get_allscan(self, in_robot_frame=True):
+        """Returns the scan of all lidars sorted by bearing (around the robot center);
+        in the robot frame this is a view of the cached polar scan."""
         self._got_new_scan = False
-        laserscan = np.hstack([scan for scan in self.laser_data.values()])
+        laserscan = self.get_polar_scan().positions
 
         if not in_robot_frame:
             if LA.norm(self.pose.orientation):
@@ -270,20 +295,34 @@ class QoloRobot(BaseRobot):
 
         return laserscan
 
-    def set_laserscan(self, data, topic_name, save_intensity=False):
-        try:
-            self.laser_data[topic_name] = laserscan_to_numpy(
+    def get_laser_projector(self, data, topic_name) -> LaserscanProjector:
+        """Returns the (cached) projector of the topic, it is recreated in case
+        the angular layout of the scan changes."""
+        projector = self.laser_projectors.get(topic_name)
+        if projector is None or not projector.is_compatible(data):
+            projector = LaserscanProjector.from_message(
                 data, pose=self.laser_poses[topic_name]
             )
+            self.laser_projectors[topic_name] = projector
+
+        return projector
+
+    def set_laserscan(self, data, topic_name, save_intensity=False):
+        try:
+            projector = self.get_laser_projector(data, topic_name)
         except KeyError:
             print("Key <{topic_name}> not found; nothing was updated.")
             return
 
+        ranges = buffer_to_numpy(data.ranges)
+        is_finite = np.isfinite(ranges)
+        self.laser_data[topic_name] = projector.project(ranges, is_finite)
+
         self._got_new_scan = True
+        self._polar_scan = None
 
         if save_intensity:
-            is_finite = np.isfinite(np.array(data.ranges))
-            self.intensity_data[topic_name] = np.squeeze(np.array(data.intensities))[
+            self.intensity_data[topic_name] = buffer_to_numpy(data.intensities)[
                 is_finite
             ]
 
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import copy
 import warnings
 from typing import Optional
@@ -93,6 +95,133 @@ def map_infinite_stereographic_to_cartesian(
     return directions @ basis.T
 
 
+def get_stereographic_bases(centers: np.ndarray) -> np.ndarray:
+    """Returns the orthogonal bases of the centers (n_centers, n_features) stacked
+    as array of shape (n_centers, n_features, n_features)."""
+    return np.array([get_orthogonal_basis(center) for center in centers])
+
+
+def _get_stereographic_cosines(
+    directions: np.ndarray, centers: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the radii (n_samples) and the cosines between the directions and
+    the centers (n_samples, n_centers)."""
+    radiuses = np.linalg.norm(directions, axis=1)
+    unit_centers = centers / np.linalg.norm(centers, axis=1)[:, np.newaxis]
+    cos_directions = (directions @ unit_centers.T) / radiuses[:, np.newaxis]
+    return radiuses, cos_directions
+
+
+def get_stereographic_distances(
+    directions: np.ndarray,
+    centers: np.ndarray,
+    max_value: float = 1e99,
+    tangential_multiple: float = 2.0,
+    cos_margin: float = 1e-6,
+) -> np.ndarray:
+    """Returns the distances (n_samples, n_centers) between the directions mapped
+    with the basis of each center and the mapped center, i.e.,
+    norm(map_cartesian_to_infite_stereographic(basis_k, directions) - [|c_k|, 0..])
+
+    The mapped positions are not evaluated, since the norm of their tangential part
+    only depends on the cosine."""
+    radiuses, cos_directions = _get_stereographic_cosines(directions, centers)
+
+    ind_opposing = cos_directions <= (-1.0 + cos_margin)
+    ind_parallel = cos_directions >= (1.0 - cos_margin)
+    ind_general = np.logical_not(np.logical_or(ind_parallel, ind_opposing))
+
+    tangential_norms = np.zeros(cos_directions.shape)
+    if np.any(ind_parallel):
+        # Parallel directions are not stretched (the sine is evaluated explicitly,
+        # since it is not accurate from the cosine)
+        ind_sample, ind_center = np.nonzero(ind_parallel)
+        unit_centers = centers / np.linalg.norm(centers, axis=1)[:, np.newaxis]
+        tangential_norms[ind_parallel] = np.linalg.norm(
+            directions[ind_sample, :] / radiuses[ind_sample, np.newaxis]
+            - cos_directions[ind_parallel, np.newaxis] * unit_centers[ind_center, :],
+            axis=1,
+        )
+    tangential_norms[ind_general] = (
+        tangential_multiple / (1 + cos_directions[ind_general])
+        - tangential_multiple / 2.0
+    )
+    tangential_norms[ind_opposing] = max_value * np.sqrt(directions.shape[1] - 1)
+
+    return np.hypot(
+        radiuses[:, np.newaxis] - np.linalg.norm(centers, axis=1), tangential_norms
+    )
+
+
+def get_stereographic_weighted_sums(
+    directions: np.ndarray,
+    centers: np.ndarray,
+    bases: np.ndarray,
+    weights: np.ndarray,
+    max_value: float = 1e99,
+    tangential_multiple: float = 2.0,
+    cos_margin: float = 1e-6,
+) -> np.ndarray:
+    """Returns the sums over the samples of the weighted mapped directions, i.e.,
+    sum_n weights[n, k] * map_cartesian_to_infite_stereographic(basis_k, directions)
+    for the bases (n_centers, n_features, n_features) and weights of shape
+    (n_samples, n_centers). The mapping is linear in the normalized directions for
+    a given cosine, hence, the sum is taken before projecting onto the bases."""
+    radiuses, cos_directions = _get_stereographic_cosines(directions, centers)
+
+    ind_opposing = cos_directions <= (-1.0 + cos_margin)
+    ind_general = np.logical_and(
+        cos_directions < (1.0 - cos_margin), np.logical_not(ind_opposing)
+    )
+
+    # Stretching of the tangential part (parallel directions are not stretched)
+    stretching = np.ones(cos_directions.shape)
+    cos_values = cos_directions[ind_general]
+    stretching[ind_general] = (
+        tangential_multiple / (1 + cos_values) - tangential_multiple / 2.0
+    ) / np.sqrt(1.0 - cos_values * cos_values)
+    stretching[ind_opposing] = 0
+
+    normalized_directions = directions / radiuses[:, np.newaxis]
+    tangential_sums = np.einsum(
+        "kf,kfg->kg",
+        (weights * stretching).T @ normalized_directions,
+        bases[:, :, 1:],
+    )
+    # Opposing directions are infinitely far away
+    tangential_sums = tangential_sums + max_value * np.sum(
+        weights * ind_opposing, axis=0
+    )[:, np.newaxis]
+
+    return np.hstack(((weights.T @ radiuses)[:, np.newaxis], tangential_sums))
+
+
+def map_infinite_stereographic_to_cartesian_batch(
+    bases: np.ndarray, positions: np.ndarray, **kwargs
+) -> np.ndarray:
+    """Maps each of the positions (n_centers, n_features) back with the
+    corresponding basis of the stacked bases (n_centers, n_features, n_features)."""
+    local_directions = map_infinite_stereographic_to_cartesian(
+        np.eye(positions.shape[1]), positions, **kwargs
+    )
+    return np.einsum("kg,kfg->kf", local_directions, bases)
+
+
+def get_minibatch(
+    XX: np.ndarray,
+    sample_weights: Optional[np.ndarray] = None,
+    batch_size: Optional[int] = None,
+) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """Returns a random subset of (at most) batch_size samples and their weights."""
+    if batch_size is None or batch_size >= XX.shape[0]:
+        return XX, sample_weights
+
+    ind_batch = np.random.choice(XX.shape[0], size=batch_size, replace=False)
+    if sample_weights is not None:
+        sample_weights = sample_weights[ind_batch]
+    return XX[ind_batch, :], sample_weights
+
+
 class DistanceWeightType(Enum):
     QUADRATIC = auto()
     EXPONENTIAL = auto()
@@ -106,10 +235,10 @@ def get_inverse_square_distance_weight(distances: np.ndarray) -> np.ndarray:
 
 
 def get_exponential_stiffness_weight(
-    distances: np.ndarray, beta: float = 1.0
+    distances: np.ndarray, beta: float = 1.0, axis: Optional[int] = None
 ) -> np.ndarray:
     weights = np.exp(-beta * distances)
-    weights = weights / np.sum(weights)
+    weights = weights / np.sum(weights, axis=axis, keepdims=axis is not None)
     return weights
 
 
@@ -119,7 +248,22 @@ class DirectionalKMeans:
         max_iter: int = 100,
         conv_tol: float = 1e-4,
         n_clusters: int = 4,
+        partial_max_iter: int = 1,
+        batch_size: Optional[int] = None,
+        forgetting_factor: float = 0.9,
+        verbose: bool = False,
     ) -> None:
+        """
+        Arguments
+        ---------
+        partial_max_iter: Number of mini-batch steps of each call of 'partial_fit'
+        batch_size: Number of (random) samples of each call of 'partial_fit',
+            all samples are used if None
+        forgetting_factor: Decay of the accumulated counts at each mini-batch step,
+            such that the learning rate stays above about (1 - forgetting_factor)
+            and the centers follow moving obstacles. With 1, the centers are the
+            running mean of all samples (and freeze over time).
+        """
         self.max_iter = max_iter
         self.conv_tol = conv_tol
 
@@ -127,9 +271,17 @@ class DirectionalKMeans:
         self.n_clusters = n_clusters
         # self.cluster_centers_: np.ndarray
 
+        self.partial_max_iter = partial_max_iter
+        self.batch_size = batch_size
+        self.forgetting_factor = forgetting_factor
+        self.verbose = verbose
+
         self.n_samples_ = 0
         self.n_features_ = 0
 
+        # Accumulated (weighted) number of samples of each cluster
+        self.counts_ = np.zeros(self.n_clusters)
+
     def initialize_centers(
         self, XX: np.ndarray, base_direction: np.ndarray, variance: float = 1.0
     ) -> np.ndarray:
@@ -183,77 +335,118 @@ class DirectionalKMeans:
             error = self.update_step_hard_boundary(XX, sample_weights=sample_weights)
 
             if abs(error - old_error) < self.conv_tol:
-                print(f"Converged at {ii}")
+                if self.verbose:
+                    print(f"Converged at {ii}")
                 break
 
             old_error = error
 
         else:
-            print("Ending without convergence.")
+            if self.verbose:
+                print("Ending without convergence.")
 
-    def update_step_hard_boundary(
+    def partial_fit(
+        self, XX: np.ndarray, sample_weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Mini-batch update of the (warm-started) centers with a bounded number of
+        steps, e.g., with the newly arrived points of a scan.
+        Returns the labels of all samples."""
+        if not hasattr(self, "cluster_centers_") or self.n_features_ != XX.shape[1]:
+            self.n_features_ = XX.shape[1]
+            self.cluster_centers_ = self.initialize_from_points(XX)
+            self.counts_ = np.zeros(self.n_clusters)
+
+        for _ in range(self.partial_max_iter):
+            batch, batch_weights = get_minibatch(XX, sample_weights, self.batch_size)
+            self.n_samples_ = batch.shape[0]
+            self.update_step_minibatch(batch, sample_weights=batch_weights)
+
+        return self.predict(XX)
+
+    def update_step_minibatch(
         self, XX: np.ndarray, sample_weights: Optional[np.ndarray] = None
     ) -> float:
-        """Returns proximity-metric (mean-weighted-distances)"""
-        transformed_positions = np.zeros(
-            (self.n_samples_, self.n_features_, self.n_clusters)
+        """Moves each center towards the mean of its samples (in its stereographic
+        space) with the learning rate: batch-weight / accumulated-weight, where the
+        accumulated weight decays with the forgetting factor.
+        Returns proximity-metric (mean-weighted-distances)"""
+        bases = get_stereographic_bases(self.cluster_centers_)
+        distances = get_stereographic_distances(XX, self.cluster_centers_)
+        labels = np.argmin(distances, axis=1)
+
+        if sample_weights is None:
+            sample_weights = np.ones(XX.shape[0])
+
+        weights = np.zeros((XX.shape[0], self.n_clusters))
+        weights[np.arange(XX.shape[0]), labels] = sample_weights
+        batch_weights = np.sum(weights, axis=0)
+
+        ind_used = batch_weights > 0
+        mapped_means = (
+            get_stereographic_weighted_sums(
+                XX,
+                self.cluster_centers_[ind_used],
+                bases[ind_used],
+                weights[:, ind_used],
+            )
+            / batch_weights[ind_used, np.newaxis]
         )
-        distances = np.zeros((self.n_samples_, self.n_clusters))
-        bases = np.zeros((self.n_features_, self.n_features_, self.n_clusters))
 
-        for kk in range(self.n_clusters):
-            bases[:, :, kk] = get_orthogonal_basis(self.cluster_centers_[kk, :])
+        self.counts_ = self.forgetting_factor * self.counts_ + batch_weights
+        learning_rates = batch_weights[ind_used] / self.counts_[ind_used]
 
-            transformed_positions[:, :, kk] = map_cartesian_to_infite_stereographic(
-                bases[:, :, kk], XX
+        # The current centers are mapped onto the radial axis
+        mapped_centers = np.zeros(mapped_means.shape)
+        mapped_centers[:, 0] = np.linalg.norm(self.cluster_centers_[ind_used], axis=1)
+        mapped_centers = mapped_centers + learning_rates[:, np.newaxis] * (
+            mapped_means - mapped_centers
+        )
+        self.cluster_centers_[ind_used, :] = (
+            map_infinite_stereographic_to_cartesian_batch(
+                bases[ind_used], mapped_centers
             )
+        )
 
-            distances[:, kk] = np.linalg.norm(
-                transformed_positions[:, :, kk]
-                - np.tile(self.get_stereographic_center(kk), (self.n_samples_, 1)),
-                axis=1,
-            )
+        weighted_dist = distances[np.arange(XX.shape[0]), labels] * sample_weights
+        return np.sum(weighted_dist * weighted_dist) / XX.shape[0]
+
+    def update_step_hard_boundary(
+        self, XX: np.ndarray, sample_weights: Optional[np.ndarray] = None
+    ) -> float:
+        """Returns proximity-metric (mean-weighted-distances)"""
+        bases = get_stereographic_bases(self.cluster_centers_)
+        distances = get_stereographic_distances(XX, self.cluster_centers_)
 
         self.labels_ = np.argmin(distances, axis=1)
-        it_empty = 0
-        mean_squared_distance = 0
-
-        for kk in range(self.n_clusters):
-            ind_label = self.labels_ == kk
-
-            if not np.sum(ind_label):
-                warnings.warn("Assigning empty cluster to far away point.")
-                if not it_empty:
-                    min_dists = np.min(distances, axis=1)
-                    furthest_dists = np.argsort(min_dists)
-
-                it_empty += 1
-                self.cluster_centers_[kk, :] = XX[-it_empty]
-                continue
-
-            if sample_weights is None:
-                mapped_center = np.mean(transformed_positions[ind_label, :, kk], axis=0)
-                mean_squared_distance = mean_squared_distance + np.sum(
-                    distances[ind_label] * distances[ind_label]
-                )
-
-            else:
-                mapped_center = np.mean(
-                    transformed_positions[ind_label, :, kk]
-                    * np.tile(sample_weights[ind_label], (self.n_features_, 1)).T,
-                    axis=0,
-                )
-                weighted_dist = distances[ind_label] * sample_weights[ind_label]
-                mean_squared_distance = mean_squared_distance + np.sum(
-                    weighted_dist * weighted_dist
-                )
-
-            self.cluster_centers_[kk, :] = map_infinite_stereographic_to_cartesian(
-                bases[:, :, kk], mapped_center.reshape(1, self.n_features_)
+        counts = np.bincount(self.labels_, minlength=self.n_clusters)
+
+        # Each sample only contributes to the center of its cluster
+        weights = np.zeros((self.n_samples_, self.n_clusters))
+        if sample_weights is None:
+            weights[np.arange(self.n_samples_), self.labels_] = 1
+            mean_squared_distance = np.sum(distances * distances)
+        else:
+            weights[np.arange(self.n_samples_), self.labels_] = sample_weights
+            weighted_dist = (
+                distances[np.arange(self.n_samples_), self.labels_] * sample_weights
+            )
+            mean_squared_distance = np.sum(weighted_dist * weighted_dist)
+
+        ind_used = counts > 0
+        mapped_centers = get_stereographic_weighted_sums(
+            XX, self.cluster_centers_[ind_used], bases[ind_used], weights[:, ind_used]
+        )
+        mapped_centers = mapped_centers / counts[ind_used, np.newaxis]
+
+        self.cluster_centers_[ind_used, :] = (
+            map_infinite_stereographic_to_cartesian_batch(
+                bases[ind_used], mapped_centers
             )
+        )
 
-            if np.any(np.isnan(self.cluster_centers_)):
-                breakpoint()
+        for it_empty, kk in enumerate(np.flatnonzero(np.logical_not(ind_used))):
+            warnings.warn("Assigning empty cluster to far away point.")
+            self.cluster_centers_[kk, :] = XX[-(it_empty + 1)]
 
         return mean_squared_distance / self.n_samples_
 
@@ -261,25 +454,7 @@ class DirectionalKMeans:
         if XX.shape[1] != self.n_features_:
             raise ValueError(f"Wrong data-dimension of {XX.shape}")
 
-        transformed_positions = np.zeros(
-            (XX.shape[0], self.n_features_, self.n_clusters)
-        )
-        distances = np.zeros((XX.shape[0], self.n_clusters))
-        bases = np.zeros((self.n_features_, self.n_features_, self.n_clusters))
-
-        for kk in range(self.n_clusters):
-            bases[:, :, kk] = get_orthogonal_basis(self.cluster_centers_[kk, :])
-
-            transformed_positions[:, :, kk] = map_cartesian_to_infite_stereographic(
-                bases[:, :, kk], XX
-            )
-
-            distances[:, kk] = np.linalg.norm(
-                transformed_positions[:, :, kk]
-                - np.tile(self.get_stereographic_center(kk), (XX.shape[0], 1)),
-                axis=1,
-            )
-
+        distances = get_stereographic_distances(XX, self.cluster_centers_)
         self.labels_ = np.argmin(distances, axis=1)
 
         return self.labels_
@@ -293,10 +468,24 @@ class DirectionalSoftKMeans:
         n_clusters: int = 4,
         stiffness: float = 1.0,
         distance_type: DistanceWeightType = DistanceWeightType.EXPONENTIAL,
+        partial_max_iter: int = 1,
+        batch_size: Optional[int] = None,
+        verbose: bool = False,
     ) -> None:
+        """
+        Arguments
+        ---------
+        partial_max_iter: Number of update steps of each call of 'partial_fit'
+        batch_size: Number of (random) samples of each call of 'partial_fit',
+            all samples are used if None
+        """
         self.max_iter = max_iter
         self.conv_tol = conv_tol
 
+        self.partial_max_iter = partial_max_iter
+        self.batch_size = batch_size
+        self.verbose = verbose
+
         self.distance_type = distance_type
 
         # TODO: automatically update if too big / too small
@@ -341,7 +530,8 @@ class DirectionalSoftKMeans:
 
         self._it_fit += 1
         if not self._it_fit % self.new_cluster_frequency:
-            print("Adding a new cluster.")
+            if self.verbose:
+                print("Adding a new cluster.")
             self.add_cluster(XX)
 
         old_error = self.update_step_soft_boundary(XX, sample_weights=sample_weights)
@@ -349,12 +539,31 @@ class DirectionalSoftKMeans:
             error = self.update_step_soft_boundary(XX, sample_weights=sample_weights)
 
             if abs(error - old_error) < self.conv_tol:
-                print(f"Converged at {ii}")
+                if self.verbose:
+                    print(f"Converged at {ii}")
                 return
 
             old_error = error
 
-        print("Ended without convergence.")
+        if self.verbose:
+            print("Ended without convergence.")
+
+    def partial_fit(
+        self, XX: np.ndarray, sample_weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Continues from the current centers with a bounded number of update steps
+        (on random subsets of the samples). No clusters are added.
+        Returns the labels of all samples."""
+        if not hasattr(self, "cluster_centers_") or self.n_features_ != XX.shape[1]:
+            self.n_features_ = XX.shape[1]
+            self.cluster_centers_ = self.initialize_from_points(XX)
+
+        for _ in range(self.partial_max_iter):
+            batch, batch_weights = get_minibatch(XX, sample_weights, self.batch_size)
+            self.n_samples_ = batch.shape[0]
+            self.update_step_soft_boundary(batch, sample_weights=batch_weights)
+
+        return self.predict(XX)
 
     def add_cluster(self, XX: np.ndarray) -> None:
         # TODO: maybe this could be integrated in the update_step to reduce computation
@@ -369,102 +578,57 @@ class DirectionalSoftKMeans:
         self.n_clusters += 1
 
     def get_cluster_distances(self, XX) -> np.ndarray:
-        distances = np.zeros((self.n_samples_, self.n_clusters))
-        transformed_positions = np.zeros(
-            (self.n_samples_, self.n_features_, self.n_clusters)
-        )
-        bases = np.zeros((self.n_features_, self.n_features_, self.n_clusters))
-        for kk in range(self.n_clusters):
-            bases[:, :, kk] = get_orthogonal_basis(self.cluster_centers_[kk, :])
-            transformed_positions[:, :, kk] = map_cartesian_to_infite_stereographic(
-                bases[:, :, kk], XX
-            )
-            distances[:, kk] = np.linalg.norm(
-                transformed_positions[:, :, kk]
-                - np.tile(self.get_stereographic_center(kk), (self.n_samples_, 1)),
-                axis=1,
-            )
-        return distances
+        return get_stereographic_distances(XX, self.cluster_centers_)
 
     def update_step_soft_boundary(
         self, XX: np.ndarray, sample_weights: Optional[np.ndarray] = None
     ) -> float:
         """Returns proximity-metric (mean-weighted-distances)"""
-        transformed_positions = np.zeros(
-            (self.n_samples_, self.n_features_, self.n_clusters)
-        )
-        bases = np.zeros((self.n_features_, self.n_features_, self.n_clusters))
-        distances = np.zeros((self.n_samples_, self.n_clusters))
-        self.weights = np.zeros((self.n_samples_, self.n_clusters))
-
-        for kk in range(self.n_clusters):
-            bases[:, :, kk] = get_orthogonal_basis(self.cluster_centers_[kk, :])
+        bases = get_stereographic_bases(self.cluster_centers_)
+        distances = get_stereographic_distances(XX, self.cluster_centers_)
 
-            transformed_positions[:, :, kk] = map_cartesian_to_infite_stereographic(
-                bases[:, :, kk], XX
+        if self.distance_type == DistanceWeightType.EXPONENTIAL:
+            self.weights = get_exponential_stiffness_weight(
+                np.zeros((self.n_samples_, self.n_clusters)), self.stiffness, axis=0
             )
 
-            distances[:, kk] = np.linalg.norm(
-                transformed_positions[:, :, kk]
-                - np.tile(self.get_stereographic_center(kk), (self.n_samples_, 1)),
-                axis=1,
-            )
-
-            if self.distance_type == DistanceWeightType.EXPONENTIAL:
-                self.weights[:, kk] = get_exponential_stiffness_weight(
-                    self.weights[:, kk], self.stiffness
-                )
-
-            elif self.distance_type == DistanceWeightType.QUADRATIC:
-                self.weights[:, kk] = get_inverse_square_distance_weight(
-                    distances[:, kk]
-                )
-            else:
-                raise ValueError(f"Unkown type {self.distance_type}.")
+        elif self.distance_type == DistanceWeightType.QUADRATIC:
+            self.weights = get_inverse_square_distance_weight(distances)
+        else:
+            raise ValueError(f"Unkown type {self.distance_type}.")
 
-            if sample_weights is not None:
-                self.weights[:, kk] = self.weights[:, kk] * sample_weights
-                self.weights[:, kk] = self.weights[:, kk] / np.sum(self.weights[:, kk])
-                raise NotImplementedError("Make consistent summing")
+        if sample_weights is not None:
+            raise NotImplementedError("Make consistent summing")
 
         self.labels_ = np.argmin(distances, axis=1)
-        mean_squared_distance = 0.0
 
         # Remove redundant clusters
-        it_kk = 0
-        it_label = 0
-        for _ in range(self.n_clusters):
-            ind = self.labels_ == it_kk
-            if not np.sum(ind):
-                print(f"Removing cluster #{it_label}.")
-                ind_large = self.labels_ > it_kk
-
-                self.labels_[ind_large] = self.labels_[ind_large] - 1
-                self.cluster_centers_ = np.delete(self.cluster_centers_, it_kk, axis=0)
-                self.n_clusters -= 1
-
-            else:
-                it_kk += 1
-
-            it_label += 1
-
-        for kk in range(self.n_clusters):
-            mapped_center = np.mean(
-                transformed_positions[:, :, kk]
-                * np.tile(self.weights[:, kk], (self.n_features_, 1)).T,
-                axis=0,
-            )
-            weighted_dist = distances[:, kk] * self.weights[:, kk]
-            mean_squared_distance = mean_squared_distance + np.sum(
-                weighted_dist * weighted_dist
-            )
-
-            self.cluster_centers_[kk, :] = map_infinite_stereographic_to_cartesian(
-                bases[:, :, kk], mapped_center.reshape(1, self.n_features_)
+        ind_used = np.bincount(self.labels_, minlength=self.n_clusters) > 0
+        if not np.all(ind_used):
+            if self.verbose:
+                for it_label in np.flatnonzero(np.logical_not(ind_used)):
+                    print(f"Removing cluster #{it_label}.")
+
+            self.labels_ = (np.cumsum(ind_used) - 1)[self.labels_]
+            self.cluster_centers_ = self.cluster_centers_[ind_used, :]
+            self.n_clusters = self.cluster_centers_.shape[0]
+
+            bases = bases[ind_used]
+            distances = distances[:, ind_used]
+            self.weights = self.weights[:, ind_used]
+
+        mapped_centers = (
+            get_stereographic_weighted_sums(
+                XX, self.cluster_centers_, bases, self.weights
             )
+            / self.n_samples_
+        )
+        weighted_dist = distances * self.weights
+        mean_squared_distance = np.sum(weighted_dist * weighted_dist)
 
-            if np.any(np.isnan(self.cluster_centers_)):
-                breakpoint()
+        self.cluster_centers_ = map_infinite_stereographic_to_cartesian_batch(
+            bases, mapped_centers
+        )
 
         return mean_squared_distance / self.n_samples_
 
@@ -472,25 +636,7 @@ class DirectionalSoftKMeans:
         if XX.shape[1] != self.n_features_:
             raise ValueError(f"Wrong data-dimension of {XX.shape}")
 
-        transformed_positions = np.zeros(
-            (XX.shape[0], self.n_features_, self.n_clusters)
-        )
-        distances = np.zeros((XX.shape[0], self.n_clusters))
-        bases = np.zeros((self.n_features_, self.n_features_, self.n_clusters))
-
-        for kk in range(self.n_clusters):
-            bases[:, :, kk] = get_orthogonal_basis(self.cluster_centers_[kk, :])
-
-            transformed_positions[:, :, kk] = map_cartesian_to_infite_stereographic(
-                bases[:, :, kk], XX
-            )
-
-            distances[:, kk] = np.linalg.norm(
-                transformed_positions[:, :, kk]
-                - np.tile(self.get_stereographic_center(kk), (XX.shape[0], 1)),
-                axis=1,
-            )
-
+        distances = get_stereographic_distances(XX, self.cluster_centers_)
         self.labels_ = np.argmin(distances, axis=1)
 
         return self.labels_
@@ -10,16 +10,26 @@ import rosbag
 import numpy as np
 
 # from numpy import linalg as LA
+
+from .utils import PolarScan
 # from .utils import obstacle_list_in_local_frame
 
 
 def reset_laserscan(allscan, position, angle_gap=np.pi / 2):
     # Find the largest gap
     # -> if it's bigger than 90 degrees -> you're outside and should switch
-    scangle = np.arctan2(allscan[1, :], allscan[0, :])
+    if isinstance(allscan, PolarScan):
+        # Already sorted by angle
+        sort_vals = allscan.bearings
+        ind_sortvals = np.arange(allscan.n_points)
+        allscan = allscan.positions
+
+    else:
+        scangle = np.arctan2(allscan[1, :], allscan[0, :])
+
+        ind_sortvals = np.argsort(scangle)
+        sort_vals = scangle[ind_sortvals]
 
-    ind_sortvals = np.argsort(scangle)
-    sort_vals = scangle[ind_sortvals]
     d_angle = sort_vals - np.roll(sort_vals, shift=1)
 
     ind_max = np.argmax(d_angle)
@@ -9,8 +9,10 @@ The algorithm is developed for shared control,
 # Use python 3.10 [annotations / typematching]
 from __future__ import annotations  # Not needed from python 3.10 onwards
 
+import math
 import warnings
 from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
 
 import numpy as np
 from numpy import linalg as LA
@@ -20,6 +22,18 @@ from vartools.linalg import get_orthogonal_basis
 from .stretching_matrix import StretchingMatrixBasic
 from .stretching_matrix import StretchingMatrixTrigonometric
 from .stretching_matrix import StretchingMatrixExponential
+from .stretching_matrix import StretchingMatrixLUT
+from ._workspace import ScanWorkspace
+
+
+class BatchDirections(NamedTuple):
+    """Result of the batched evaluation of an avoider, all arrays are of
+    shape (dimension, n_positions)."""
+
+    reference_directions: np.ndarray
+    normal_directions: Optional[np.ndarray] = None
+    # Velocity of the (moving) obstacles relative to which the avoidance is done
+    relative_velocities: Optional[np.ndarray] = None
 
 
 class SingleModulationAvoider(ABC):
@@ -42,6 +56,8 @@ class SingleModulationAvoider(ABC):
         weight_factor: float = 1,
         weight_power: float = 2,
         margin_weight: float = 1e-3,
+        # Floating type of the scan-sized arrays (e.g. np.float32)
+        dtype=float,
     ):
         if stretching_matrix is None:
             self.stretching_matrix = StretchingMatrixTrigonometric()
@@ -72,6 +88,13 @@ class SingleModulationAvoider(ABC):
         self.reference_update_before_modulation = reference_update_before_modulation
         self.evaluate_velocity_weight = evaluate_velocity_weight
 
+        self.dtype = np.dtype(dtype)
+
+    def as_dtype(self, array: np.ndarray) -> np.ndarray:
+        """Returns the array in the floating type of the avoider,
+        it is only copied if the type differs."""
+        return np.asarray(array, dtype=self.dtype)
+
     def avoid(
         self,
         initial_velocity: np.ndarray,
@@ -79,21 +102,18 @@ class SingleModulationAvoider(ABC):
         normalize_velocity: bool = True,
         position: np.ndarray = None,
     ) -> None:
-        """Modulate velocity and return DS."""
+        """Modulate velocity and return DS.
+
+        The velocity relative to the (moving) obstacles is modulated. Zero velocities
+        and unmodulated positions are returned unchanged (as in 'avoid_batch')."""
         # For each control_points
         # -> get distance (minus radius)
         # -> get closest points
         # -> get_weights => how?
 
-        if self.relative_velocity is not None:
-            initial_velocity = initial_velocity - self.relative_velocity
-
         if not LA.norm(initial_velocity):
             # Trivial velocity modulation
-            if self.relative_velocity is None:
-                return initial_velocity
-            else:
-                return initial_velocity - self.relative_velocity
+            return initial_velocity
 
         if self.reference_update_before_modulation:
             if position is None:
@@ -108,54 +128,350 @@ class SingleModulationAvoider(ABC):
             # Not modulated when far away from everywhere / in between two obstacles
             return initial_velocity
 
-        if self.normal_direction is None or not LA.norm(self.normal_direction):
+        # Modulate relative to the moving obstacles (of the current reference)
+        relative_initial_velocity = initial_velocity
+        if self.relative_velocity is not None:
+            relative_initial_velocity = initial_velocity - self.relative_velocity
+
+        modulated_velocity = self.get_modulated_velocity(
+            relative_initial_velocity, self.reference_direction, self.normal_direction
+        )
+
+        # TODO: limit velocity with respect to maximum velocity
+        if limit_velocity_magnitude:
+            modulated_velocity = self.limit_modulated_magnitude(
+                modulated_velocity.reshape(-1, 1),
+                initial_velocity.reshape(-1, 1),
+                normalize_velocity=normalize_velocity,
+            )[:, 0]
+        # breakpoint()
+        return modulated_velocity
+
+    def get_modulated_velocity(
+        self,
+        initial_velocity: np.ndarray,
+        reference_direction: np.ndarray,
+        normal_direction: np.ndarray = None,
+    ) -> np.ndarray:
+        """Returns the modulated velocity for a (non-zero) reference direction,
+        without changing the state of the avoider.
+
+        The closed-form kernels are used for two and three dimensions,
+        the general decomposition for any other dimension."""
+        dimension = initial_velocity.shape[0]
+        if dimension == 2:
+            modulated_velocity = self._get_modulated_velocity_2d(
+                initial_velocity, reference_direction, normal_direction
+            )
+        elif dimension == 3:
+            modulated_velocity = self._get_modulated_velocity_3d(
+                initial_velocity, reference_direction, normal_direction
+            )
+        else:
+            modulated_velocity = None
+
+        if modulated_velocity is None:
+            modulated_velocity = self._get_modulated_velocity_from_basis(
+                initial_velocity, reference_direction, normal_direction
+            )
+        return modulated_velocity
+
+    def _get_modulated_velocity_from_basis(
+        self,
+        initial_velocity: np.ndarray,
+        reference_direction: np.ndarray,
+        normal_direction: np.ndarray = None,
+    ) -> np.ndarray:
+        """General modulation: M = E @ D @ inv(E), with the decomposition E
+        of the reference and the tangents of the normal."""
+        ref_norm = LA.norm(reference_direction)
+
+        if normal_direction is None or not LA.norm(normal_direction):
             decomposition_matrix = get_orthogonal_basis(
-                self.reference_direction / ref_norm, normalize=False
+                reference_direction / ref_norm, normalize=False
             )
             inv_decomposition = decomposition_matrix.T
 
         else:
             decomposition_matrix = get_orthogonal_basis(
-                self.normal_direction, normalize=False
+                normal_direction, normalize=False
             )
 
-            decomposition_matrix[:, 0] = self.reference_direction / ref_norm
+            decomposition_matrix[:, 0] = reference_direction / ref_norm
             inv_decomposition = LA.pinv(decomposition_matrix)
 
         stretching_matrix = self.stretching_matrix.get(
-            ref_norm, self.reference_direction, self.normal_direction, initial_velocity
+            ref_norm, reference_direction, normal_direction, initial_velocity
         )
 
         modulated_velocity = inv_decomposition @ initial_velocity
         modulated_velocity = stretching_matrix @ modulated_velocity
         modulated_velocity = decomposition_matrix @ modulated_velocity
+        return modulated_velocity
 
-        # TODO: limit velocity with respect to maximum velocity
-        if self.relative_velocity is not None:
-            initial_velocity = initial_velocity + self.relative_velocity
+    def _get_modulated_velocity_2d(
+        self,
+        initial_velocity: np.ndarray,
+        reference_direction: np.ndarray,
+        normal_direction: np.ndarray = None,
+        singular_margin: float = 1e-12,
+    ) -> Optional[np.ndarray]:
+        """Closed-form modulation in 2D, returns None if the decomposition is singular.
+
+        All tangent directions share the same eigenvalue, hence the modulation is
+        M v = lambda_tang * v + (lambda_ref - lambda_tang) * r * <n, v> / <n, r>
+        where the dual vector of the (unit) reference r is the normal n."""
+        vel_0, vel_1 = float(initial_velocity[0]), float(initial_velocity[1])
+        ref_0, ref_1 = float(reference_direction[0]), float(reference_direction[1])
+
+        ref_norm = math.sqrt(ref_0 * ref_0 + ref_1 * ref_1)
+        ref_0, ref_1 = ref_0 / ref_norm, ref_1 / ref_norm
+
+        if normal_direction is None:
+            norm_0, norm_1 = ref_0, ref_1
+        else:
+            norm_0, norm_1 = float(normal_direction[0]), float(normal_direction[1])
+            if not (norm_0 or norm_1):
+                norm_0, norm_1 = ref_0, ref_1
+
+        norm_dot_ref = norm_0 * ref_0 + norm_1 * ref_1
+        if abs(norm_dot_ref) < singular_margin * math.sqrt(
+            norm_0 * norm_0 + norm_1 * norm_1
+        ):
+            return None
+
+        lambda_ref, lambda_tang = self.stretching_matrix.get_lambdas(
+            ref_norm, reference_direction, normal_direction, initial_velocity
+        )
+
+        ref_factor = (
+            (lambda_ref - lambda_tang)
+            * (norm_0 * vel_0 + norm_1 * vel_1)
+            / norm_dot_ref
+        )
+        return np.array(
+            [
+                lambda_tang * vel_0 + ref_factor * ref_0,
+                lambda_tang * vel_1 + ref_factor * ref_1,
+            ]
+        )
+
+    def _get_modulated_velocity_3d(
+        self,
+        initial_velocity: np.ndarray,
+        reference_direction: np.ndarray,
+        normal_direction: np.ndarray = None,
+        singular_margin: float = 1e-12,
+    ) -> Optional[np.ndarray]:
+        """Closed-form modulation in 3D, see '_get_modulated_velocity_2d'."""
+        ref_norm = LA.norm(reference_direction)
+        unit_reference = reference_direction / ref_norm
+
+        if normal_direction is None or not LA.norm(normal_direction):
+            decomposition_normal = unit_reference
+        else:
+            decomposition_normal = normal_direction
+
+        norm_dot_ref = np.dot(decomposition_normal, unit_reference)
+        if abs(norm_dot_ref) < singular_margin * LA.norm(decomposition_normal):
+            return None
+
+        lambda_ref, lambda_tang = self.stretching_matrix.get_lambdas(
+            ref_norm, reference_direction, normal_direction, initial_velocity
+        )
+
+        ref_factor = (
+            (lambda_ref - lambda_tang)
+            * np.dot(decomposition_normal, initial_velocity)
+            / norm_dot_ref
+        )
+        return lambda_tang * initial_velocity + ref_factor * unit_reference
+
+    @staticmethod
+    def limit_modulated_magnitude(
+        modulated_velocities: np.ndarray,
+        initial_velocities: np.ndarray,
+        normalize_velocity: bool = True,
+    ) -> np.ndarray:
+        """Limit the magnitude of the modulated velocities (dimension, n_velocities)
+        to the magnitude of the corresponding initial velocities."""
+        mod_norms = LA.norm(modulated_velocities, axis=0)
+        init_norms = LA.norm(initial_velocities, axis=0)
+
+        ind_scale = mod_norms > init_norms
+        if normalize_velocity:
+            # TODO: should also take into account proximity to obstacles
+            # Speed up simulation
+            ind_scale = np.logical_or(ind_scale, mod_norms > 1e-1)
+
+        if not np.any(ind_scale):
+            return modulated_velocities
+
+        modulated_velocities = np.copy(modulated_velocities)
+        modulated_velocities[:, ind_scale] = modulated_velocities[:, ind_scale] * (
+            init_norms[ind_scale] / mod_norms[ind_scale]
+        )
+        return modulated_velocities
+
+    def avoid_batch(
+        self,
+        positions: np.ndarray,
+        initial_velocities: np.ndarray,
+        limit_velocity_magnitude: bool = True,
+        normalize_velocity: bool = True,
+    ) -> np.ndarray:
+        """Modulate the initial velocities at many positions at once.
+
+        Arguments
+        ---------
+        positions: Array of shape (dimension, n_positions) with the query positions
+        initial_velocities: Array of shape (dimension, n_positions) with the initial
+            velocity at each position
+
+        Returns the modulated velocities as array of shape (dimension, n_positions).
+        The evaluation does not change the state of the avoider, i.e., the reference
+        and normal direction of the last `avoid` call are kept. If relative
+        velocities are evaluated, they are the ones at the respective position
+        (instead of the ones of the last `avoid` call).
+        """
+        positions = self.as_dtype(positions)
+        initial_velocities = self.as_dtype(initial_velocities)
+        if positions.shape != initial_velocities.shape:
+            raise ValueError(
+                f"Shape of positions {positions.shape} does not match "
+                + f"shape of velocities {initial_velocities.shape}."
+            )
+
+        modulated_velocities = np.copy(initial_velocities)
+
+        # Trivial velocity modulation
+        ind_active = LA.norm(initial_velocities, axis=0) > 0
+        if not np.any(ind_active):
+            return modulated_velocities
+
+        (
+            reference_directions,
+            normal_directions,
+            relative_velocities,
+        ) = self.get_batch_directions(
+            positions[:, ind_active], initial_velocities[:, ind_active]
+        )
+
+        # Not modulated when far away from everywhere / in between two obstacles
+        ind_modulated = LA.norm(reference_directions, axis=0) > 0
+        ind_active[ind_active] = ind_modulated
+
+        reference_directions = reference_directions[:, ind_modulated]
+        if normal_directions is not None:
+            normal_directions = normal_directions[:, ind_modulated]
+
+        active_velocities = initial_velocities[:, ind_active]
+        if relative_velocities is not None:
+            # Modulate relative to the moving obstacles (as in `avoid`)
+            active_velocities = (
+                active_velocities - relative_velocities[:, ind_modulated]
+            )
+
+        active_velocities = self.get_modulated_velocities_batch(
+            active_velocities,
+            reference_directions,
+            normal_directions,
+        )
 
         if limit_velocity_magnitude:
-            mod_norm = LA.norm(modulated_velocity)
-            init_norm = LA.norm(initial_velocity)
+            active_velocities = self.limit_modulated_magnitude(
+                active_velocities,
+                initial_velocities[:, ind_active],
+                normalize_velocity=normalize_velocity,
+            )
 
-            if mod_norm > init_norm:
-                modulated_velocity = modulated_velocity * (init_norm / mod_norm)
+        modulated_velocities[:, ind_active] = active_velocities
+        return modulated_velocities
 
-            elif normalize_velocity:
-                # TODO: should also take into account proximity to obstacles
-                if mod_norm > 1e-1:
-                    # Speed up simulation
-                    modulated_velocity = modulated_velocity / mod_norm * init_norm
-        # breakpoint()
-        return modulated_velocity
+    def get_modulated_velocities_batch(
+        self,
+        initial_velocities: np.ndarray,
+        reference_directions: np.ndarray,
+        normal_directions: np.ndarray = None,
+        singular_margin: float = 1e-12,
+    ) -> np.ndarray:
+        """Batched version of 'get_modulated_velocity' for arrays of shape
+        (dimension, n_samples) with non-zero reference directions."""
+        dimension = initial_velocities.shape[0]
+        if dimension not in (2, 3):
+            return np.array(
+                [
+                    self.get_modulated_velocity(
+                        initial_velocities[:, it],
+                        reference_directions[:, it],
+                        None if normal_directions is None else normal_directions[:, it],
+                    )
+                    for it in range(initial_velocities.shape[1])
+                ]
+            ).T
+
+        ref_norms = LA.norm(reference_directions, axis=0)
+        unit_references = reference_directions / ref_norms
+
+        if normal_directions is None:
+            decomposition_normals = unit_references
+        else:
+            decomposition_normals = np.copy(normal_directions)
+            ind_zero = LA.norm(normal_directions, axis=0) == 0
+            decomposition_normals[:, ind_zero] = unit_references[:, ind_zero]
+
+        norm_dot_refs = np.sum(decomposition_normals * unit_references, axis=0)
+        ind_singular = np.abs(norm_dot_refs) < singular_margin * LA.norm(
+            decomposition_normals, axis=0
+        )
+        norm_dot_refs[ind_singular] = 1
+
+        lambdas_ref, lambdas_tang = self.stretching_matrix.get_lambdas_batch(
+            ref_norms, reference_directions, normal_directions, initial_velocities
+        )
 
-    def reduce_wake_effect(self, weights, initial_velocity, directions):
+        ref_factors = (
+            (lambdas_ref - lambdas_tang)
+            * np.sum(decomposition_normals * initial_velocities, axis=0)
+            / norm_dot_refs
+        )
+        modulated_velocities = (
+            lambdas_tang * initial_velocities + ref_factors * unit_references
+        )
+
+        for it in np.flatnonzero(ind_singular):
+            modulated_velocities[:, it] = self._get_modulated_velocity_from_basis(
+                initial_velocities[:, it],
+                reference_directions[:, it],
+                normal_directions[:, it],
+            )
+
+        return modulated_velocities
+
+    def get_batch_directions(
+        self, positions: np.ndarray, initial_velocities: np.ndarray
+    ) -> BatchDirections:
+        """Returns the reference directions, normal directions (or None) and
+        relative velocities (or None) for the batched avoidance."""
+        raise NotImplementedError(
+            f"No batched evaluation implemented for {type(self).__name__}."
+        )
+
+    def reduce_wake_effect(
+        self, weights, initial_velocity, directions, workspace: ScanWorkspace = None
+    ):
         """Reduce wake effect behind an obstacle and returns adapted weights.
 
         Since initial weights are in the range of [0, 1],
-        a non-zero power will reduce the influence."""
+        a non-zero power will reduce the influence.
+        If a workspace is given, the weights are adapted in place."""
         # TODO: the way the weight is caluclated has to be changed slightly,
         # it needs to be done each 'avoid' funtion to incoorporate this...
+        if workspace is not None:
+            return self._reduce_wake_effect_in_place(
+                weights, initial_velocity, directions, workspace
+            )
+
         dir_weights = 1 - np.sum(
             directions * np.tile(initial_velocity, (directions.shape[1], 1)).T,
             axis=0,
@@ -175,6 +491,55 @@ class SingleModulationAvoider(ABC):
 
         return weights * weight_fact
 
+    @staticmethod
+    def _reduce_wake_effect_in_place(
+        weights, initial_velocity, directions, workspace: ScanWorkspace
+    ):
+        n_points = weights.shape[0]
+        dir_weights = workspace.get_buffer("wake_dir_weights", n_points)
+        weight_fact = workspace.get_buffer("wake_weight_fact", n_points)
+        ind_nonzero = workspace.get_buffer("wake_nonzero", n_points, dtype=bool)
+
+        # Normalized dot product between directions and velocity
+        np.einsum("ij,ij->j", directions, directions, out=dir_weights)
+        np.sqrt(dir_weights, out=dir_weights)
+        np.multiply(dir_weights, LA.norm(initial_velocity), out=dir_weights)
+        np.matmul(initial_velocity, directions, out=weight_fact)
+        np.divide(weight_fact, dir_weights, out=dir_weights)
+
+        np.subtract(1, dir_weights, out=dir_weights)
+        np.multiply(dir_weights, 0.5, out=dir_weights)
+        np.greater(dir_weights, 0, out=ind_nonzero)
+
+        np.divide(weights, np.sum(weights), out=weight_fact)
+        np.reciprocal(dir_weights, out=dir_weights, where=ind_nonzero)
+        np.power(weight_fact, dir_weights, out=weight_fact, where=ind_nonzero)
+        np.multiply(weight_fact, ind_nonzero, out=weight_fact)
+
+        return np.multiply(weights, weight_fact, out=weights)
+
+    def reduce_wake_effect_batch(self, weights, initial_velocities, directions):
+        """Batched version of 'reduce_wake_effect' with weights of shape
+        (n_positions, n_points), initial_velocities of shape (dimension, n_positions)
+        and directions of shape (dimension, n_positions, n_points)."""
+        dir_weights = 1 - np.sum(
+            directions * initial_velocities[:, :, np.newaxis], axis=0
+        ) / (
+            LA.norm(directions, axis=0)
+            * LA.norm(initial_velocities, axis=0)[:, np.newaxis]
+        )
+
+        dir_weights = dir_weights * 0.5
+        ind_nonzero = dir_weights > 0
+
+        weight_fact = weights / np.sum(weights, axis=1)[:, np.newaxis]
+        weight_fact[~ind_nonzero] = 0
+        weight_fact[ind_nonzero] = weight_fact[ind_nonzero] ** (
+            1.0 / dir_weights[ind_nonzero]
+        )
+
+        return weights * weight_fact
+
     def limit_velocity(self):
         raise NotImplementedError()
 
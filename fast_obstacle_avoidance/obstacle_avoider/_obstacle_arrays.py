@@ -0,0 +1,414 @@
+"""
+Struct-of-arrays representation of (homogeneous) analytic obstacles
+"""
+from __future__ import annotations
+
+import math
+from enum import IntEnum
+from typing import Optional
+
+import numpy as np
+from numpy import linalg as LA
+
+from dynamic_obstacle_avoidance.obstacles import CircularObstacle
+from dynamic_obstacle_avoidance.obstacles import CuboidXd
+from dynamic_obstacle_avoidance.obstacles import Ellipse, EllipseWithAxes, Sphere
+
+ELLIPTIC_OBSTACLE_TYPES = (Ellipse, EllipseWithAxes, Sphere, CircularObstacle)
+CUBOID_OBSTACLE_TYPES = (CuboidXd,)
+
+
+class ObstacleShape(IntEnum):
+    ELLIPSE = 0
+    CUBOID = 1
+
+
+def get_obstacle_shape(obstacle) -> Optional[ObstacleShape]:
+    """Returns the shape of the obstacle or None if it cannot be packed."""
+    if isinstance(obstacle, ELLIPTIC_OBSTACLE_TYPES):
+        return ObstacleShape.ELLIPSE
+
+    if isinstance(obstacle, CUBOID_OBSTACLE_TYPES):
+        return ObstacleShape.CUBOID
+
+    return None
+
+
+def get_semiaxes(obstacle) -> Optional[np.ndarray]:
+    """Returns the semi-axes of the obstacle, or None if it does not state them
+    explicitly (the meaning of 'axes_length' differs between the types)."""
+    semiaxes = getattr(obstacle, "semiaxes", None)
+    if semiaxes is None:
+        return None
+    return np.array(semiaxes, dtype=float)
+
+
+def get_bounding_radius(obstacle) -> float:
+    """Returns the radius of a sphere around the center which contains the obstacle
+    (including the margin), this is infinite for boundaries and unknown types."""
+    shape = get_obstacle_shape(obstacle)
+    if shape is None or obstacle.is_boundary:
+        return math.inf
+
+    semiaxes = get_semiaxes(obstacle)
+    if semiaxes is None:
+        return math.inf
+
+    if shape == ObstacleShape.ELLIPSE:
+        radius = np.max(semiaxes)
+    else:
+        radius = LA.norm(semiaxes)
+
+    return radius + obstacle.margin_absolut
+
+
+def get_rotation_matrix(obstacle, dimension: int) -> Optional[np.ndarray]:
+    """Returns the rotation matrix from the obstacle to the global frame,
+    or None if the orientation cannot be interpreted."""
+    orientation = getattr(obstacle, "orientation", None)
+    if orientation is None or (np.isscalar(orientation) and not orientation):
+        return np.eye(dimension)
+
+    if dimension != 2 or not np.isscalar(orientation):
+        return None
+
+    cos_, sin_ = np.cos(orientation), np.sin(orientation)
+    return np.array([[cos_, -sin_], [sin_, cos_]])
+
+
+class ObstacleArrays:
+    """Packs ellipses (including spheres) and cuboids into arrays, such that gamma,
+    normal and reference directions are evaluated for all obstacles at once.
+
+    The kernels are the analytic ones of the obstacle types: the proportional gamma
+    of the ellipse, and the distance-based gamma of the cuboid (with a rounded margin).
+    Only obstacles with explicit semi-axes are packed, and their gamma and normal
+    are checked against the obstacle's own evaluation when they are packed, i.e.,
+    obstacles of another gamma type are rejected (and evaluated one-by-one).
+    The arrays are a snapshot, i.e., they have to be recreated when the obstacles
+    change, or moved with 'do_velocity_step' together with the obstacles.
+
+    Attributes
+    ----------
+    center_positions, reference_points, semiaxes: Arrays of shape
+        (dimension, n_obstacles) in the global frame
+    rotation_matrices: Array of shape (n_obstacles, dimension, dimension)
+    linear_velocities: Array of shape (dimension, n_obstacles)
+    angular_velocities: Array of shape (n_obstacles), only set in two dimensions
+    margins, characteristic_lengths, distance_scalings: Arrays of shape (n_obstacles)
+    is_boundary: Boolean array of shape (n_obstacles)
+    shapes: ObstacleShape of each obstacle
+    """
+
+    def __init__(self, dimension: int, n_obstacles: int = 0) -> None:
+        self.dimension = dimension
+
+        self.center_positions = np.zeros((dimension, n_obstacles))
+        self.reference_points = np.zeros((dimension, n_obstacles))
+        self.semiaxes = np.ones((dimension, n_obstacles))
+        self.rotation_matrices = np.tile(np.eye(dimension), (n_obstacles, 1, 1))
+
+        self.linear_velocities = np.zeros((dimension, n_obstacles))
+        self.angular_velocities = np.zeros(n_obstacles)
+
+        self.margins = np.zeros(n_obstacles)
+        self.characteristic_lengths = np.ones(n_obstacles)
+        self.distance_scalings = np.ones(n_obstacles)
+        self.is_boundary = np.zeros(n_obstacles, dtype=bool)
+        self.shapes = np.full(n_obstacles, ObstacleShape.ELLIPSE, dtype=int)
+
+    @classmethod
+    def from_environment(cls, obstacle_environment) -> Optional[ObstacleArrays]:
+        """Returns the packed obstacles of the environment, or None if any of the
+        obstacles is not of a supported type."""
+        return cls.from_obstacles(obstacle_environment, obstacle_environment.dimension)
+
+    @classmethod
+    def from_obstacles(cls, obstacles, dimension: int) -> Optional[ObstacleArrays]:
+        """Returns the packed obstacles of a list of obstacles, or None if any of the
+        obstacles is not of a supported type."""
+        obstacle_arrays = cls(dimension, len(obstacles))
+
+        for it, obs in enumerate(obstacles):
+            if not obstacle_arrays.set_obstacle(it, obs):
+                return None
+
+        return obstacle_arrays
+
+    @property
+    def n_obstacles(self) -> int:
+        return self.center_positions.shape[1]
+
+    def set_obstacle(self, index: int, obstacle) -> bool:
+        """Copies the properties of the obstacle to the index of the arrays.
+        Returns False if the obstacle cannot be packed."""
+        shape = get_obstacle_shape(obstacle)
+        if shape is None:
+            return False
+
+        rotation_matrix = get_rotation_matrix(obstacle, self.dimension)
+        if rotation_matrix is None:
+            return False
+
+        semiaxes = get_semiaxes(obstacle)
+        if semiaxes is None:
+            return False
+
+        center_position = np.array(obstacle.center_position)
+        reference_point = getattr(obstacle, "global_reference_point", None)
+        if reference_point is None:
+            reference_point = center_position
+
+        self.center_positions[:, index] = center_position
+        self.reference_points[:, index] = reference_point
+        self.semiaxes[:, index] = semiaxes
+        self.rotation_matrices[index, :, :] = rotation_matrix
+
+        self.linear_velocities[:, index] = obstacle.linear_velocity
+        if self.dimension == 2 and obstacle.angular_velocity:
+            self.angular_velocities[index] = obstacle.angular_velocity
+
+        self.margins[index] = obstacle.margin_absolut
+        self.characteristic_lengths[index] = obstacle.get_characteristic_length()
+        self.distance_scalings[index] = getattr(obstacle, "distance_scaling", 1.0)
+        self.is_boundary[index] = obstacle.is_boundary
+        self.shapes[index] = shape
+
+        return self.matches_obstacle(index, obstacle)
+
+    def matches_obstacle(self, index: int, obstacle, rtol: float = 1e-6) -> bool:
+        """Checks the packed gamma and normal at the index against the evaluation of
+        the obstacle itself, at points outside of it along its axes and a diagonal."""
+        obstacle_arrays = self.take([index])
+
+        extents = obstacle_arrays.semiaxes[:, 0] + obstacle_arrays.margins[0]
+        local_directions = np.hstack(
+            (np.eye(self.dimension), np.ones((self.dimension, 1)))
+        )
+        local_positions = np.hstack(
+            [factor * extents[:, np.newaxis] * local_directions for factor in (1.5, 3)]
+        )
+        positions = obstacle_arrays.center_positions + (
+            obstacle_arrays.rotation_matrices[0] @ local_positions
+        )
+
+        gammas = obstacle_arrays.get_gammas_batch(positions)[:, 0]
+        normals = obstacle_arrays.get_normal_directions_batch(positions)[:, :, 0]
+        for it, position in enumerate(positions.T):
+            gamma = obstacle.get_gamma(position, in_global_frame=True)
+            normal = obstacle.get_normal_direction(position, in_global_frame=True)
+            if not np.isclose(gammas[it], gamma, rtol=rtol) or not np.allclose(
+                normals[:, it], normal, rtol=rtol, atol=rtol
+            ):
+                return False
+
+        return True
+
+    def take(self, indices: np.ndarray) -> ObstacleArrays:
+        """Returns (a copy of) the packed obstacles at the indices."""
+        obstacle_arrays = ObstacleArrays(self.dimension)
+
+        obstacle_arrays.center_positions = self.center_positions[:, indices]
+        obstacle_arrays.reference_points = self.reference_points[:, indices]
+        obstacle_arrays.semiaxes = self.semiaxes[:, indices]
+        obstacle_arrays.rotation_matrices = self.rotation_matrices[indices, :, :]
+
+        obstacle_arrays.linear_velocities = self.linear_velocities[:, indices]
+        obstacle_arrays.angular_velocities = self.angular_velocities[indices]
+
+        obstacle_arrays.margins = self.margins[indices]
+        obstacle_arrays.characteristic_lengths = self.characteristic_lengths[indices]
+        obstacle_arrays.distance_scalings = self.distance_scalings[indices]
+        obstacle_arrays.is_boundary = self.is_boundary[indices]
+        obstacle_arrays.shapes = self.shapes[indices]
+
+        return obstacle_arrays
+
+    def do_velocity_step(self, delta_time: float) -> None:
+        """Moves the centers (and reference points) with the linear velocities, and
+        rotates the obstacles with the angular velocities (in two dimensions), i.e.,
+        the same step as 'do_velocity_step' of the obstacles."""
+        delta_positions = self.linear_velocities * delta_time
+        self.center_positions += delta_positions
+        self.reference_points += delta_positions
+
+        ind_rotating = self.angular_velocities != 0
+        if not np.any(ind_rotating):
+            return
+
+        delta_angles = self.angular_velocities[ind_rotating] * delta_time
+        cos_, sin_ = np.cos(delta_angles), np.sin(delta_angles)
+        delta_rotations = np.zeros((delta_angles.shape[0], 2, 2))
+        delta_rotations[:, 0, 0] = cos_
+        delta_rotations[:, 0, 1] = -sin_
+        delta_rotations[:, 1, 0] = sin_
+        delta_rotations[:, 1, 1] = cos_
+
+        self.rotation_matrices[ind_rotating, :, :] = (
+            delta_rotations @ self.rotation_matrices[ind_rotating, :, :]
+        )
+
+        # The reference points are fixed in the obstacle frame
+        centers = self.center_positions[:, ind_rotating]
+        self.reference_points[:, ind_rotating] = centers + np.einsum(
+            "nij,jn->in",
+            delta_rotations,
+            self.reference_points[:, ind_rotating] - centers,
+        )
+
+    def get_local_positions(self, position: np.ndarray) -> np.ndarray:
+        """Returns the position relative to each obstacle (in the obstacle frame)
+        as array of shape (dimension, n_obstacles)."""
+        return self.get_local_positions_batch(position[:, np.newaxis])[:, 0, :]
+
+    def get_local_positions_batch(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the positions (dimension, n_positions) relative to each obstacle
+        as array of shape (dimension, n_positions, n_obstacles)."""
+        relative_positions = (
+            positions[:, :, np.newaxis] - self.center_positions[:, np.newaxis, :]
+        )
+        return np.einsum("nji,jpn->ipn", self.rotation_matrices, relative_positions)
+
+    def get_gammas(self, position: np.ndarray) -> np.ndarray:
+        """Returns the gamma value of each obstacle at the (global) position."""
+        return self.get_gammas_batch(position[:, np.newaxis])[0, :]
+
+    def get_gammas_batch(
+        self,
+        positions: np.ndarray,
+        margin_absolut: float = None,
+        in_global_frame: bool = True,
+    ) -> np.ndarray:
+        """Returns the gamma values of shape (n_positions, n_obstacles).
+
+        Arguments
+        ---------
+        margin_absolut: Margin of all obstacles (instead of their own margin)
+        in_global_frame: If False, the positions are already in the obstacle frame
+        """
+        if in_global_frame:
+            local_positions = self.get_local_positions_batch(positions)
+        else:
+            local_positions = np.repeat(
+                positions[:, :, np.newaxis], self.n_obstacles, axis=2
+            )
+
+        if margin_absolut is None:
+            margins = self.margins
+        else:
+            margins = np.full(self.n_obstacles, margin_absolut, dtype=float)
+
+        gammas = np.zeros(local_positions.shape[1:])
+
+        ind_ellipse = self.shapes == ObstacleShape.ELLIPSE
+        if np.any(ind_ellipse):
+            gammas[:, ind_ellipse] = LA.norm(
+                local_positions[:, :, ind_ellipse]
+                / (self.semiaxes[:, ind_ellipse] + margins[ind_ellipse])[
+                    :, np.newaxis, :
+                ],
+                axis=0,
+            )
+
+        ind_cuboid = ~ind_ellipse
+        if np.any(ind_cuboid):
+            gammas[:, ind_cuboid] = self._get_cuboid_gammas(
+                local_positions[:, :, ind_cuboid], ind_cuboid, margins[ind_cuboid]
+            )
+
+        if np.any(self.is_boundary):
+            gammas[:, self.is_boundary] = 1 / gammas[:, self.is_boundary]
+
+        return gammas
+
+    def _get_cuboid_gammas(
+        self, local_positions: np.ndarray, ind_cuboid: np.ndarray, margins: np.ndarray
+    ) -> np.ndarray:
+        semiaxes = self.semiaxes[:, np.newaxis, ind_cuboid]
+
+        surface_deltas = np.abs(local_positions) - semiaxes
+        distances = LA.norm(np.maximum(surface_deltas, 0), axis=0) - margins
+        gammas = distances / self.distance_scalings[ind_cuboid] + 1
+
+        # Inside: proportional value of the (margin-extended) box
+        ind_inside = distances < 0
+        if np.any(ind_inside):
+            inside_gammas = np.max(
+                np.abs(local_positions) / (semiaxes + margins), axis=0
+            )
+            gammas[ind_inside] = inside_gammas[ind_inside]
+        return gammas
+
+    def get_normal_directions(self, position: np.ndarray) -> np.ndarray:
+        """Returns the (outwards pointing) unit normal of each obstacle
+        as array of shape (dimension, n_obstacles)."""
+        return self.get_normal_directions_batch(position[:, np.newaxis])[:, 0, :]
+
+    def get_normal_directions_batch(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the normals of shape (dimension, n_positions, n_obstacles)."""
+        local_positions = self.get_local_positions_batch(positions)
+        local_normals = np.zeros(local_positions.shape)
+
+        ind_ellipse = self.shapes == ObstacleShape.ELLIPSE
+        if np.any(ind_ellipse):
+            # Gradient of the ellipse equation
+            local_normals[:, :, ind_ellipse] = (
+                local_positions[:, :, ind_ellipse]
+                / (self.semiaxes[:, ind_ellipse] + self.margins[ind_ellipse])[
+                    :, np.newaxis, :
+                ]
+                ** 2
+            )
+
+        ind_cuboid = ~ind_ellipse
+        if np.any(ind_cuboid):
+            local_normals[:, :, ind_cuboid] = self._get_cuboid_local_normals(
+                local_positions[:, :, ind_cuboid], ind_cuboid
+            )
+
+        normal_norms = LA.norm(local_normals, axis=0)
+        ind_nonzero = normal_norms > 0
+        local_normals[:, ind_nonzero] = (
+            local_normals[:, ind_nonzero] / normal_norms[ind_nonzero]
+        )
+
+        return np.einsum("nij,jpn->ipn", self.rotation_matrices, local_normals)
+
+    def _get_cuboid_local_normals(
+        self, local_positions: np.ndarray, ind_cuboid: np.ndarray
+    ) -> np.ndarray:
+        surface_deltas = (
+            np.abs(local_positions) - self.semiaxes[:, np.newaxis, ind_cuboid]
+        )
+        normals = np.maximum(surface_deltas, 0) * np.sign(local_positions)
+
+        # Inside: normal of the closest face
+        ind_inside = np.all(surface_deltas <= 0, axis=0)
+        if np.any(ind_inside):
+            ind_face = np.argmax(surface_deltas, axis=0)[np.newaxis, :, :]
+            face_signs = np.where(
+                np.take_along_axis(local_positions, ind_face, axis=0) < 0, -1.0, 1.0
+            )
+            inside_normals = np.zeros(local_positions.shape)
+            np.put_along_axis(inside_normals, ind_face, face_signs, axis=0)
+            normals[:, ind_inside] = inside_normals[:, ind_inside]
+
+        return normals
+
+    def get_reference_directions(self, position: np.ndarray) -> np.ndarray:
+        """Returns the unit directions from the position towards the reference points
+        as array of shape (dimension, n_obstacles); zero at the reference point."""
+        return self.get_reference_directions_batch(position[:, np.newaxis])[:, 0, :]
+
+    def get_reference_directions_batch(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the reference directions (dimension, n_positions, n_obstacles)."""
+        reference_directions = (
+            self.reference_points[:, np.newaxis, :] - positions[:, :, np.newaxis]
+        )
+
+        reference_norms = LA.norm(reference_directions, axis=0)
+        ind_nonzero = reference_norms > 0
+        reference_directions[:, ind_nonzero] = (
+            reference_directions[:, ind_nonzero] / reference_norms[ind_nonzero]
+        )
+        return reference_directions
@@ -0,0 +1,145 @@
+"""
+Uniform-grid index over the obstacle centers to cull far away obstacles
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from numpy import linalg as LA
+
+from ._obstacle_arrays import get_bounding_radius
+
+
+class ObstacleGridIndex:
+    """Sorts the obstacle centers into the cells of a uniform grid, such that the
+    obstacles which are close to a position are found without evaluating all of them.
+
+    Obstacles without a (finite) bounding radius, e.g., boundaries, are never culled.
+    Moving obstacles are updated incrementally, i.e., only the obstacles which
+    change their cell are re-sorted.
+
+    Attributes
+    ----------
+    cell_size (float): Edge length of the grid cells
+    center_positions: Array of shape (dimension, n_obstacles)
+    bounding_radii: Array of shape (n_obstacles)
+    """
+
+    def __init__(
+        self,
+        center_positions: np.ndarray,
+        bounding_radii: np.ndarray,
+        cell_size: float = None,
+    ) -> None:
+        self.center_positions = np.array(center_positions, dtype=float)
+        self.bounding_radii = np.array(bounding_radii, dtype=float)
+
+        ind_finite = np.isfinite(self.bounding_radii)
+        if cell_size is None:
+            # Cells of the size of the (typical) obstacle
+            if np.any(ind_finite):
+                cell_size = 2 * np.median(self.bounding_radii[ind_finite])
+            if not cell_size:
+                cell_size = 1.0
+        self.cell_size = cell_size
+
+        self._unbounded = set(np.flatnonzero(~ind_finite).tolist())
+        self._cell_keys = [None] * self.n_obstacles
+        self._cells = {}
+        for it in np.flatnonzero(ind_finite):
+            self._insert(it)
+
+        self._max_bounding_radius = (
+            np.max(self.bounding_radii[ind_finite]) if np.any(ind_finite) else 0.0
+        )
+
+    @classmethod
+    def from_environment(
+        cls, obstacle_environment, cell_size: float = None
+    ) -> ObstacleGridIndex:
+        center_positions = np.zeros(
+            (obstacle_environment.dimension, len(obstacle_environment))
+        )
+        bounding_radii = np.zeros(len(obstacle_environment))
+        for it, obs in enumerate(obstacle_environment):
+            center_positions[:, it] = obs.center_position
+            bounding_radii[it] = get_bounding_radius(obs)
+
+        return cls(center_positions, bounding_radii, cell_size=cell_size)
+
+    @property
+    def n_obstacles(self) -> int:
+        return self.center_positions.shape[1]
+
+    def _get_cell_key(self, position: np.ndarray) -> tuple:
+        return tuple(math.floor(pp / self.cell_size) for pp in position)
+
+    def _insert(self, index: int) -> None:
+        key = self._get_cell_key(self.center_positions[:, index])
+        self._cell_keys[index] = key
+        self._cells.setdefault(key, set()).add(index)
+
+    def update_obstacle(self, index: int, center_position: np.ndarray) -> None:
+        """Updates the center of an obstacle, it is only re-sorted if it changes
+        the cell."""
+        self.center_positions[:, index] = center_position
+        if index in self._unbounded:
+            return
+
+        key = self._get_cell_key(center_position)
+        if key == self._cell_keys[index]:
+            return
+
+        cell = self._cells[self._cell_keys[index]]
+        cell.discard(index)
+        if not cell:
+            del self._cells[self._cell_keys[index]]
+
+        self._cell_keys[index] = key
+        self._cells.setdefault(key, set()).add(index)
+
+    def get_indices_in_range(
+        self, position: np.ndarray, influence_distance: float
+    ) -> np.ndarray:
+        """Returns the (sorted) indices of the obstacles for which the distance
+        between the position and the bounding sphere is below the influence distance."""
+        search_radius = influence_distance + self._max_bounding_radius
+
+        key_min = self._get_cell_key(np.asarray(position) - search_radius)
+        key_max = self._get_cell_key(np.asarray(position) + search_radius)
+
+        candidates = list(self._unbounded)
+        n_search_cells = np.prod(
+            [kmax - kmin + 1 for kmin, kmax in zip(key_min, key_max)]
+        )
+        if n_search_cells > len(self._cells):
+            # Cheaper to check all (occupied) cells
+            for key, cell in self._cells.items():
+                if all(
+                    kmin <= kk <= kmax for kk, kmin, kmax in zip(key, key_min, key_max)
+                ):
+                    candidates.extend(cell)
+        else:
+            for key in np.ndindex(
+                *[kmax - kmin + 1 for kmin, kmax in zip(key_min, key_max)]
+            ):
+                cell = self._cells.get(
+                    tuple(kk + kmin for kk, kmin in zip(key, key_min))
+                )
+                if cell is not None:
+                    candidates.extend(cell)
+
+        candidates = np.array(sorted(candidates), dtype=int)
+        if not candidates.shape[0]:
+            return candidates
+
+        distances = (
+            LA.norm(
+                self.center_positions[:, candidates] - np.reshape(position, (-1, 1)),
+                axis=0,
+            )
+            - self.bounding_radii[candidates]
+        )
+        # Unbounded obstacles have distance -inf
+        return candidates[distances <= influence_distance]
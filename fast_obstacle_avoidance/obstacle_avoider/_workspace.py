@@ -0,0 +1,53 @@
+"""
+Reusable buffers for the scan-sized arrays of the (sampled) avoiders
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class ScanWorkspace:
+    """Owns named buffers which are sized to the maximum scan length and returns
+    views of the size of the current scan. Hence, the evaluation of a new scan
+    does not allocate any new (scan-sized) arrays.
+
+    The views are overwritten by the next evaluation, i.e., they have to be copied
+    if they are needed for longer.
+
+    Attributes
+    ----------
+    max_scan_size (int): Number of points the buffers can hold, it grows
+        automatically if a larger scan is evaluated
+    dtype: Floating data type of the buffers
+    """
+
+    def __init__(self, max_scan_size: int = 0, dtype=float) -> None:
+        self.max_scan_size = max_scan_size
+        self.dtype = dtype
+
+        self._buffers = {}
+
+    def get_buffer(
+        self, name: str, n_points: int, dimension: Optional[int] = None, dtype=None
+    ) -> np.ndarray:
+        """Returns a view of shape (n_points) or (dimension, n_points) of the buffer
+        with the given name, the buffer is (re-)allocated if it is too small."""
+        if dtype is None:
+            dtype = self.dtype
+
+        shape = (n_points,) if dimension is None else (dimension, n_points)
+
+        buffer = self._buffers.get(name)
+        if (
+            buffer is None
+            or buffer.shape[:-1] != shape[:-1]
+            or buffer.dtype != dtype
+            or buffer.shape[-1] < n_points
+        ):
+            self.max_scan_size = max(self.max_scan_size, n_points)
+            buffer = np.empty(shape[:-1] + (self.max_scan_size,), dtype=dtype)
+            self._buffers[name] = buffer
+
+        return buffer[..., :n_points]
@@ -14,12 +14,15 @@ import math
 import numpy as np
 from numpy import linalg as LA
 
+from scipy.spatial import cKDTree
+
 from vartools.linalg import get_orthogonal_basis
 from vartools.directional_space import get_directional_weighted_sum
 
 from fast_obstacle_avoidance.control_robot import BaseRobot
 
-from ._base import SingleModulationAvoider
+from ._base import BatchDirections, SingleModulationAvoider
+from ._workspace import ScanWorkspace
 from .stretching_matrix import StretchingMatrixTrigonometric
 
 
@@ -28,8 +31,15 @@ def get_relative_positions_and_dists(
     control_radius: float,
     datapoints: np.ndarray,
     in_local_frame: bool = True,
+    workspace: ScanWorkspace = None,
 ) -> np.ndarray:
-    """Get normalized (relative) position and (relative) surface distance."""
+    """Get normalized (relative) position and (relative) surface distance.
+    If a workspace is given, the results are views of its buffers."""
+    if workspace is not None:
+        return _get_relative_positions_and_dists_in_place(
+            center_position, control_radius, datapoints, in_local_frame, workspace
+        )
+
     if in_local_frame:
         rel_pos = datapoints
     else:
@@ -43,6 +53,56 @@ def get_relative_positions_and_dists(
     return rel_pos, rel_dir, rel_dist
 
 
+def _get_relative_positions_and_dists_in_place(
+    center_position: np.ndarray,
+    control_radius: float,
+    datapoints: np.ndarray,
+    in_local_frame: bool,
+    workspace: ScanWorkspace,
+) -> np.ndarray:
+    dimension, n_points = datapoints.shape
+    if in_local_frame:
+        rel_pos = datapoints
+    else:
+        rel_pos = np.subtract(
+            datapoints,
+            np.reshape(center_position, (dimension, 1)),
+            out=workspace.get_buffer("relative_positions", n_points, dimension),
+        )
+
+    rel_dist = workspace.get_buffer("relative_distances", n_points)
+    np.einsum("ij,ij->j", rel_pos, rel_pos, out=rel_dist)
+    np.sqrt(rel_dist, out=rel_dist)
+
+    rel_dir = np.divide(
+        rel_pos,
+        rel_dist,
+        out=workspace.get_buffer("relative_directions", n_points, dimension),
+    )
+    np.subtract(rel_dist, control_radius, out=rel_dist)
+
+    return rel_pos, rel_dir, rel_dist
+
+
+def get_relative_positions_and_dists_batch(
+    center_positions: np.ndarray,
+    control_radius: float,
+    datapoints: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get normalized (relative) position and (relative) surface distance
+    for many center positions (dimension, n_positions) at once.
+
+    The relative positions and directions have the shape
+    (dimension, n_positions, n_points), the distances (n_positions, n_points)."""
+    rel_pos = datapoints[:, np.newaxis, :] - center_positions[:, :, np.newaxis]
+    rel_dist = LA.norm(rel_pos, axis=0)
+
+    rel_dir = rel_pos / rel_dist[np.newaxis, :, :]
+    rel_dist = rel_dist - control_radius
+
+    return rel_pos, rel_dir, rel_dist
+
+
 class SampledAvoider(SingleModulationAvoider):
     """
     To proof:
@@ -61,10 +121,31 @@ class SampledAvoider(SingleModulationAvoider):
         robot: Optional[BaseRobot] = None,
         evaluate_normal: bool = False,
         control_radius: float = 0.0,
+        use_workspace: bool = False,
+        max_scan_size: int = 0,
+        influence_radius: Optional[float] = None,
+        use_kdtree: bool = False,
         # delta_sampling: float = delta_sampling
         *args,
         **kwargs,
     ) -> None:
+        """
+        Arguments
+        ----------
+        use_workspace: The scan-sized arrays are evaluated in reusable buffers
+            (which avoids new allocations for every scan). The weights stored in the
+            avoider are then only valid until the next update.
+        max_scan_size: Initial size of the workspace buffers
+        influence_radius: Only datapoints with a (surface) distance below this radius
+            are weighted. Every neglected point would have a weight below
+            (weight_factor / influence_radius) ** weight_power, and the sum of these
+            is stored as 'pruning_weight_bound' after each update. The resulting
+            bound on the error of the (returned) reference direction, including the
+            wake-effect reduction and the normalization, is stored as
+            'pruning_error_bound'.
+        use_kdtree: The datapoints within the influence radius are found with a
+            KD-tree, which is built once per scan
+        """
         self.robot = robot
 
         if self.robot is None:
@@ -87,6 +168,19 @@ class SampledAvoider(SingleModulationAvoider):
         else:
             self._laserscan_in_robot_frame = True
 
+        if use_workspace:
+            self.workspace = ScanWorkspace(
+                max_scan_size=max_scan_size, dtype=self.dtype
+            )
+        else:
+            self.workspace = None
+
+        self.influence_radius = influence_radius
+        self.use_kdtree = use_kdtree
+        self.pruning_weight_bound = 0.0
+        self.pruning_error_bound = 0.0
+        self._kdtree = None
+
     @property
     def datapoints(self):
         # Property to make consistent with mixed avoider.
@@ -104,7 +198,10 @@ class SampledAvoider(SingleModulationAvoider):
 
     @laserscan.setter
     def laserscan(self, value):
+        if value is not None:
+            value = self.as_dtype(value)
         self.laser_scan = value
+        self._kdtree = None
 
     def update_laserscan(self, laserscan=None, in_robot_frame=None):
         if in_robot_frame is not None:
@@ -137,8 +234,32 @@ class SampledAvoider(SingleModulationAvoider):
             self.laserscan = laser_scan
 
         if laser_scan is None or len(laser_scan.shape) < 2 or not laser_scan.shape[1]:
-            self.reference_direction = np.zeros(self.robot.pose.position.shape)
+            self.reference_direction = np.zeros(
+                self.robot.pose.position.shape, dtype=self.dtype
+            )
             return self.reference_direction
+
+        if position is not None:
+            position = self.as_dtype(position)
+        if initial_velocity is not None:
+            initial_velocity = self.as_dtype(initial_velocity)
+
+        datapoints = self.datapoints
+        if self.influence_radius is not None:
+            ind_influence = self.get_influence_indices(position)
+            if self.workspace is None:
+                datapoints = datapoints[:, ind_influence]
+            else:
+                datapoints = np.take(
+                    datapoints,
+                    ind_influence,
+                    axis=1,
+                    out=self.workspace.get_buffer(
+                        "influence_datapoints",
+                        ind_influence.shape[0],
+                        datapoints.shape[0],
+                    ),
+                )
         # TODO: position is currently unused...
         # (
         #     laser_scan,
@@ -150,21 +271,43 @@ class SampledAvoider(SingleModulationAvoider):
         (laser_scan, ref_dirs, relative_distances,) = get_relative_positions_and_dists(
             center_position=position,
             control_radius=self.control_radius,
-            datapoints=self.datapoints,
+            datapoints=datapoints,
             in_local_frame=False,
+            workspace=self.workspace,
         )
 
-        self.weights = self.get_weight_from_distances(
-            relative_distances, ref_dirs, initial_velocity
+        weights = self.get_weight_from_distances(
+            relative_distances, ref_dirs, initial_velocity, workspace=self.workspace
         )
 
+        if self.influence_radius is None:
+            self.weights = weights
+        else:
+            # Keep the weights consistent with the datapoints
+            if self.workspace is None:
+                self.weights = np.zeros(self.datapoints.shape[1], dtype=self.dtype)
+            else:
+                self.weights = self.workspace.get_buffer(
+                    "scan_weights", self.datapoints.shape[1]
+                )
+                self.weights.fill(0)
+            self.weights[ind_influence] = weights
+
         # (-1) or not ...
-        self.reference_direction = (-1) * np.sum(
-            ref_dirs * np.tile(self.weights, (ref_dirs.shape[0], 1)), axis=1
-        )
+        if self.workspace is None:
+            self.reference_direction = (-1) * np.sum(
+                ref_dirs * np.tile(weights, (ref_dirs.shape[0], 1)), axis=1
+            )
+        else:
+            self.reference_direction = (-1) * (ref_dirs @ weights)
+
+        if self.influence_radius is not None:
+            self.pruning_error_bound = self.get_pruning_error_bound(
+                weights, ref_dirs, initial_velocity
+            )
 
         if self.evaluate_normal:
-            self.update_normal_direction(laser_scan, self.weights, ref_dirs)
+            self.update_normal_direction(laser_scan, weights, ref_dirs)
 
         # For Temporary plotting [remove after submission]
         if hasattr(self, "debug_mode") and self.debug_mode:
@@ -173,22 +316,119 @@ class SampledAvoider(SingleModulationAvoider):
 
         return self.reference_direction
 
+    def get_influence_indices(self, position: np.ndarray) -> np.ndarray:
+        """Returns the (sorted) indices of the datapoints with a surface distance
+        within the influence radius and updates the 'pruning_weight_bound'."""
+        max_distance = self.influence_radius + self.control_radius
+
+        if self.use_kdtree:
+            if self._kdtree is None:
+                self._kdtree = cKDTree(self.datapoints.T)
+
+            ind_influence = np.sort(
+                np.array(
+                    self._kdtree.query_ball_point(position, max_distance), dtype=int
+                )
+            )
+        else:
+            rel_pos = self.datapoints - np.reshape(position, (-1, 1))
+            ind_influence = np.flatnonzero(
+                np.einsum("ij,ij->j", rel_pos, rel_pos) <= max_distance**2
+            )
+
+        n_pruned = self.datapoints.shape[1] - ind_influence.shape[0]
+        if n_pruned:
+            self.pruning_weight_bound = n_pruned * (
+                (self.weight_factor / self.influence_radius) ** self.weight_power
+            )
+        else:
+            self.pruning_weight_bound = 0.0
+
+        return ind_influence
+
+    def get_pruning_error_bound(
+        self,
+        weights: np.ndarray,
+        directions: np.ndarray,
+        initial_velocity: np.ndarray = None,
+    ) -> float:
+        """Returns the bound of the error of the reference direction due to the
+        pruning, from the (final) weights and directions of the kept points.
+
+        The neglected points change the weighted sum of the directions by at most
+        the 'pruning_weight_bound' E, and the normalization N (the capped weight sum,
+        at least one) by at most E, too. With the wake effect, the weights of the
+        kept points are reduced by at most the factor (S / (S + E)) ** (1 / d),
+        where S is the weight sum and d the directional weight, which adds the
+        change K. Hence, the error is below (E + K + |reference| * E) / N."""
+        weight_bound = self.pruning_weight_bound
+        if not weight_bound:
+            return 0.0
+
+        normalization = max(1.0, float(self.distance_weight_sum))
+
+        kept_change = 0.0
+        if (
+            self.evaluate_velocity_weight
+            and initial_velocity is not None
+            and weights.shape[0]
+            and LA.norm(initial_velocity)
+        ):
+            dir_weights = 0.5 * (
+                1
+                - (initial_velocity @ directions)
+                / (LA.norm(directions, axis=0) * LA.norm(initial_velocity))
+            )
+            ind_nonzero = dir_weights > 0
+
+            # The capped weight sum is a lower bound of S (the factor grows with S)
+            weight_ratio = self.distance_weight_sum / (
+                self.distance_weight_sum + weight_bound
+            )
+            kept_change = normalization * np.sum(
+                np.abs(weights[ind_nonzero])
+                * (1 - weight_ratio ** (1.0 / dir_weights[ind_nonzero]))
+            )
+
+        return float(
+            (
+                weight_bound
+                + kept_change
+                + LA.norm(self.reference_direction) * weight_bound
+            )
+            / normalization
+        )
+
     def get_weight_from_distances(
         self,
         distances: np.ndarray,
         directions: np.ndarray = None,
         initial_velocity: np.ndarray = None,
+        workspace: ScanWorkspace = None,
     ):
-        """Returns an array of weights with the same dimensions as distances input."""
+        """Returns an array of weights with the same dimensions as distances input.
+        If a workspace is given, the weights are a view of its buffer."""
         # => get weighted evaluation along the robot
         # to obtain linear + angular velocity
-        if np.sum(distances < self.margin_weight):
+        if workspace is None:
+            weights = None
+        else:
+            weights = workspace.get_buffer("weights", distances.shape[0])
+
+        # Scalars of the same type to not promote float32 distances
+        scalar_type = distances.dtype.type
+
+        if (
+            distances.shape[0]
+            and (min_distance := np.min(distances)) < self.margin_weight
+        ):
             warnings.warn("Treat the small-weight case.")
 
-            distances = distances - np.min(distances) + self.margin_weight
+            distances = np.subtract(distances, min_distance, out=weights)
+            distances = np.add(distances, scalar_type(self.margin_weight), out=weights)
 
-        num_points = distances.shape[0]
-        weights = (self.weight_factor / distances) ** self.weight_power
+        weights = np.divide(scalar_type(self.weight_factor), distances, out=weights)
+        weights = np.power(weights, scalar_type(self.weight_power), out=weights)
         self.distance_weight_sum = np.sum(weights)
 
         if (
@@ -196,7 +436,9 @@ class SampledAvoider(SingleModulationAvoider):
             and directions is not None
             and initial_velocity is not None
         ):
-            weights = self.reduce_wake_effect(weights, initial_velocity, directions)
+            weights = self.reduce_wake_effect(
+                weights, initial_velocity, directions, workspace=workspace
+            )
 
         if (
             self.weight_max_norm is not None
@@ -205,10 +447,95 @@ class SampledAvoider(SingleModulationAvoider):
             self.distance_weight_sum = self.weight_max_norm
 
         if self.distance_weight_sum > 1:
+            if workspace is not None:
+                return np.divide(weights, self.distance_weight_sum, out=weights)
             return weights / self.distance_weight_sum
         else:
             return weights
 
+    def get_batch_directions(
+        self, positions: np.ndarray, initial_velocities: np.ndarray
+    ) -> BatchDirections:
+        """Returns the reference directions (dimension, n_positions) for all positions
+        from one evaluation over the (global) datapoints."""
+        if self.evaluate_normal:
+            raise NotImplementedError(
+                "Batched evaluation is not implemented for the normal evaluation."
+            )
+
+        laser_scan = self.datapoints
+        if laser_scan is None or len(laser_scan.shape) < 2 or not laser_scan.shape[1]:
+            return BatchDirections(np.zeros(positions.shape, dtype=self.dtype))
+
+        _, ref_dirs, relative_distances = get_relative_positions_and_dists_batch(
+            center_positions=positions,
+            control_radius=self.control_radius,
+            datapoints=laser_scan,
+        )
+
+        if self.influence_radius is not None:
+            # Neglected points have zero weight
+            relative_distances = np.where(
+                relative_distances > self.influence_radius,
+                np.inf,
+                relative_distances,
+            )
+
+        weights, _ = self.get_weight_from_distances_batch(
+            relative_distances, ref_dirs, initial_velocities
+        )
+
+        reference_directions = (-1) * np.sum(
+            ref_dirs * weights[np.newaxis, :, :], axis=2
+        )
+        return BatchDirections(reference_directions)
+
+    def get_weight_from_distances_batch(
+        self,
+        distances: np.ndarray,
+        directions: np.ndarray = None,
+        initial_velocities: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Batched version of 'get_weight_from_distances' for distances of shape
+        (n_positions, n_points). Returns the weights and the distance weight sums
+        (n_positions) without storing them."""
+        ind_small = np.any(distances < self.margin_weight, axis=1)
+        if np.any(ind_small):
+            warnings.warn("Treat the small-weight case.")
+
+            distances = np.copy(distances)
+            distances[ind_small, :] = (
+                distances[ind_small, :]
+                - np.min(distances[ind_small, :], axis=1)[:, np.newaxis]
+                + self.margin_weight
+            )
+
+        scalar_type = distances.dtype.type
+        weights = (scalar_type(self.weight_factor) / distances) ** scalar_type(
+            self.weight_power
+        )
+        distance_weight_sums = np.sum(weights, axis=1)
+
+        if (
+            self.evaluate_velocity_weight
+            and directions is not None
+            and initial_velocities is not None
+        ):
+            weights = self.reduce_wake_effect_batch(
+                weights, initial_velocities, directions
+            )
+
+        if self.weight_max_norm is not None:
+            distance_weight_sums = np.minimum(
+                distance_weight_sums, self.weight_max_norm
+            )
+
+        ind_normalize = distance_weight_sums > 1
+        weights[ind_normalize, :] = (
+            weights[ind_normalize, :] / distance_weight_sums[ind_normalize, np.newaxis]
+        )
+        return weights, distance_weight_sums
+
     def update_normal_direction(self, laser_scan, weights, ref_dirs):
         """Update the normal direction and normal angle with resect to the reference."""
         # NOTE: This does not work very well [anymore] ?!
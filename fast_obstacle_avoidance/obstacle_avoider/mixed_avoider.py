@@ -11,6 +11,7 @@ from numpy import linalg as LA
 from dynamic_obstacle_avoidance.obstacles import CircularObstacle
 
 from ._base import SingleModulationAvoider
+from ._obstacle_arrays import ObstacleArrays, get_obstacle_shape
 from .lidar_avoider import SampledAvoider
 from .obstacle_avoider import FastObstacleAvoider
 
@@ -26,27 +27,37 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
         delta_sampling=2 * math.pi / 1000,
         scaling_laserscan_weight=1000,
         scaling_obstacle_weight=1.0,
+        pose_tolerance=0.0,
         *args,
         **kwargs,
     ):
         """
         Arguments
         ----------
-        recompute_all: Since the code is not (throughfully) tested, we just
-            compute everything. In the future this should be fixed by doing a state
-            machine analysis etc.
+        recompute_all: If True, the occlusion filter and both reference directions
+            are recomputed at every step. Otherwise only the parts which are affected
+            by a new scan, new or moving obstacles (robot.has_new_obstacles or a
+            nonzero obstacle velocity) or a change of the pose / velocity are
+            recomputed.
+        pose_tolerance: Change of the position (and orientation) below which the
+            robot is considered static by the incremental update, i.e., the
+            references are evaluated at most this far from the actual pose.
         """
         self.recompute_all = recompute_all
+        self.pose_tolerance = pose_tolerance
         super().__init__(*args, **kwargs)
 
         self._robot = robot
 
         # One for obstacles one for environments
         self.lidar_avoider = SampledAvoider(
-            self.robot, evaluate_normal=False, weight_factor=delta_sampling
+            self.robot,
+            evaluate_normal=False,
+            weight_factor=delta_sampling,
+            dtype=self.dtype,
         )
         self.obstacle_avoider = FastObstacleAvoider(
-            self.robot.obstacle_environment, robot=self.robot
+            self.robot.obstacle_environment, robot=self.robot, dtype=self.dtype
         )
 
         self.evaluate_normal = evaluate_normal
@@ -60,6 +71,13 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
 
         self._laserscan_in_robot_frame = True
 
+        # State of the last (incremental) update
+        self._cleanscan = None
+        # Poses of the last evaluation of the lidar and the obstacle references
+        self._last_lidar_pose = None
+        self._last_obstacle_pose = None
+        self._last_velocity = None
+
     @property
     def robot(self):
         # This must not be changed, otherwise the linkage is lost
@@ -89,11 +107,11 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
         # raise NotImplementedError()
 
         if laserscan is not None:
-            self.laserscan = laserscan
+            self.laserscan = self.as_dtype(laserscan)
             self._got_new_scan = True
 
         elif self.robot.has_newscan:
-            self.laserscan = self.robot.get_allscan()
+            self.laserscan = self.as_dtype(self.robot.get_allscan())
             self._got_new_scan = True
 
     def update_reference_direction(
@@ -104,45 +122,59 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
     ):
         """Clean up lidar first (remove inside obstacles)
         and then get reference, once for the avoider"""
-        if laserscan is not None:
-            self.update_laserscan(laserscan)
+        self.update_laserscan(laserscan)
 
-        if not self.recompute_all and (
-            self._got_new_scan and not self.robot.has_new_obstacles
-        ):
-            # Nothing as changed - keep existing laserscan
-            return self.reference_direction
+        if self.recompute_all:
+            update_cleanscan = update_lidar = update_obstacles = True
+        else:
+            # Moving obstacles might have been stepped since the last update
+            new_obstacles = self.robot.has_new_obstacles or self.has_moving_obstacles()
+            velocity_changed = self.has_velocity_changed(initial_velocity)
 
-        if (
-            self.recompute_all
-            or self._got_new_scan
-            or initial_velocity is not None
-            or not self._laserscan_in_robot_frame
-        ):
-            cleanscan = self.get_scan_without_ocluded_points()
+            update_cleanscan = (
+                self._cleanscan is None or self._got_new_scan or new_obstacles
+            )
+            update_lidar = (
+                update_cleanscan
+                or self.has_pose_changed(position, self._last_lidar_pose)
+                or (self.lidar_avoider.evaluate_velocity_weight and velocity_changed)
+            )
+            update_obstacles = (
+                self.obstacle_avoider.reference_direction is None
+                or new_obstacles
+                or self.has_pose_changed(position, self._last_obstacle_pose)
+                or (self.obstacle_avoider.evaluate_velocity_weight and velocity_changed)
+            )
+
+        if initial_velocity is not None:
+            self._last_velocity = np.array(initial_velocity)
+
+        if update_cleanscan:
+            # The occlusion mask only changes with the scan or the obstacles
+            self._cleanscan = self.get_scan_without_ocluded_points()
+            self._got_new_scan = False
 
             self.lidar_avoider.update_laserscan(
-                cleanscan, in_robot_frame=self._laserscan_in_robot_frame
+                self._cleanscan, in_robot_frame=self._laserscan_in_robot_frame
             )
 
+        if update_lidar:
+            self._last_lidar_pose = self.get_pose_state(position)
             self.lidar_avoider.update_reference_direction(
                 position=position,
                 # in_robot_frame=self._laserscan_in_robot_frame,
                 initial_velocity=initial_velocity,
             )
 
-        if (
-            self.recompute_all
-            or self.robot.has_new_obstacles
-            or initial_velocity is not None
-        ):
+        if update_obstacles:
+            self._last_obstacle_pose = self.get_pose_state(position)
             self.obstacle_avoider.update_reference_direction(
                 position=position,
                 # in_robot_frame=in_robot_frame,
                 initial_velocity=initial_velocity,
             )
 
-        self.weights = self.get_mixed_weights()
+        self.weights = self.get_mixed_weights().astype(self.dtype, copy=False)
 
         self.reference_direction = (
             self.sample_weight * self.lidar_avoider.reference_direction
@@ -166,6 +198,45 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
 
         return self.reference_direction
 
+    def get_pose_state(self, position=None):
+        """Returns the (copied) position and orientation which the references
+        depend on, the robot pose is used if no position is given."""
+        if position is None:
+            position = self.robot.pose.position
+        orientation = self.robot.pose.orientation
+        if orientation is None:
+            orientation = 0
+
+        return np.hstack((np.array(position, dtype=float).flatten(), orientation))
+
+    def has_pose_changed(self, position=None, last_pose=None):
+        """Checks if the pose has changed by more than the tolerance since the last
+        pose (of an evaluation)."""
+        if last_pose is None:
+            return True
+
+        pose = self.get_pose_state(position)
+        if pose.shape != last_pose.shape:
+            return True
+
+        return bool(np.max(np.abs(pose - last_pose)) > self.pose_tolerance)
+
+    def has_moving_obstacles(self) -> bool:
+        """Checks if any obstacle has a nonzero linear or angular velocity."""
+        for obs in self.obstacle_environment:
+            if LA.norm(obs.linear_velocity) or (
+                obs.angular_velocity is not None and np.any(obs.angular_velocity)
+            ):
+                return True
+
+        return False
+
+    def has_velocity_changed(self, initial_velocity=None):
+        if initial_velocity is None or self._last_velocity is None:
+            return True
+
+        return not np.array_equal(initial_velocity, self._last_velocity)
+
     def update_normal_direction(self, weights):
         """Normal direction update is simplified to environment
         where only one has the actual normal."""
@@ -215,33 +286,69 @@ class MixedEnvironmentAvoider(SingleModulationAvoider):
         and then update lidar-reference direction."""
 
         self.update_laserscan()
-        laserscan = np.copy(self.laserscan)
+        laserscan = self.laserscan
 
+        # Single mask over all obstacles (the scan is only copied once)
+        is_outside = np.ones(laserscan.shape[1], dtype=bool)
+
+        analytic_obstacles = []
         for obs in self.obstacle_avoider.obstacle_environment:
             if isinstance(obs, CircularObstacle) or (
                 hasattr(obs, "is_human") and obs.is_human
             ):
                 # Get gamma from array for circular obstacles only (!)
-                dirs = laserscan - np.tile(obs.position, (laserscan.shape[1], 1)).T
-                gamma_vals = LA.norm(dirs, axis=0) - obs.radius
-
-                is_outside = gamma_vals > 0
+                dirs = laserscan - np.reshape(obs.position, (-1, 1))
+                is_outside &= LA.norm(dirs, axis=0) - obs.radius > 0
             else:
-                gamma_vals = np.zeros(laserscan.shape[1])
-                for ii in range(laserscan.shape[1]):
-                    gamma_vals[ii] = obs.get_gamma(
-                        laserscan[:, ii],
-                        in_global_frame=not (self._laserscan_in_robot_frame),
-                        margin_absolut=0,
-                    )
+                analytic_obstacles.append(obs)
 
-                is_outside = gamma_vals > 1
+        if len(analytic_obstacles):
+            ind_check = np.flatnonzero(is_outside)
+            is_outside[ind_check] = self.get_outside_of_obstacles(
+                laserscan[:, ind_check], analytic_obstacles
+            )
 
-            if not np.sum(is_outside):
-                return np.zeros((self.dimension, 0))
+        return laserscan[:, is_outside]
+
+    def get_outside_of_obstacles(
+        self, points: np.ndarray, obstacles: list
+    ) -> np.ndarray:
+        """Returns the mask of the points (dimension, n_points) which are outside of
+        all obstacles (without margin). Ellipses and cuboids are evaluated at once,
+        all other obstacles point-by-point."""
+        in_global_frame = not (self._laserscan_in_robot_frame)
+        is_outside = np.ones(points.shape[1], dtype=bool)
+
+        packed_obstacles = [
+            obs for obs in obstacles if get_obstacle_shape(obs) is not None
+        ]
+        obstacle_arrays = ObstacleArrays.from_obstacles(
+            packed_obstacles, self.dimension
+        )
+        if obstacle_arrays is None:
+            packed_obstacles = []
+        elif obstacle_arrays.n_obstacles:
+            gamma_vals = obstacle_arrays.get_gammas_batch(
+                points, margin_absolut=0, in_global_frame=in_global_frame
+            )
+            is_outside &= np.all(gamma_vals > 1, axis=1)
+
+        packed_ids = set(id(obs) for obs in packed_obstacles)
+        for obs in obstacles:
+            if id(obs) in packed_ids:
+                continue
+
+            for ii in np.flatnonzero(is_outside):
+                is_outside[ii] = (
+                    obs.get_gamma(
+                        points[:, ii],
+                        in_global_frame=in_global_frame,
+                        margin_absolut=0,
+                    )
+                    > 1
+                )
 
-            laserscan = laserscan[:, is_outside]
-        return laserscan
+        return is_outside
 
     @property
     def sample_weight(self):
@@ -15,7 +15,74 @@ from numpy import linalg as LA
 from vartools.linalg import get_orthogonal_basis
 
 from fast_obstacle_avoidance.control_robot import BaseRobot
-from ._base import SingleModulationAvoider
+from ._base import BatchDirections, SingleModulationAvoider
+from ._obstacle_arrays import ObstacleArrays
+from ._obstacle_index import ObstacleGridIndex
+
+
+def get_obstacle_motion(
+    obstacles, dimension: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the center positions, linear velocities (dimension, n_obstacles) and
+    angular velocities (n_obstacles) of the obstacles. The angular velocities are
+    only considered in two dimensions."""
+    center_positions = np.zeros((dimension, len(obstacles)))
+    linear_velocities = np.zeros((dimension, len(obstacles)))
+    angular_velocities = np.zeros(len(obstacles))
+
+    for it, obs in enumerate(obstacles):
+        center_positions[:, it] = obs.center_position
+        linear_velocities[:, it] = obs.linear_velocity
+        if dimension == 2 and obs.angular_velocity:
+            angular_velocities[it] = obs.angular_velocity
+
+    return center_positions, linear_velocities, angular_velocities
+
+
+def get_relative_velocities(
+    weights: np.ndarray,
+    positions: np.ndarray,
+    center_positions: np.ndarray,
+    linear_velocities: np.ndarray,
+    angular_velocities: np.ndarray,
+    weight_pow: float = 2,
+    velocity_scaling: float = 1.1,
+) -> np.ndarray:
+    """Returns the (weighted) velocities of the obstacles at the positions
+    (dimension, n_positions) for the weights of shape (n_positions, n_obstacles).
+
+    The linear velocities are averaged, and the rotation of the (close) obstacles
+    is added as the surface velocity (angular_velocity x relative_position)."""
+    weights = weights**weight_pow
+    weight_sums = np.sum(weights, axis=1)
+    ind_nonzero = weight_sums > 0
+    weights[ind_nonzero, :] = (
+        weights[ind_nonzero, :] / weight_sums[ind_nonzero, np.newaxis]
+    )
+
+    relative_velocities = linear_velocities @ weights.T
+
+    ind_rotating = angular_velocities != 0
+    if np.any(ind_rotating):
+        rotating_weights = weights[:, ind_rotating]
+        angular_weights = np.zeros(rotating_weights.shape)
+        ind_positive = rotating_weights > 0
+        angular_weights[ind_positive] = np.exp(1 - (1 / rotating_weights[ind_positive]))
+
+        # Surface velocity in 2D: cross([0, 0, w], [x, y, 0]) = [-w y, w x]
+        relative_positions = (
+            positions[:, :, np.newaxis] - center_positions[:, np.newaxis, ind_rotating]
+        )
+        angular_factors = angular_weights * angular_velocities[ind_rotating]
+        relative_velocities[0, :] -= np.sum(
+            angular_factors * relative_positions[1, :, :], axis=1
+        )
+        relative_velocities[1, :] += np.sum(
+            angular_factors * relative_positions[0, :, :], axis=1
+        )
+
+    # Try sure to move away a bit 'faster' than surface velocity
+    return relative_velocities * velocity_scaling
 
 
 class FastObstacleAvoider(SingleModulationAvoider):
@@ -29,9 +96,30 @@ class FastObstacleAvoider(SingleModulationAvoider):
         margin_weight: float = 1,
         distance_weight_sum: float = 1,
         dimension: int = 2,
+        use_obstacle_arrays: bool = False,
+        influence_distance: float = None,
+        index_cell_size: float = None,
         **kwargs
     ):
-        """Initialize with obstacle list"""
+        """Initialize with obstacle list
+
+        Arguments
+        ---------
+        use_obstacle_arrays: Ellipses (and spheres) and cuboids are packed into
+            arrays and evaluated at once. Environments which contain any other type
+            of obstacle are still evaluated one-by-one. The arrays are packed once,
+            and repacked when obstacles are added / removed or the robot got new
+            obstacles. Obstacles which are moved outside of 'do_velocity_step'
+            require a call to 'update_obstacle_arrays'.
+        influence_distance: Only obstacles whose bounding sphere is within this
+            distance of the position are evaluated; they are found with a grid index
+            over the obstacle centers. It is rebuilt (as the arrays) when obstacles
+            are added / removed or the robot got new obstacles. Obstacles which are
+            moved outside of 'do_velocity_step' require a call to
+            'update_obstacle_index'.
+        index_cell_size: Cell size of the grid index (by default the diameter of
+            a typical obstacle)
+        """
 
         self.obstacle_environment = obstacle_environment
         self.robot = robot
@@ -48,6 +136,16 @@ class FastObstacleAvoider(SingleModulationAvoider):
         # Simulation paramteres
         self.consider_relative_velocity = consider_relative_velocity
 
+        self.use_obstacle_arrays = use_obstacle_arrays
+        self.obstacle_arrays = None
+        # Packed arrays of the whole environment (None if it cannot be packed)
+        self._environment_arrays = None
+        self._n_packed_obstacles = None
+
+        self.influence_distance = influence_distance
+        self.index_cell_size = index_cell_size
+        self.obstacle_index = None
+
     def update_laserscan(self, *args, **kwargs):
         warnings.warn(
             "No action taken on update, we're waiting for the analytic description."
@@ -58,44 +156,37 @@ class FastObstacleAvoider(SingleModulationAvoider):
         return self.obstacle_environment.dimension
 
     def update_relative_velocity(
-        self, weights, position, weight_pow=2, velocity_scaling=1.1
+        self, weights, position, weight_pow=2, velocity_scaling=1.1, obstacles=None
     ):
-        """Update linear and angular velocity (without deformation)."""
-        linear_velocities = np.zeros((self.dimension, weights.shape[0]))
-        angular_velocities = np.zeros((weights.shape[0]))
-
-        weights = weights**weight_pow
-        weights = weights / np.sum(weights)
-
-        summed_angular = np.zeros(position.shape[0])
-        for it, obs in enumerate(self.obstacle_environment):
-            if weights[it] <= 0:
-                continue
-
-            linear_velocities[:, it] = obs.linear_velocity
+        """Update linear and angular velocity (without deformation).
+        The weights correspond to the obstacles (by default the whole environment)."""
+        if obstacles is None:
+            obstacles = self.obstacle_environment
 
-            if obs.angular_velocity and LA.norm(obs.angular_velocity):
-
-                angular_weight = np.exp(1 - (1 / weights[it]))
-                angular_vel = np.cross(
-                    np.array([0, 0, obs.angular_velocity]),
-                    np.hstack((position - np.array(obs.center_position), 0)),
-                )
-
-                summed_angular += angular_weight * angular_vel[:2]
-
-        # if any(angular_velocities):
-        # warnings.warn("Not yet implemented for angular velocity.")
-
-        self.relative_velocity = np.sum(
-            (np.tile(weights, (linear_velocities.shape[0], 1)) * linear_velocities),
-            axis=1,
-        )
-
-        self.relative_velocity = self.relative_velocity + summed_angular
-
-        # Try sure to move away a bit 'faster' than surface velocity
-        self.relative_velocity = self.relative_velocity * velocity_scaling
+        if (
+            self.obstacle_arrays is not None
+            and self.obstacle_arrays.n_obstacles == len(obstacles)
+        ):
+            # The arrays are packed from the same obstacles in the same update
+            center_positions = self.obstacle_arrays.center_positions
+            linear_velocities = self.obstacle_arrays.linear_velocities
+            angular_velocities = self.obstacle_arrays.angular_velocities
+        else:
+            (
+                center_positions,
+                linear_velocities,
+                angular_velocities,
+            ) = get_obstacle_motion(obstacles, self.dimension)
+
+        self.relative_velocity = get_relative_velocities(
+            np.reshape(weights, (1, -1)),
+            np.reshape(position, (-1, 1)),
+            center_positions,
+            linear_velocities,
+            angular_velocities,
+            weight_pow=weight_pow,
+            velocity_scaling=velocity_scaling,
+        )[:, 0]
 
         return self.relative_velocity
 
@@ -105,12 +196,7 @@ class FastObstacleAvoider(SingleModulationAvoider):
         """Take position from robot position if not given as argument."""
         if not len(self.obstacle_environment):
             # No obstacles found -> default reference
-            # By default we assume dim=2
-            # TODO: specified for any other case (!)
-            self.reference_direction = np.zeros(2)
-            self.normal_direction = np.zeros(self.reference_direction.shape)
-            self.norm_angle = np.zeros(self.reference_direction.shape[0] - 1)
-            self.distance_weight_sum = 0
+            self._set_trivial_reference_direction()
             return
 
         if position is None:
@@ -119,31 +205,42 @@ class FastObstacleAvoider(SingleModulationAvoider):
             else:
                 position = self.robot.pose.position
 
-        norm_dirs = np.zeros(
-            (self.obstacle_environment.dimension, self.obstacle_environment.n_obstacles)
-        )
-        ref_dirs = np.zeros(norm_dirs.shape)
-        gammas = np.zeros((norm_dirs.shape[1]))
+        if self.use_obstacle_arrays:
+            self.obstacle_arrays = self.get_environment_arrays()
+
+        if self.influence_distance is None:
+            obstacles = self.obstacle_environment
+        else:
+            indices = self.get_indices_in_range(position)
+            if not len(indices):
+                # All obstacles are far away
+                self._set_trivial_reference_direction()
+                if self.robot is not None:
+                    self.robot.retrieved_obstacles()
+                return
+
+            obstacles = [self.obstacle_environment[ii] for ii in indices]
+            if self.obstacle_arrays is not None:
+                self.obstacle_arrays = self.obstacle_arrays.take(indices)
 
         # if self.consider_relative_velocity:
         # self.udpate_relative_velocity(weights, position=position)
         # relative_velocities = np.zeros(ref_dirs.shape)
 
-        for it, obs in enumerate(self.obstacle_environment):
-            norm_dirs[:, it] = obs.get_normal_direction(position, in_global_frame=True)
-            ref_dirs[:, it] = (-1) * obs.get_reference_direction(
-                position, in_global_frame=True
-            )
-
-            if obs.is_boundary:
-                # Invert boundary-directions, as 'flowing' away from boundary is in the other direction
-                ref_dirs[:, it] = (-1) * ref_dirs[:, it]
-                norm_dirs[:, it] = (-1) * norm_dirs[:, it]
-
-            gammas[it] = obs.get_gamma(position, in_global_frame=True)
+        if self.obstacle_arrays is None:
+            ref_dirs, norm_dirs, gammas = self.evaluate_obstacles(position, obstacles)
+            characteristic_lengths = [
+                obs.get_characteristic_length() for obs in obstacles
+            ]
+        else:
+            ref_dirs, norm_dirs, gammas = self.evaluate_obstacle_arrays(position)
+            characteristic_lengths = self.obstacle_arrays.characteristic_lengths
 
         weights = self.get_weights_from_gamma(
-            gammas, directions=ref_dirs, initial_velocity=initial_velocity
+            gammas,
+            directions=ref_dirs,
+            initial_velocity=initial_velocity,
+            characteristic_lengths=characteristic_lengths,
         )
         self.reference_direction = np.sum(
             ref_dirs * np.tile(weights, (ref_dirs.shape[0], 1)), axis=1
@@ -162,7 +259,9 @@ class FastObstacleAvoider(SingleModulationAvoider):
         )
 
         if self.consider_relative_velocity:
-            self.update_relative_velocity(weights=weights, position=position)
+            self.update_relative_velocity(
+                weights=weights, position=position, obstacles=obstacles
+            )
 
         if self.robot is not None:
             self.robot.retrieved_obstacles()
@@ -176,6 +275,249 @@ class FastObstacleAvoider(SingleModulationAvoider):
                 ((-1) * self.normal_dirs[1, :], self.normal_dirs[0, :])
             )
 
+    def _set_trivial_reference_direction(self) -> None:
+        # By default we assume dim=2
+        # TODO: specified for any other case (!)
+        self.reference_direction = np.zeros(2, dtype=self.dtype)
+        self.normal_direction = np.zeros(self.reference_direction.shape)
+        self.norm_angle = np.zeros(self.reference_direction.shape[0] - 1)
+        self.distance_weight_sum = 0
+        self.relative_velocity = None
+
+    def get_obstacles_in_range(self, position: np.ndarray) -> list:
+        """Returns the obstacles within the influence distance of the position."""
+        return [
+            self.obstacle_environment[ii] for ii in self.get_indices_in_range(position)
+        ]
+
+    def get_indices_in_range(self, position: np.ndarray) -> np.ndarray:
+        """Returns the indices of the obstacles within the influence distance of the
+        position, the grid index is (re-)built if the number of obstacles changed or
+        the robot got new obstacles."""
+        if (
+            self.obstacle_index is None
+            or self.obstacle_index.n_obstacles != len(self.obstacle_environment)
+            or (self.robot is not None and self.robot.has_new_obstacles)
+        ):
+            self.obstacle_index = ObstacleGridIndex.from_environment(
+                self.obstacle_environment, cell_size=self.index_cell_size
+            )
+
+        return self.obstacle_index.get_indices_in_range(
+            position, self.influence_distance
+        )
+
+    def get_environment_arrays(self) -> ObstacleArrays:
+        """Returns the packed arrays of the whole environment (or None if it cannot
+        be packed), they are repacked if the number of obstacles changed or the
+        robot got new obstacles."""
+        if (
+            self._n_packed_obstacles != len(self.obstacle_environment)
+            or (self.robot is not None and self.robot.has_new_obstacles)
+        ):
+            self.update_obstacle_arrays()
+
+        return self._environment_arrays
+
+    def update_obstacle_arrays(self) -> None:
+        """Repacks all obstacles into the arrays."""
+        self._environment_arrays = ObstacleArrays.from_environment(
+            self.obstacle_environment
+        )
+        self._n_packed_obstacles = len(self.obstacle_environment)
+
+    def update_obstacle_index(self) -> None:
+        """Updates the centers of all obstacles in the grid index."""
+        if self.obstacle_index is None:
+            return
+
+        for it, obs in enumerate(self.obstacle_environment):
+            self.obstacle_index.update_obstacle(it, obs.center_position)
+
+    def do_velocity_step(self, delta_time: float) -> None:
+        """Moves all obstacles with their velocity, the grid index is updated for
+        the moving ones and the packed arrays are moved at once."""
+        for it, obs in enumerate(self.obstacle_environment):
+            obs.do_velocity_step(delta_time=delta_time)
+
+            if self.obstacle_index is not None and LA.norm(obs.linear_velocity):
+                self.obstacle_index.update_obstacle(it, obs.center_position)
+
+        if self._environment_arrays is not None:
+            self._environment_arrays.do_velocity_step(delta_time)
+
+    def evaluate_obstacles(
+        self, position: np.ndarray, obstacles=None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the reference directions, normal directions and gammas of the
+        obstacles (by default the whole environment) by evaluating them one-by-one."""
+        if obstacles is None:
+            obstacles = self.obstacle_environment
+
+        norm_dirs = np.zeros((self.dimension, len(obstacles)), dtype=self.dtype)
+        ref_dirs = np.zeros(norm_dirs.shape, dtype=self.dtype)
+        gammas = np.zeros((norm_dirs.shape[1]), dtype=self.dtype)
+
+        for it, obs in enumerate(obstacles):
+            norm_dirs[:, it] = obs.get_normal_direction(position, in_global_frame=True)
+            ref_dirs[:, it] = (-1) * obs.get_reference_direction(
+                position, in_global_frame=True
+            )
+
+            if obs.is_boundary:
+                # Invert boundary-directions, as 'flowing' away from boundary is in the other direction
+                ref_dirs[:, it] = (-1) * ref_dirs[:, it]
+                norm_dirs[:, it] = (-1) * norm_dirs[:, it]
+
+            gammas[it] = obs.get_gamma(position, in_global_frame=True)
+
+        return ref_dirs, norm_dirs, gammas
+
+    def evaluate_obstacle_arrays(
+        self, position: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the reference directions, normal directions and gammas of all
+        obstacles from the packed obstacle arrays."""
+        ref_dirs, norm_dirs, gammas = self.evaluate_obstacle_arrays_batch(
+            np.reshape(position, (-1, 1)), self.obstacle_arrays
+        )
+        return ref_dirs[:, 0, :], norm_dirs[:, 0, :], gammas[0, :]
+
+    def evaluate_obstacle_arrays_batch(
+        self, positions: np.ndarray, obstacle_arrays: ObstacleArrays
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the reference directions, normal directions (dimension,
+        n_positions, n_obstacles) and gammas (n_positions, n_obstacles)."""
+        positions = np.asarray(positions, dtype=float)
+
+        norm_dirs = obstacle_arrays.get_normal_directions_batch(positions)
+        ref_dirs = (-1) * obstacle_arrays.get_reference_directions_batch(positions)
+
+        # Invert boundary-directions (as for the one-by-one evaluation)
+        is_boundary = obstacle_arrays.is_boundary
+        ref_dirs[:, :, is_boundary] = (-1) * ref_dirs[:, :, is_boundary]
+        norm_dirs[:, :, is_boundary] = (-1) * norm_dirs[:, :, is_boundary]
+
+        gammas = obstacle_arrays.get_gammas_batch(positions)
+
+        return self.as_dtype(ref_dirs), self.as_dtype(norm_dirs), self.as_dtype(gammas)
+
+    def get_batch_directions(
+        self, positions: np.ndarray, initial_velocities: np.ndarray
+    ) -> BatchDirections:
+        """Returns the reference and normal directions, and the relative velocities
+        (dimension, n_positions) for all positions at once.
+
+        The obstacles are packed into arrays if possible, otherwise they are
+        evaluated one-by-one for each position. All obstacles are considered,
+        i.e., the influence distance is not applied."""
+        if not len(self.obstacle_environment):
+            return BatchDirections(np.zeros(positions.shape, dtype=self.dtype))
+
+        if self.use_obstacle_arrays:
+            obstacle_arrays = self.get_environment_arrays()
+        else:
+            obstacle_arrays = ObstacleArrays.from_environment(self.obstacle_environment)
+
+        if obstacle_arrays is None:
+            n_positions = positions.shape[1]
+            n_obstacles = len(self.obstacle_environment)
+            ref_dirs = np.zeros(
+                (self.dimension, n_positions, n_obstacles), dtype=self.dtype
+            )
+            norm_dirs = np.zeros(ref_dirs.shape, dtype=self.dtype)
+            gammas = np.zeros((n_positions, n_obstacles), dtype=self.dtype)
+            for it in range(n_positions):
+                (
+                    ref_dirs[:, it, :],
+                    norm_dirs[:, it, :],
+                    gammas[it, :],
+                ) = self.evaluate_obstacles(positions[:, it])
+
+            characteristic_lengths = [
+                obs.get_characteristic_length() for obs in self.obstacle_environment
+            ]
+            motion = get_obstacle_motion(self.obstacle_environment, self.dimension)
+
+        else:
+            ref_dirs, norm_dirs, gammas = self.evaluate_obstacle_arrays_batch(
+                positions, obstacle_arrays
+            )
+            characteristic_lengths = obstacle_arrays.characteristic_lengths
+            motion = (
+                obstacle_arrays.center_positions,
+                obstacle_arrays.linear_velocities,
+                obstacle_arrays.angular_velocities,
+            )
+
+        weights, _ = self.get_weights_from_gamma_batch(
+            gammas,
+            directions=ref_dirs,
+            initial_velocities=initial_velocities,
+            characteristic_lengths=characteristic_lengths,
+        )
+        reference_directions = np.sum(ref_dirs * weights[np.newaxis, :, :], axis=2)
+        normal_directions = self.get_normal_directions_batch(
+            reference_directions, ref_dirs, norm_dirs, weights
+        )
+
+        if not self.consider_relative_velocity:
+            return BatchDirections(reference_directions, normal_directions)
+
+        relative_velocities = get_relative_velocities(weights, positions, *motion)
+        return BatchDirections(
+            reference_directions, normal_directions, self.as_dtype(relative_velocities)
+        )
+
+    def get_normal_directions_batch(
+        self,
+        reference_directions: np.ndarray,
+        ref_dirs: np.ndarray,
+        norm_dirs: np.ndarray,
+        weights: np.ndarray,
+    ) -> np.ndarray:
+        """Batched version of 'update_normal_direction' (without storing) for the
+        references (dimension, n_positions) and the directions of the obstacles
+        (dimension, n_positions, n_obstacles)."""
+        ref_norms = LA.norm(reference_directions, axis=0)
+        ind_reference = ref_norms > 0
+        normal_directions = np.zeros(reference_directions.shape, dtype=self.dtype)
+        normal_directions[:, ind_reference] = (
+            reference_directions[:, ind_reference] / ref_norms[ind_reference]
+        )
+
+        # Check if normal directions are valid
+        ind_valid = LA.norm(norm_dirs, axis=0) > 0
+        ind_no_normal = ~np.any(ind_valid, axis=1)
+        normal_directions[:, ind_no_normal & ~ind_reference] = (
+            1.0 / reference_directions.shape[0]
+        )
+
+        delta_normals = np.sum(
+            (norm_dirs - ref_dirs) * (weights * ind_valid)[np.newaxis, :, :], axis=2
+        )
+        delta_norms = LA.norm(delta_normals, axis=0)
+
+        ind_adapt = ~ind_no_normal & ind_reference & (delta_norms > 0)
+        if not np.any(ind_adapt):
+            return normal_directions
+
+        unit_references = normal_directions[:, ind_adapt]
+        delta_normals = delta_normals[:, ind_adapt]
+
+        dot_prods = (-1) * (
+            np.sum(delta_normals * unit_references, axis=0) / delta_norms[ind_adapt]
+        )
+        normal_scalings = np.where(
+            dot_prods < np.sqrt(2) / 2, 1.0, np.sqrt(2) * dot_prods
+        )
+
+        adapted_normals = normal_scalings * unit_references + delta_normals
+        normal_directions[:, ind_adapt] = adapted_normals / LA.norm(
+            adapted_normals, axis=0
+        )
+        return normal_directions
+
     @property
     def tangent_direction(self):
         """Only works for two dimensions!!"""
@@ -290,14 +632,19 @@ class FastObstacleAvoider(SingleModulationAvoider):
         initial_velocity: np.ndarray = None,
         max_weight_value: float = 1e10,
         lower_margin: float = 1e-10,
+        characteristic_lengths: np.ndarray = None,
     ):
-        ref_dists = np.array(
-            [oo.get_characteristic_length() for oo in self.obstacle_environment]
-        )
+        if characteristic_lengths is None:
+            ref_dists = np.array(
+                [oo.get_characteristic_length() for oo in self.obstacle_environment],
+                dtype=self.dtype,
+            )
+        else:
+            ref_dists = self.as_dtype(characteristic_lengths)
 
         ind_zero = gammas < lower_margin
         if np.sum(ind_zero):
-            weights = np.zeros(ind_zero.shape)
+            weights = np.zeros(ind_zero.shape, dtype=self.dtype)
             weights[ind_zero] = 1 / np.sum(ind_zero)
             return weights
 
@@ -322,3 +669,68 @@ class FastObstacleAvoider(SingleModulationAvoider):
             return weights / self.distance_weight_sum
         else:
             return weights
+
+    def get_weights_from_gamma_batch(
+        self,
+        gammas: np.ndarray,
+        directions: np.ndarray = None,
+        initial_velocities: np.ndarray = None,
+        lower_margin: float = 1e-10,
+        characteristic_lengths: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Batched version of 'get_weights_from_gamma' for gammas of shape
+        (n_positions, n_obstacles). Returns the weights and the distance weight sums
+        (n_positions) without storing them."""
+        if characteristic_lengths is None:
+            ref_dists = np.array(
+                [oo.get_characteristic_length() for oo in self.obstacle_environment],
+                dtype=self.dtype,
+            )
+        else:
+            ref_dists = self.as_dtype(characteristic_lengths)
+
+        ind_zero = gammas < lower_margin
+        ind_inside = np.any(ind_zero, axis=1)
+
+        weights = np.zeros(gammas.shape, dtype=self.dtype)
+        distance_weight_sums = np.zeros(gammas.shape[0], dtype=self.dtype)
+
+        if np.any(ind_inside):
+            weights[ind_inside, :] = (
+                ind_zero[ind_inside, :]
+                / np.sum(ind_zero[ind_inside, :], axis=1)[:, np.newaxis]
+            )
+
+        ind_outside = ~ind_inside
+        if not np.any(ind_outside):
+            return weights, distance_weight_sums
+
+        gammas = gammas[ind_outside, :]
+
+        # Distance weight * weight factor
+        distance_weights = 1 / (gammas - 1)
+        size_weights = (
+            2 * ref_dists / (gammas - 1 + 2 * ref_dists) ** (self.dimension - 1)
+        )
+        outside_weights = distance_weights * size_weights
+
+        if (
+            self.evaluate_velocity_weight
+            and directions is not None
+            and initial_velocities is not None
+        ):
+            outside_weights = self.reduce_wake_effect_batch(
+                outside_weights,
+                initial_velocities[:, ind_outside],
+                directions[:, ind_outside, :],
+            )
+
+        outside_sums = np.sum(outside_weights, axis=1)
+        ind_normalize = outside_sums > 1
+        outside_weights[ind_normalize, :] = (
+            outside_weights[ind_normalize, :] / outside_sums[ind_normalize, np.newaxis]
+        )
+
+        weights[ind_outside, :] = outside_weights
+        distance_weight_sums[ind_outside] = outside_sums
+        return weights, distance_weight_sums
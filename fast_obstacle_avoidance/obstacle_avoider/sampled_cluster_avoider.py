@@ -23,6 +23,10 @@ from vartools.vector_rotation import VectorRotationXd
 
 from fast_obstacle_avoidance.control_robot import BaseRobot
 from fast_obstacle_avoidance.directional_learning import DirectionalSoftKMeans
+from fast_obstacle_avoidance.scan_segmentation import (
+    AngularSegmentation,
+    ClusterTracker,
+)
 
 from .stretching_matrix import StretchingMatrixTrigonometric
 from ._base import SingleModulationAvoider
@@ -41,6 +45,7 @@ class Clusterer(Protocol):
 class ClustererType(Enum):
     DBSCAN = auto()
     DIRECTIONAL_SOFT_KMEANS = auto()
+    ANGULAR_SEGMENTATION = auto()
 
 
 class SampledClusterAvoider:
@@ -63,11 +68,16 @@ class SampledClusterAvoider:
         weight_power: float = 2.0,
         control_radius: float = 1.0,
         clusterer: Clusterer | ClustererType = ClustererType.DBSCAN,
+        track_clusters: bool = False,
+        online_clustering: bool = False,
+        dtype=float,
+        verbose: bool = False,
         # delta_sampling: float = delta_sampling
         # *args,
         # **kwargs,
     ) -> None:
         self.robot = robot
+        self.verbose = verbose
 
         self.evaluate_normal = evaluate_normal
         self.max_angle_ref_norm = 80 * np.pi / 180
@@ -109,17 +119,45 @@ class SampledClusterAvoider:
             self.clusterer = DBSCAN(**cluster_params)
             print(f"Using DBSCAN.")
 
+        elif clusterer == ClustererType.ANGULAR_SEGMENTATION:
+            # Linear pass over the (bearing-ordered) scan, with the same gap as DBSCAN
+            if cluster_params is None:
+                cluster_params = {
+                    "gap_distance": 2 * self.control_radius,
+                    "min_samples": 3,
+                }
+            self.clusterer = AngularSegmentation(**cluster_params)
+
         else:
             self.clusterer = clusterer
 
+        if track_clusters:
+            # Carry the clusters over the scans (only new points are clustered)
+            self.clusterer = ClusterTracker(
+                self.clusterer, association_margin=self.control_radius
+            )
+
+        # Warm-started clustering with a bounded budget (clusterer.partial_fit)
+        if online_clustering and not hasattr(self.clusterer, "partial_fit"):
+            raise ValueError(
+                f"online_clustering requires a clusterer with 'partial_fit', "
+                f"which {type(self.clusterer).__name__} does not have."
+            )
+        self.online_clustering = online_clustering
+
         self.sample_handler = SampledAvoider(
             self.robot,
             weight_max_norm=weight_max_norm,
             weight_factor=weight_factor,
             weight_power=weight_power,
             control_radius=self.control_radius,
+            dtype=dtype,
         )
 
+    @property
+    def dtype(self) -> np.dtype:
+        return self.sample_handler.dtype
+
     @property
     def weight_factor(self) -> float:
         return self.sample_handler.weight_factor
@@ -203,23 +241,43 @@ class SampledClusterAvoider:
         self, datapoints: np.ndarray = None, in_robot_frame: bool = True
     ) -> None:
         if in_robot_frame:
-            self._datapoints = self.robot.pose.transform_from_relative(datapoints)
-        else:
-            self._datapoints = datapoints
+            datapoints = self.robot.pose.transform_from_relative(datapoints)
+        self._datapoints = self.sample_handler.as_dtype(datapoints)
 
         start = timer()
-        self.clusterer.fit(self._datapoints.T)
+        if self.online_clustering:
+            self.clusterer.partial_fit(self._datapoints.T)
+        else:
+            self.clusterer.fit(self._datapoints.T)
         end = timer()
-        print(f"Clustering time {round((end - start)*1000, 2)} ms.")
+        if self.verbose:
+            print(f"Clustering time {round((end - start)*1000, 2)} ms.")
 
-        self.unique_labels = np.unique(self.clusterer.labels_)
-        self.unique_labels = np.delete(self.unique_labels, self.unique_labels == -1)
+        ind_clustered = self.clusterer.labels_ != -1
+        self.unique_labels, ind_labels = np.unique(
+            self.clusterer.labels_[ind_clustered], return_inverse=True
+        )
 
         # Set centers
-        self._cluster_centers = np.zeros((self.dimension, len(self.unique_labels)))
-        for ii, label in enumerate(self.unique_labels):
-            self._cluster_centers[:, ii] = np.mean(
-                self._datapoints[:, label == self.clusterer.labels_], axis=1
+        if isinstance(self.clusterer, ClusterTracker):
+            # Smoothed centers of the tracked clusters
+            self._cluster_centers = self.sample_handler.as_dtype(
+                self.clusterer.cluster_centers_.T
+            )
+            return
+
+        counts = np.bincount(ind_labels, minlength=len(self.unique_labels))
+        self._cluster_centers = np.zeros(
+            (self.dimension, len(self.unique_labels)), dtype=self.dtype
+        )
+        for dd in range(self.dimension):
+            self._cluster_centers[dd, :] = (
+                np.bincount(
+                    ind_labels,
+                    weights=self._datapoints[dd, ind_clustered],
+                    minlength=len(self.unique_labels),
+                )
+                / counts
             )
 
     def get_cluster_centers(self) -> np.ndarray:
@@ -283,7 +341,10 @@ class SampledClusterAvoider:
             # Zero velocity -> no modulation needed
             return initial_velocity
 
-        velocity_direction = initial_velocity / velocity_norm
+        position = self.sample_handler.as_dtype(position)
+        velocity_direction = self.sample_handler.as_dtype(
+            initial_velocity / velocity_norm
+        )
 
         self._cluster_close_outliers(position)
 
@@ -300,101 +361,54 @@ class SampledClusterAvoider:
             directions=ref_dirs,
         )
 
-        # The reference / normal is only store for nice visualization
-        self.reference_directions = np.zeros((self.dimension, self.n_obstacles))
-        self.normal_directions = np.zeros((self.dimension, self.n_obstacles))
-
-        global_weights = np.zeros(self.n_obstacles)
-        self.modulated_velocities = np.zeros((self.dimension, self.n_obstacles))
-
-        # For all cluster
-        for ii in range(self.n_obstacles):
-            ind_cluster = ii == self.clusterer.labels_
-
-            normal_direction = (-1) * np.sum(
-                ref_dirs[:, ind_cluster]
-                * np.tile(local_weights[ind_cluster], (self.dimension, 1)),
-                axis=1,
-            )
-
-            normal_norm = LA.norm(normal_direction)
-            normal_direction = normal_direction / normal_norm
-            global_weights[ii] = normal_norm
-
-            reference_direction = position - self._cluster_centers[:, ii]
-            reference_direction = self.limit_reference_from_offset(
-                normal_direction, reference_direction
-            )
-
-            basis_matrix = get_orthogonal_basis(normal_direction)
-            basis_matrix[:, 0] = reference_direction
-
-            stretch_matrix = self.stretching_matrix.get(
-                normal_norm,
-                reference_direction,
-                normal_direction,
-                velocity_direction,
-            )
-
-            self.modulated_velocities[:, ii] = self.modulate(
-                velocity_direction,
-                decomposition_matrix=basis_matrix,
-                stretching_matrix=stretch_matrix,
-            )
-
-            self.reference_directions[:, ii] = reference_direction
-            self.normal_directions[:, ii] = normal_direction
-
-        # Check if there is outliers -> additionally observe them
+        # Close outliers are avoided as one additional obstacle
+        outlier_reference = None
         if len(self._ind_close_outliers):
-            local_weights = self.sample_handler.get_weight_from_distances(
+            outlier_weights = self.sample_handler.get_weight_from_distances(
                 relative_distances[self._ind_close_outliers]
             )
-
-            reference_direction = (-1) * np.sum(
-                ref_dirs[:, self._ind_close_outliers]
-                * np.tile(local_weights, (self.dimension, 1)),
-                axis=1,
+            outlier_reference = (-1) * (
+                ref_dirs[:, self._ind_close_outliers] @ outlier_weights
             )
+            if not LA.norm(outlier_reference):
+                warnings.warn("Zero length reference.")
+                outlier_reference = None
 
-            if ref_norm := LA.norm(reference_direction):
-                reference_direction = reference_direction / ref_norm
-                global_weights = np.append(global_weights, [ref_norm])
-
-                # Basis matrix is orthogonal for the close points
-                basis_matrix = get_orthogonal_basis(reference_direction)
-                stretch_matrix = self.stretching_matrix.get(
-                    ref_norm,
-                    reference_direction,
-                    initial_velocity=velocity_direction,
-                )
+        n_directions = self.n_obstacles + (outlier_reference is not None)
 
-                mod_vel = self.modulate(
-                    velocity_direction,
-                    decomposition_matrix=basis_matrix,
-                    stretching_matrix=stretch_matrix,
-                )
-                self.modulated_velocities = np.append(
-                    self.modulated_velocities,
-                    mod_vel.reshape(self.dimension, 1),
-                    axis=1,
-                )
+        # The reference / normal is only store for nice visualization
+        self.reference_directions = np.zeros((self.dimension, n_directions))
+        self.normal_directions = np.zeros((self.dimension, n_directions))
+        global_weights = np.zeros(n_directions)
 
-                self.reference_directions = np.append(
-                    self.reference_directions,
-                    reference_direction.reshape(self.dimension, 1),
-                    axis=1,
-                )
-                self.normal_directions = np.append(
-                    self.normal_directions,
-                    normal_direction.reshape(self.dimension, 1),
-                    axis=1,
-                )
-            else:
-                warnings.warn("Zero length reference.")
+        # All clusters at once
+        normal_directions, normal_norms = self.get_cluster_normals(
+            ref_dirs, local_weights
+        )
+        self.normal_directions[:, : self.n_obstacles] = normal_directions
+        self.reference_directions[:, : self.n_obstacles] = (
+            self.limit_references_from_offset(
+                normal_directions,
+                np.reshape(position, (-1, 1)) - self._cluster_centers,
+            )
+        )
+        global_weights[: self.n_obstacles] = normal_norms
+
+        if outlier_reference is not None:
+            # Basis matrix is orthogonal for the close points
+            global_weights[-1] = LA.norm(outlier_reference)
+            self.reference_directions[:, -1] = outlier_reference / global_weights[-1]
+            self.normal_directions[:, -1] = self.reference_directions[:, -1]
+
+        self.modulated_velocities = self.modulate_batch(
+            velocity_direction,
+            importance_variables=global_weights,
+            reference_directions=self.reference_directions,
+            normal_directions=self.normal_directions,
+        )
 
         if not (weight_sum := np.sum(global_weights)):
-            return velocity
+            return initial_velocity
 
         self.normalized_weights = global_weights / weight_sum
         velocity = get_directional_weighted_sum(
@@ -457,6 +471,85 @@ class SampledClusterAvoider:
         )
         return ((1.0 + dot_scaling * dot_product)) ** power_factor
 
+    def get_cluster_normals(
+        self, ref_dirs: np.ndarray, local_weights: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (normalized) normals of shape (dimension, n_obstacles) and
+        their norms, i.e., the weighted sums of the directions of each cluster."""
+        labels = self.clusterer.labels_
+        ind_clustered = np.logical_and(labels >= 0, labels < self.n_obstacles)
+
+        normal_directions = np.zeros((self.dimension, self.n_obstacles))
+        for dd in range(self.dimension):
+            normal_directions[dd, :] = (-1) * np.bincount(
+                labels[ind_clustered],
+                weights=ref_dirs[dd, ind_clustered] * local_weights[ind_clustered],
+                minlength=self.n_obstacles,
+            )
+
+        normal_norms = LA.norm(normal_directions, axis=0)
+        ind_nonzero = normal_norms > 0
+        normal_directions[:, ind_nonzero] = (
+            normal_directions[:, ind_nonzero] / normal_norms[ind_nonzero]
+        )
+        return normal_directions, normal_norms
+
+    def modulate_batch(
+        self,
+        velocity: np.ndarray,
+        importance_variables: np.ndarray,
+        reference_directions: np.ndarray,
+        normal_directions: np.ndarray,
+        singular_margin: float = 1e-12,
+    ) -> np.ndarray:
+        """Modulates the velocity with respect to all (unit) reference and normal
+        directions of shape (dimension, n_obstacles).
+
+        The tangents of the normal share the same eigenvalue, hence
+        M v = lambda_tang * v + (lambda_ref - lambda_tang) * r * <n, v> / <n, r>,
+        which equals 'modulate' with the corresponding decomposition matrix."""
+        n_directions = reference_directions.shape[1]
+        velocities = np.tile(np.reshape(velocity, (-1, 1)), (1, n_directions))
+
+        lambdas_ref, lambdas_tang = self.stretching_matrix.get_lambdas_batch(
+            importance_variables, reference_directions, normal_directions, velocities
+        )
+
+        norm_dot_refs = np.sum(normal_directions * reference_directions, axis=0)
+        ind_singular = np.abs(norm_dot_refs) < singular_margin
+        norm_dot_refs[ind_singular] = 1
+
+        ref_factors = (
+            (lambdas_ref - lambdas_tang)
+            * (velocity @ normal_directions)
+            / norm_dot_refs
+        )
+        modulated_velocities = (
+            lambdas_tang * velocities + ref_factors * reference_directions
+        )
+
+        for it in np.flatnonzero(ind_singular):
+            if not LA.norm(normal_directions[:, it]):
+                # Not weighted, hence the velocity is kept
+                modulated_velocities[:, it] = velocity
+                continue
+
+            basis_matrix = get_orthogonal_basis(normal_directions[:, it])
+            basis_matrix[:, 0] = reference_directions[:, it]
+            stretch_matrix = self.stretching_matrix.get(
+                importance_variables[it],
+                reference_directions[:, it],
+                normal_directions[:, it],
+                velocity,
+            )
+            modulated_velocities[:, it] = self.modulate(
+                velocity,
+                decomposition_matrix=basis_matrix,
+                stretching_matrix=stretch_matrix,
+            )
+
+        return modulated_velocities
+
     def modulate(
         self,
         velocity,
@@ -508,3 +601,41 @@ class SampledClusterAvoider:
 
         # vector_rot.rotation_angle = vector_rot.rotation_angle * weight
         return vector_rot.rotate(normal_direction, weight)
+
+    def limit_references_from_offset(
+        self,
+        normal_directions: np.ndarray,
+        reference_directions: np.ndarray,
+        max_angle: float = 0.45 * np.pi,
+    ) -> np.ndarray:
+        """Batched version of 'limit_reference_from_offset' for (unit) normals and
+        references of shape (dimension, n_obstacles)."""
+        ref_norms = LA.norm(reference_directions, axis=0)
+        ind_nonzero = ref_norms > 0
+
+        unit_references = np.copy(normal_directions)
+        unit_references[:, ind_nonzero] = (
+            reference_directions[:, ind_nonzero] / ref_norms[ind_nonzero]
+        )
+        weights = np.minimum(ref_norms / self.control_radius, 1)
+
+        # Rotate the normal towards the reference (within their common plane)
+        cos_angles = np.clip(
+            np.sum(normal_directions * unit_references, axis=0), -1, 1
+        )
+        rotation_angles = np.arccos(cos_angles)
+        ind_limit = rotation_angles > max_angle
+        rotation_angles[ind_limit] = (
+            (np.pi - rotation_angles[ind_limit]) / (math.pi - max_angle) * max_angle
+        )
+
+        perpendiculars = unit_references - cos_angles * normal_directions
+        perp_norms = LA.norm(perpendiculars, axis=0)
+        ind_rotate = perp_norms > 0
+        perpendiculars[:, ind_rotate] = (
+            perpendiculars[:, ind_rotate] / perp_norms[ind_rotate]
+        )
+        perpendiculars[:, ~ind_rotate] = 0
+
+        angles = rotation_angles * weights
+        return np.cos(angles) * normal_directions + np.sin(angles) * perpendiculars
@@ -44,6 +44,20 @@ class StretchingMatrixFunctor(ABC):
             ** self.power_weights
         )
 
+    def get_weight_vel_batch(
+        self, reference_dirs: np.ndarray, velocities: np.ndarray
+    ) -> np.ndarray:
+        """Returns velocity weights for directions and velocities of
+        shape (dimension, n_samples)."""
+        norm_prod = LA.norm(reference_dirs, axis=0) * LA.norm(velocities, axis=0)
+
+        dot_prod = np.sum(reference_dirs * velocities, axis=0)
+        ind_nonzero = norm_prod > 0
+        dot_prod[ind_nonzero] = dot_prod[ind_nonzero] / norm_prod[ind_nonzero]
+        dot_prod[~ind_nonzero] = 0
+
+        return np.maximum(0.0, dot_prod) ** self.power_weights
+
     def get_weight_importance(self, importance_variable):
         """Returns importance weight [0, infty] -> [1, 0]"""
         return np.minimum(1.0, 1.0 / importance_variable)
@@ -78,7 +92,26 @@ class StretchingMatrixFunctor(ABC):
         importance_variable (float): A weight equivalent which gives information on how 'close' we
             are to the obstacle
         """
+        lambda_ref, lambda_tang = self.get_lambdas(
+            importance_variable, reference_direction, normal_direction, initial_velocity
+        )
 
+        stretching_vector = np.hstack(
+            (lambda_ref, lambda_tang * np.ones(reference_direction.shape[0] - 1))
+        )
+
+        # breakpoint()
+        return np.diag(stretching_vector)
+
+    def get_lambdas(
+        self,
+        importance_variable: float,
+        reference_direction: np.ndarray,
+        normal_direction: np.ndarray = None,
+        initial_velocity: np.ndarray = None,
+    ) -> tuple[float, float]:
+        """Returns the eigenvalues (lambda_ref, lambda_tang) of the stretching matrix,
+        all tangent directions share the same eigenvalue."""
         if normal_direction is None:
             normal_direction = reference_direction
 
@@ -102,17 +135,90 @@ class StretchingMatrixFunctor(ABC):
                 w_velocity=weight_normvel,
             )
 
-        stretching_vector = np.hstack(
-            (lambda_ref, lambda_tang * np.ones(reference_direction.shape[0] - 1))
+        return lambda_ref, lambda_tang
+
+    def get_batch(
+        self,
+        importance_variables: np.ndarray,
+        reference_directions: np.ndarray,
+        normal_directions: np.ndarray = None,
+        initial_velocities: np.ndarray = None,
+    ) -> np.ndarray:
+        """Returns the diagonals of the stretching matrices stacked as array of shape
+        (dimension, n_samples) for arrays of importance variables (n_samples)
+        and directions / velocities of shape (dimension, n_samples)."""
+        lambdas_ref, lambdas_tang = self.get_lambdas_batch(
+            importance_variables,
+            reference_directions,
+            normal_directions,
+            initial_velocities,
         )
 
-        # breakpoint()
-        return np.diag(stretching_vector)
+        stretching_vectors = np.tile(lambdas_tang, (reference_directions.shape[0], 1))
+        stretching_vectors[0, :] = lambdas_ref
+        return stretching_vectors
+
+    def get_lambdas_batch(
+        self,
+        importance_variables: np.ndarray,
+        reference_directions: np.ndarray,
+        normal_directions: np.ndarray = None,
+        initial_velocities: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Batched version of 'get_lambdas', returns the arrays
+        (lambdas_ref, lambdas_tang) of shape (n_samples)."""
+        importance_variables = np.asarray(importance_variables, dtype=float)
+
+        if normal_directions is None:
+            normal_directions = reference_directions
+
+        weights_vel = self.get_weight_vel_batch(
+            reference_directions, initial_velocities
+        )
+        weights_importance = self.get_weight_importance(importance_variables)
+
+        lambdas_ref, lambdas_tang = self.get_lambda_weights_batch(
+            importance_variables, weights_vel
+        )
+
+        weights_normvel = np.maximum(
+            0, np.sum(normal_directions * initial_velocities, axis=0)
+        ) / LA.norm(initial_velocities, axis=0)
+
+        if self.free_tail_flow:
+            ind_free = weights_normvel > 0
+            weights_prod = weights_importance * weights_normvel
+
+            lambdas_tang_free = weights_prod + (1 - weights_prod) * lambdas_tang
+            lambdas_ref_free = (
+                weights_importance * lambdas_tang_free
+                + (1 - weights_importance) * lambdas_ref
+            )
+
+            # Both eigenvalues are equal in the free tail flow
+            lambdas_ref = np.where(ind_free, lambdas_ref_free, lambdas_ref)
+            lambdas_tang = np.where(ind_free, lambdas_ref_free, lambdas_tang)
+
+        return lambdas_ref, lambdas_tang
 
     @abstractmethod
     def get_lambda_weights(self, weight, weight_vel):
         pass
 
+    def get_lambda_weights_batch(
+        self, weights: np.ndarray, weights_vel: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the eigenvalues for arrays of weights. This default evaluates
+        'get_lambda_weights' element-wise, subclasses should vectorize it."""
+        lambdas = np.array(
+            [
+                self.get_lambda_weights(weight, weight_vel)
+                for weight, weight_vel in zip(weights, weights_vel)
+            ],
+            dtype=float,
+        ).reshape(-1, 2)
+        return lambdas[:, 0], lambdas[:, 1]
+
 
 class StretchingMatrixBasic(StretchingMatrixFunctor):
     def __init__(self, free_tail_flow: bool = True, pow_fact: float = 2):
@@ -153,6 +259,15 @@ class StretchingMatrixExponential(StretchingMatrixFunctor):
 
         return lambda_ref, lambda_tang
 
+    def get_lambda_weights_batch(self, weights, weights_vel):
+        lambdas_tang = np.exp((-1) * self.const_ref * weights**self.power_ref)
+        lambdas_ref = np.exp((-1) * np.log(2) * (weights**self.power_tang - 1)) - 1
+
+        ind_flip = np.logical_and(weights_vel < 0, weights > 1)
+        lambdas_ref[ind_flip] = (-1) * lambdas_ref[ind_flip]
+
+        return lambdas_ref, lambdas_tang
+
 
 class StretchingMatrixTrigonometric(StretchingMatrixFunctor):
     # weight_power = 1.0 / 4
@@ -184,3 +299,190 @@ class StretchingMatrixTrigonometric(StretchingMatrixFunctor):
             lambda_ref = (-1) * lambda_ref
 
         return lambda_ref, lambda_tang
+
+    def get_lambda_weights_batch(self, weights, weights_vel):
+        weights = np.asarray(weights, dtype=float) ** self.weight_power
+
+        # The maximum avoids a division by zero in the branch which is not selected
+        lambdas_tang = np.where(
+            weights < 1,
+            1 + np.sin(np.pi / 2 * weights),
+            2 * np.sin(np.pi / (2 * np.maximum(weights, 1))),
+        )
+        lambdas_ref = np.where(weights < 2, np.cos(np.pi / 2 * weights), -1.0)
+
+        ind_flip = np.logical_and(weights_vel < 0, weights > 1)
+        lambdas_ref[ind_flip] = (-1) * lambdas_ref[ind_flip]
+
+        return lambdas_ref, lambdas_tang
+
+
+class StretchingMatrixLUT(StretchingMatrixFunctor):
+    """Wraps a stretching functor and answers the eigenvalue queries by linear
+    interpolation of a table which is computed once at construction.
+
+    The table is uniform in ((importance - min) / (max - min)) ** (1 / grid_power),
+    i.e., it is denser for small importance values, where the lambda-functions
+    (with fractional powers) are the steepest.
+    The velocity weight only enters the lambda-functions through its sign, hence one
+    table is stored for each sign. Importance values outside of the tabulated range
+    are evaluated with the wrapped functor.
+
+    Attributes
+    ----------
+    functor: The wrapped stretching functor
+    importance_range (tuple): The (min, max) importance values of the table
+    estimated_interpolation_error (float): The largest error of the eigenvalues on
+        the (three, by default) equally spaced sample points within each table
+        interval. This is a sampled estimate and not an upper bound, hence the table
+        refinement to an error_tolerance is no guarantee for the error in between.
+    """
+
+    def __init__(
+        self,
+        functor: StretchingMatrixFunctor = None,
+        importance_range: tuple[float, float] = (0.0, 10.0),
+        n_points: int = 257,
+        grid_power: float = 2.0,
+        error_tolerance: float = None,
+        max_points: int = 2**20,
+    ) -> None:
+        if functor is None:
+            functor = StretchingMatrixTrigonometric()
+        self.functor = functor
+
+        if importance_range[1] <= importance_range[0]:
+            raise ValueError(f"Invalid importance range {importance_range}.")
+        self.importance_range = importance_range
+        self._importance_delta = importance_range[1] - importance_range[0]
+
+        self.grid_power = grid_power
+        self._inv_grid_power = 1.0 / grid_power
+
+        self.create_tables(n_points)
+        if error_tolerance is not None:
+            # Refine the table until the estimated interpolation error is small enough
+            while self.estimated_interpolation_error > error_tolerance:
+                if 2 * self.n_points - 1 > max_points:
+                    raise ValueError(
+                        f"Error tolerance {error_tolerance} not reached "
+                        + f"with {self.n_points} points."
+                    )
+                self.create_tables(2 * self.n_points - 1)
+
+    @property
+    def free_tail_flow(self) -> bool:
+        return self.functor.free_tail_flow
+
+    @free_tail_flow.setter
+    def free_tail_flow(self, value: bool) -> None:
+        self.functor.free_tail_flow = value
+
+    @property
+    def power_weights(self) -> float:
+        return self.functor.power_weights
+
+    @power_weights.setter
+    def power_weights(self, value: float) -> None:
+        self.functor.power_weights = value
+
+    @property
+    def n_points(self) -> int:
+        return self._tables[1].shape[0]
+
+    def _get_importance_values(self, grid_values: np.ndarray) -> np.ndarray:
+        return (
+            self.importance_range[0]
+            + self._importance_delta * grid_values**self.grid_power
+        )
+
+    def create_tables(self, n_points: int, n_checks: int = 3) -> None:
+        """Tabulate the eigenvalues (lambda_ref, lambda_tang) for each sign of
+        the velocity weight and estimate the interpolation error on n_checks
+        equally spaced points within each interval."""
+        grid_values = np.linspace(0, 1, n_points)
+        self._grid_scaling = n_points - 1
+
+        importance_values = self._get_importance_values(grid_values)
+
+        self._tables = {}
+        self.estimated_interpolation_error = 0.0
+        for sign in [-1, 0, 1]:
+            self._tables[sign] = self._evaluate_functor(importance_values, sign)
+
+            for frac in np.arange(1, n_checks + 1) / (n_checks + 1):
+                check_values = self._get_importance_values(
+                    grid_values[:-1] + frac / self._grid_scaling
+                )
+                interpolated = (1 - frac) * self._tables[sign][:-1] + frac * (
+                    self._tables[sign][1:]
+                )
+                error = np.max(
+                    np.abs(self._evaluate_functor(check_values, sign) - interpolated)
+                )
+                self.estimated_interpolation_error = max(
+                    self.estimated_interpolation_error, error
+                )
+
+        # Python lists make the lookup of single values faster
+        self._table_lists = {
+            sign: table.tolist() for sign, table in self._tables.items()
+        }
+
+    def _evaluate_functor(self, weights: np.ndarray, sign: int) -> np.ndarray:
+        return np.array(
+            [self.functor.get_lambda_weights(ww, sign) for ww in weights], dtype=float
+        )
+
+    def get_lambda_weights(self, weight, weight_vel):
+        if not (self.importance_range[0] <= weight <= self.importance_range[1]):
+            return self.functor.get_lambda_weights(weight, weight_vel)
+
+        table = self._table_lists[int(weight_vel > 0) - int(weight_vel < 0)]
+
+        position = (
+            float(weight - self.importance_range[0]) / self._importance_delta
+        ) ** self._inv_grid_power * self._grid_scaling
+        ind = min(int(position), self._grid_scaling - 1)
+        frac = position - ind
+
+        ref_low, tang_low = table[ind]
+        ref_high, tang_high = table[ind + 1]
+        return (
+            ref_low + frac * (ref_high - ref_low),
+            tang_low + frac * (tang_high - tang_low),
+        )
+
+    def get_lambda_weights_batch(self, weights, weights_vel):
+        weights = np.asarray(weights, dtype=float)
+        signs = np.sign(weights_vel).astype(int)
+
+        ind_outside = np.logical_or(
+            weights < self.importance_range[0], weights > self.importance_range[1]
+        )
+
+        relative_weights = (weights - self.importance_range[0]) / self._importance_delta
+        position = (
+            np.clip(relative_weights, 0, 1) ** self._inv_grid_power * self._grid_scaling
+        )
+        ind = np.minimum(position.astype(int), self._grid_scaling - 1)
+        frac = (position - ind)[:, np.newaxis]
+
+        lambdas = np.zeros((weights.shape[0], 2))
+        for sign, table in self._tables.items():
+            ind_sign = signs == sign
+            if not np.any(ind_sign):
+                continue
+
+            ind_low = ind[ind_sign]
+            lambdas[ind_sign, :] = table[ind_low, :] + frac[ind_sign] * (
+                table[ind_low + 1, :] - table[ind_low, :]
+            )
+
+        # Outside of the table
+        for it in np.flatnonzero(ind_outside):
+            lambdas[it, :] = self.functor.get_lambda_weights(
+                weights[it], weights_vel[it]
+            )
+
+        return lambdas[:, 0], lambdas[:, 1]
@@ -0,0 +1,251 @@
+"""
+Rasterized sampling container, i.e., the environment is evaluated on a signed
+distance field (SDF) which is computed once and can be cached on disk.
+"""
+# Created: 2026-10-17
+
+from __future__ import annotations
+
+import hashlib
+import os
+
+import numpy as np
+from numpy import linalg as LA
+
+from scipy import ndimage
+
+import shapely
+
+from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
+
+
+class RasterizedSamplingContainer(ShapelySamplingContainer):
+    """Sampling container which rasterizes the obstacles into an occupancy grid and a
+    signed distance field (SDF) with the given resolution.
+
+    The virtual laserscans are sphere traced on the SDF, and `is_inside` is a lookup
+    of the grid, hence the occupancy is accurate up to about the resolution. The hit
+    distances are not: a ray which passes within about one cell of a surface
+    registers a hit there, i.e., grazing rays can be much shorter than the exact
+    ones. With a margin, `is_inside` falls back to the exact check of the
+    obstacles, to keep the meaning of the margin of the base container. The raster is
+    (re-)computed lazily when the obstacles have changed. If a `cache_dir` is given,
+    it is stored there (keyed by the hash of the environment) and loaded as
+    memory map, such that it can be shared by many runs in the same environment.
+
+    Attributes
+    ----------
+    resolution (float): Edge length of the grid cells
+    padding (float): Free space around the bounds of the obstacles on the grid
+    cache_dir (str): Directory of the cached SDF, no caching if None
+    """
+
+    def __init__(
+        self,
+        environment=None,
+        n_samples=10,
+        resolution: float = 0.05,
+        padding: float = None,
+        cache_dir: str = None,
+    ):
+        super().__init__(environment=environment, n_samples=n_samples)
+
+        self.resolution = resolution
+        if padding is None:
+            padding = 2 * resolution
+        self.padding = padding
+        self.cache_dir = cache_dir
+
+        self._signed_distances = None
+
+    @classmethod
+    def from_container(
+        cls, container: ShapelySamplingContainer, **kwargs
+    ) -> RasterizedSamplingContainer:
+        """Rasterizes the obstacles of an existing (shapely) container, note that the
+        obstacles are shared."""
+        return cls(
+            environment=container.environment, n_samples=container.n_samples, **kwargs
+        )
+
+    def reset_tree(self) -> None:
+        super().reset_tree()
+        self._signed_distances = None
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        """Occupancy grid of shape (n_x, n_y), where the cell [0, 0] has its lower
+        corner at the `grid_origin`."""
+        return self.get_signed_distances() < 0
+
+    @property
+    def grid_origin(self) -> np.ndarray:
+        self.get_signed_distances()
+        return self._grid_origin
+
+    def get_environment_hash(self) -> str:
+        """Returns the hash of the obstacle geometries and the raster parameters."""
+        hasher = hashlib.sha1()
+        for obs in self.environment:
+            hasher.update(shapely.to_wkb(obs.geometry))
+            hasher.update(bytes([obs.is_boundary]))
+        hasher.update(np.array([self.resolution, self.padding], dtype=float).tobytes())
+        return hasher.hexdigest()
+
+    def get_signed_distances(self) -> np.ndarray:
+        """Returns the SDF of shape (n_x, n_y) at the centers of the grid cells, it is
+        positive in free space and negative inside of the obstacles."""
+        if self._signed_distances is not None and self._tree_size == len(
+            self.environment
+        ):
+            return self._signed_distances
+
+        self.get_tree()
+        self._grid_origin = self._total_bounds[0, :] - self.padding
+        n_cells = np.ceil(
+            (self._total_bounds[1, :] + self.padding - self._grid_origin)
+            / self.resolution
+        ).astype(int)
+
+        # Everything around the grid is either free or outside of a boundary
+        self._is_outside_occupied = super().is_inside_batch(
+            np.reshape(self._grid_origin - self.padding, (self.dimension, 1))
+        )[0]
+
+        if self.cache_dir is None:
+            self._signed_distances = self.rasterize(n_cells)
+            return self._signed_distances
+
+        cache_file = os.path.join(self.cache_dir, self.get_environment_hash() + ".npy")
+        if not os.path.isfile(cache_file):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            # Atomic, since the cache might be shared by parallel runs
+            temp_file = f"{cache_file[:-4]}.{os.getpid()}.tmp.npy"
+            np.save(temp_file, self.rasterize(n_cells))
+            os.replace(temp_file, cache_file)
+
+        self._signed_distances = np.load(cache_file, mmap_mode="r")
+        return self._signed_distances
+
+    def rasterize(self, n_cells: np.ndarray) -> np.ndarray:
+        """Evaluates the occupancy at the cell centers, and returns the SDF."""
+        cell_centers = [
+            self._grid_origin[dd] + (np.arange(n_cells[dd]) + 0.5) * self.resolution
+            for dd in range(self.dimension)
+        ]
+        positions = np.vstack(
+            [cc.flatten() for cc in np.meshgrid(*cell_centers, indexing="ij")]
+        )
+        occupancy = super().is_inside_batch(positions).reshape(n_cells)
+
+        if not np.any(occupancy):
+            return np.full(n_cells, np.inf, dtype=np.float32)
+
+        # Distance between the cell centers, shifted to the (approximate) surface
+        signed_distances = np.where(
+            occupancy,
+            0.5 - ndimage.distance_transform_edt(occupancy),
+            ndimage.distance_transform_edt(~occupancy) - 0.5,
+        )
+        return (signed_distances * self.resolution).astype(np.float32)
+
+    def get_grid_distances(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the signed distance (n_positions) of the grid cell of each of the
+        positions (dimension, n_positions)."""
+        signed_distances = self.get_signed_distances()
+        grid_size = np.reshape(signed_distances.shape, (self.dimension, 1))
+
+        ind_cells = np.floor(
+            (positions - self._grid_origin[:, np.newaxis]) / self.resolution
+        ).astype(int)
+        is_on_grid = np.all(
+            np.logical_and(ind_cells >= 0, ind_cells < grid_size), axis=0
+        )
+
+        # Outside of the grid, the obstacles are at least as far as the grid
+        dist_grid = LA.norm(
+            np.maximum(
+                0,
+                np.maximum(
+                    self._grid_origin[:, np.newaxis] - positions,
+                    positions
+                    - self._grid_origin[:, np.newaxis]
+                    - grid_size * self.resolution,
+                ),
+            ),
+            axis=0,
+        )
+        distances = dist_grid + self.padding
+        if self._is_outside_occupied:
+            distances = (-1) * distances
+
+        distances[is_on_grid] = signed_distances[tuple(ind_cells[:, is_on_grid])]
+        return distances
+
+    def is_inside_batch(self, positions: np.ndarray, margin: float = 0) -> np.ndarray:
+        """Returns the mask of the positions (dimension, n_positions) which are
+        inside of any of the obstacles (or outside of a boundary) from the grid.
+
+        With a margin, the positions are moved along the margin (as in the base
+        container), which is evaluated on the obstacles and not on the grid."""
+        positions = np.array(positions, dtype=float).reshape(self.dimension, -1)
+        if not len(self.environment):
+            return np.zeros(positions.shape[1], dtype=bool)
+
+        if margin:
+            return super().is_inside_batch(positions, margin=margin)
+
+        return self.get_grid_distances(positions) < 0
+
+    def get_surface_distances(
+        self, positions: np.ndarray, directions: np.ndarray, dist_max: float = 1e3
+    ) -> np.ndarray:
+        """Returns the distances (n_positions, n_rays) to the closest surface point
+        along the rays, zero if the position is within an obstacle and np.inf if
+        there is no hit."""
+        n_positions = positions.shape[1]
+        distances = np.full((n_positions, directions.shape[1]), np.inf)
+        if not len(self.environment):
+            return distances
+
+        self.get_signed_distances()
+
+        # No hit is further away than the furthest corner of the grid
+        grid_corners = np.vstack(
+            (
+                self._grid_origin,
+                self._grid_origin
+                + np.array(self._signed_distances.shape) * self.resolution,
+            )
+        )
+        dist_corners = np.maximum(
+            np.abs(positions - grid_corners[0, :, np.newaxis]),
+            np.abs(positions - grid_corners[1, :, np.newaxis]),
+        )
+        ray_length = min(dist_max, np.max(LA.norm(dist_corners, axis=0)))
+
+        # Sphere tracing of all rays at once, the steps are reduced by the error of
+        # the SDF (a cell), such that they don't jump over the surface
+        ind_positions, ind_rays = np.divmod(
+            np.arange(distances.size), directions.shape[1]
+        )
+        ray_distances = np.zeros(distances.size)
+        ind_active = np.arange(distances.size)
+        while ind_active.shape[0]:
+            grid_distances = self.get_grid_distances(
+                positions[:, ind_positions[ind_active]]
+                + directions[:, ind_rays[ind_active]] * ray_distances[ind_active]
+            )
+
+            is_hit = grid_distances < 0
+            distances.flat[ind_active[is_hit]] = ray_distances[ind_active[is_hit]]
+
+            ray_distances[ind_active] += np.maximum(
+                grid_distances - self.resolution, 0.5 * self.resolution
+            )
+            ind_active = ind_active[
+                np.logical_and(~is_hit, ray_distances[ind_active] <= ray_length)
+            ]
+
+        return distances
@@ -3,6 +3,8 @@
 # Created: 2021-12-14
 # Email: lukas.huber@epfl.ch
 
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 
 import math
@@ -56,6 +58,64 @@ def visualize_obstacles(container, ax=None, x_lim=None, y_lim=None):
     return ax
 
 
+def get_ray_segment_distances(
+    positions: np.ndarray,
+    directions: np.ndarray,
+    segment_starts: np.ndarray,
+    segment_ends: np.ndarray,
+) -> np.ndarray:
+    """Returns the distances of shape (n_positions, n_rays, n_segments) along the
+    (unit) directions (dimension, n_rays) from the positions (dimension, n_positions)
+    to the segments (dimension, n_segments), or np.inf if the segment is missed.
+
+    The end point of a segment is excluded, such that a ray through a vertex of a
+    polygon only crosses it once."""
+    segment_vectors = segment_ends - segment_starts
+    rel_starts = segment_starts[:, np.newaxis, :] - positions[:, :, np.newaxis]
+
+    # Two dimensional cross products
+    denominators = np.outer(directions[0, :], segment_vectors[1, :]) - np.outer(
+        directions[1, :], segment_vectors[0, :]
+    )
+    cross_starts = (
+        rel_starts[0, :, :] * segment_vectors[1, :]
+        - rel_starts[1, :, :] * segment_vectors[0, :]
+    )
+    cross_directions = (
+        rel_starts[0, :, np.newaxis, :] * directions[1, np.newaxis, :, np.newaxis]
+        - rel_starts[1, :, np.newaxis, :] * directions[0, np.newaxis, :, np.newaxis]
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = cross_starts[:, np.newaxis, :] / denominators
+        segment_fractions = cross_directions / denominators
+
+    is_hit = np.logical_and(distances >= 0, denominators != 0)
+    is_hit = np.logical_and(is_hit, segment_fractions >= 0)
+    is_hit = np.logical_and(is_hit, segment_fractions < 1)
+    return np.where(is_hit, distances, np.inf)
+
+
+def get_local_rays(
+    positions: np.ndarray,
+    directions: np.ndarray,
+    center_position: np.ndarray,
+    orientation: float,
+    scaling: np.ndarray = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Transforms the positions (dimension, n_positions) and the directions
+    (dimension, n_rays) to the (scaled) frame of an obstacle."""
+    cos_, sin_ = math.cos(orientation), math.sin(orientation)
+    rotation = np.array([[cos_, sin_], [-sin_, cos_]])
+
+    local_positions = rotation @ (positions - np.reshape(center_position, (-1, 1)))
+    local_directions = rotation @ directions
+    if scaling is not None:
+        local_positions = local_positions / np.reshape(scaling, (-1, 1))
+        local_directions = local_directions / np.reshape(scaling, (-1, 1))
+    return local_positions, local_directions
+
+
 class SampledObstacle(ABC):
     """Sampled Obstacle Wrapper which allows for additional properties and
     custom construction."""
@@ -64,6 +124,12 @@ class SampledObstacle(ABC):
         self.geometry = geometry
         self.is_boundary = is_boundary
 
+        # Edge table and center of the (last) geometry, they are shared by all queries
+        self._edges_geometry = None
+        self._edges = None
+        self._center_geometry = None
+        self._center_position = None
+
     @property
     def obstacle(self):
         return self.geometry
@@ -82,8 +148,123 @@ class SampledObstacle(ABC):
     def contains(self, shapely_point):
         return self.geometry.contains(shapely_point)
 
+    def get_center_position(self) -> np.ndarray:
+        """Returns geometric center of all surface points."""
+        if self._center_geometry is not self.geometry:
+            # TODO: maybe checkout the 'kernel' property of shapelies
+            self._center_position = np.mean(self.exterior.xy, axis=1)
+            self._center_geometry = self.geometry
+        return self._center_position
+
+    def contains_positions(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the mask of the positions (dimension, n_positions) which are
+        inside of the geometry."""
+        # Prepared geometries are evaluated faster, it's done once per geometry
+        shapely.prepare(self.geometry)
+        return shapely.contains_xy(self.geometry, positions[0, :], positions[1, :])
+
+    def get_edges(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the start and end points (dimension, n_edges) of the edges of
+        all rings of the geometry."""
+        if self._edges_geometry is self.geometry:
+            return self._edges
+
+        segment_starts = []
+        segment_ends = []
+        for polygon in getattr(self.geometry, "geoms", [self.geometry]):
+            for ring in [polygon.exterior, *polygon.interiors]:
+                coords = np.array(ring.coords).T
+                segment_starts.append(coords[:, :-1])
+                segment_ends.append(coords[:, 1:])
+
+        self._edges = (np.hstack(segment_starts), np.hstack(segment_ends))
+        self._edges_geometry = self.geometry
+        return self._edges
+
+    def get_ray_crossings(
+        self, positions: np.ndarray, directions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the two closest (non-negative) distances at which the rays cross
+        the surface as array of shape (n_positions, n_rays, 2) - or np.inf -
+        and the mask of the positions which are inside of the geometry."""
+        distances = get_ray_segment_distances(positions, directions, *self.get_edges())
+        if distances.shape[2] > 2:
+            distances = np.partition(distances, 1, axis=2)[:, :, :2]
+
+        return np.sort(distances, axis=2), self.contains_positions(positions)
+
+    def get_ray_distances(
+        self, positions: np.ndarray, directions: np.ndarray, dist_max: float = np.inf
+    ) -> np.ndarray:
+        """Returns the distance (n_positions, n_rays) to the sampled surface point,
+        i.e., the entry into the obstacle or the exit of a boundary. It is zero if
+        the position is inside of the obstacle and np.inf if there is no hit."""
+        crossings, is_inside = self.get_ray_crossings(positions, directions)
+        is_inside = is_inside[:, np.newaxis]
+
+        if not self.is_boundary:
+            distances = np.where(is_inside, 0, crossings[:, :, 0])
+            distances[distances > dist_max] = np.inf
+            return distances
+
+        # The (first) part of the ray within the boundary ends at the surface point
+        distances = np.where(is_inside, crossings[:, :, 0], crossings[:, :, 1])
+        is_entering = np.logical_or(is_inside, crossings[:, :, 0] <= dist_max)
+        return np.where(is_entering, np.minimum(distances, dist_max), np.inf)
+
 
 class SampledEllipse(SampledObstacle):
+    """Ellipse, the rays are intersected analytically if the center, axes and
+    orientation are given (otherwise with the edges of the polygon)."""
+
+    def __init__(
+        self,
+        geometry,
+        is_boundary=False,
+        center_position: np.ndarray = None,
+        axes_length: np.ndarray = None,
+        orientation: float = 0.0,
+    ):
+        super().__init__(geometry=geometry, is_boundary=is_boundary)
+
+        self.center_position = center_position
+        self.axes_length = axes_length
+        self.orientation = orientation
+
+    def get_ray_crossings(
+        self, positions: np.ndarray, directions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.axes_length is None:
+            return super().get_ray_crossings(positions, directions)
+
+        local_positions, local_directions = get_local_rays(
+            positions,
+            directions,
+            self.center_position,
+            self.orientation,
+            scaling=0.5 * np.array(self.axes_length),
+        )
+
+        # Roots of |p + t * d| = 1 (in the scaled frame)
+        coeff_a = np.sum(local_directions * local_directions, axis=0)
+        coeff_b = 2 * local_positions.T @ local_directions
+        coeff_c = np.sum(local_positions * local_positions, axis=0)[:, np.newaxis] - 1
+        discriminants = coeff_b * coeff_b - 4 * coeff_a * coeff_c
+
+        is_hit = discriminants >= 0
+        sqrt_discriminants = np.sqrt(np.where(is_hit, discriminants, 0))
+        entries = np.where(
+            is_hit, (-coeff_b - sqrt_discriminants) / (2 * coeff_a), -np.inf
+        )
+        exits = np.where(is_hit, (-coeff_b + sqrt_discriminants) / (2 * coeff_a), -1)
+
+        crossings = np.full(entries.shape + (2,), np.inf)
+        crossings[:, :, 0] = np.where(
+            entries >= 0, entries, np.where(exits >= 0, exits, np.inf)
+        )
+        crossings[:, :, 1] = np.where(entries >= 0, exits, np.inf)
+        return crossings, coeff_c[:, 0] < 0
+
     @classmethod
     def from_obstacle(
         cls,
@@ -112,10 +293,69 @@ class SampledEllipse(SampledObstacle):
 
         ellipse = shapely.affinity.rotate(ellipse, orientation_in_degree)
 
-        return cls(geometry=ellipse, **kwargs)
+        return cls(
+            geometry=ellipse,
+            center_position=np.array(position[:2], dtype=float),
+            axes_length=np.array(axes_length, dtype=float),
+            orientation=orientation_in_degree * math.pi / 180,
+            **kwargs,
+        )
 
 
 class SampledCuboid(SampledObstacle):
+    """Rectangle, the rays are intersected analytically if the center, axes and
+    orientation are given (otherwise with the edges of the polygon)."""
+
+    def __init__(
+        self,
+        geometry,
+        is_boundary=False,
+        center_position: np.ndarray = None,
+        axes_length: np.ndarray = None,
+        orientation: float = 0.0,
+    ):
+        super().__init__(geometry=geometry, is_boundary=is_boundary)
+
+        self.center_position = center_position
+        self.axes_length = axes_length
+        self.orientation = orientation
+
+    def get_ray_crossings(
+        self, positions: np.ndarray, directions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.axes_length is None:
+            return super().get_ray_crossings(positions, directions)
+
+        local_positions, local_directions = get_local_rays(
+            positions, directions, self.center_position, self.orientation
+        )
+        semiaxes = 0.5 * np.reshape(self.axes_length, (-1, 1, 1))
+
+        # Slab method, i.e., the intervals within each pair of parallel faces
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slab_low = (
+                (-1) * semiaxes - local_positions[:, :, np.newaxis]
+            ) / local_directions[:, np.newaxis, :]
+            slab_high = (
+                semiaxes - local_positions[:, :, np.newaxis]
+            ) / local_directions[:, np.newaxis, :]
+
+        # Rays on the face (nan) don't restrict the interval
+        entries = np.nanmax(np.fmin(slab_low, slab_high), axis=0)
+        exits = np.nanmin(np.fmax(slab_low, slab_high), axis=0)
+
+        is_hit = np.logical_and(entries <= exits, exits >= 0)
+        is_entering = np.logical_and(is_hit, entries >= 0)
+
+        crossings = np.full(entries.shape + (2,), np.inf)
+        crossings[:, :, 0] = np.where(
+            is_entering, entries, np.where(is_hit, exits, np.inf)
+        )
+        crossings[:, :, 1] = np.where(is_entering, exits, np.inf)
+
+        is_inside = np.all(np.abs(local_positions) < semiaxes[:, :, 0], axis=0)
+        return crossings, is_inside
+
     @classmethod
     def from_obstacle(
         cls,
@@ -147,7 +387,13 @@ class SampledCuboid(SampledObstacle):
             orientation_in_degree = orientation * 180 / math.pi
 
         cuboid = shapely.affinity.rotate(cuboid, orientation_in_degree)
-        return cls(geometry=cuboid, **kwargs)
+        return cls(
+            geometry=cuboid,
+            center_position=np.array(position[:2], dtype=float),
+            axes_length=np.array(axes_length, dtype=float),
+            orientation=orientation_in_degree * math.pi / 180,
+            **kwargs,
+        )
 
 
 class SampledSphere(SampledObstacle):
@@ -164,6 +410,9 @@ class ShapelySamplingContainer:
     # Only implemented for two dimensional case
     dimension = 2
 
+    # Maximum number of rays (positions x samples) which are cast at once
+    max_batch_rays = 2**16
+
     def __init__(self, environment=None, n_samples=10):
         if environment is None:
             self.environment = []
@@ -172,53 +421,129 @@ class ShapelySamplingContainer:
 
         self.n_samples = n_samples
 
+        # Broad phase, it's (re-)built lazily when the obstacles have changed
+        self._tree = None
+        self._tree_size = 0
+        self._boundary_indices = np.zeros(0, dtype=int)
+        self._total_bounds = None
+        self._shell_radius = 1.0
+
+    def get_tree(self) -> shapely.STRtree:
+        """Returns the R-tree of the bounding boxes of the obstacle geometries."""
+        if self._tree is None or self._tree_size != len(self.environment):
+            self._tree = shapely.STRtree([obs.geometry for obs in self.environment])
+            self._tree_size = len(self.environment)
+
+            # The search starts at the size of a (typical) obstacle
+            self._shell_radius = 1.0
+            if len(self.environment):
+                self._total_bounds = np.reshape(
+                    shapely.total_bounds(self._tree.geometries), (2, self.dimension)
+                )
+                bounds = shapely.bounds(self._tree.geometries)
+                self._shell_radius = np.median(
+                    np.max(
+                        bounds[:, self.dimension :] - bounds[:, : self.dimension],
+                        axis=1,
+                    )
+                )
+            self._boundary_indices = np.array(
+                [ii for ii, obs in enumerate(self.environment) if obs.is_boundary],
+                dtype=int,
+            )
+        return self._tree
+
+    def reset_tree(self) -> None:
+        """Marks the broad phase as outdated, e.g., after an obstacle was moved."""
+        self._tree = None
+
     def get_center_position(self, ii):
         """Returns geometric center of all surface points."""
-        # TODO: maybe checkout the 'kernel' property of shapelies
-        xy_vals = self.environment[ii].exterior.xy
-        return np.mean(xy_vals, axis=1)
+        return self.environment[ii].get_center_position()
 
     def is_inside(self, position, margin=0):
         """Checks if the position is inside any of the obstacles."""
-        if not margin:
-            point = shapely.geometry.Point(position)
+        return self.is_inside_batch(
+            np.reshape(position, (self.dimension, 1)), margin=margin
+        )[0]
+
+    def is_inside_batch(self, positions: np.ndarray, margin: float = 0) -> np.ndarray:
+        """Returns the mask of the positions (dimension, n_positions) which are
+        inside of any of the obstacles (or outside of a boundary).
+
+        With a margin, the positions are moved along the margin towards the center
+        of the obstacle (away from the center of a boundary) before the check."""
+        positions = np.array(positions, dtype=float).reshape(self.dimension, -1)
+        is_inside = np.zeros(positions.shape[1], dtype=bool)
+        if not len(self.environment):
+            return is_inside
+
+        # Only the obstacles within the margin (and the boundaries) can contain them
+        ind_positions, ind_obstacles = self.get_tree().query(
+            shapely.box(
+                positions[0, :] - margin,
+                positions[1, :] - margin,
+                positions[0, :] + margin,
+                positions[1, :] + margin,
+            )
+        )
+        is_boundary = np.isin(ind_obstacles, self._boundary_indices)
+        ind_positions = np.hstack(
+            (
+                ind_positions[~is_boundary],
+                np.tile(np.arange(positions.shape[1]), self._boundary_indices.shape[0]),
+            )
+        )
+        ind_obstacles = np.hstack(
+            (
+                ind_obstacles[~is_boundary],
+                np.repeat(self._boundary_indices, positions.shape[1]),
+            )
+        )
 
-        for ii, obs in enumerate(self.environment):
+        ind_sort = np.argsort(ind_obstacles, kind="stable")
+        obstacles, ind_start = np.unique(ind_obstacles[ind_sort], return_index=True)
+        for ii, ind_pos in zip(obstacles, np.split(ind_sort, ind_start[1:])):
+            ind_pos = ind_positions[ind_pos]
+            obs = self.environment[ii]
+
+            temp_positions = positions[:, ind_pos]
             if margin:
-                # Move the point along the margin
-                center_position = self.get_center_position(ii)
-                rel_pos = center_position - position
+                # Move the points along the margin
+                rel_pos = self.get_center_position(ii)[:, np.newaxis] - temp_positions
+                rel_pos_norm = LA.norm(rel_pos, axis=0)
 
-                rel_pos_norm = LA.norm(rel_pos)
-                if rel_pos_norm <= margin:
-                    return True
+                is_close = rel_pos_norm <= margin
+                is_inside[ind_pos[is_close]] = True
 
+                rel_pos = rel_pos[:, ~is_close] / rel_pos_norm[~is_close] * margin
+                ind_pos = ind_pos[~is_close]
                 if obs.is_boundary:
-                    temp_pos = position - rel_pos / LA.norm(rel_pos) * margin
+                    temp_positions = temp_positions[:, ~is_close] - rel_pos
                 else:
-                    temp_pos = position + rel_pos / LA.norm(rel_pos) * margin
-                point = shapely.geometry.Point(temp_pos)
+                    temp_positions = temp_positions[:, ~is_close] + rel_pos
 
-            if obs.contains(point) != obs.is_boundary:
-                # Inside and not boundary
-                # OR outside and and boundary
-                return True
+            # Inside and not boundary OR outside and and boundary
+            is_inside[ind_pos] |= obs.contains_positions(temp_positions) != (
+                obs.is_boundary
+            )
 
-        return False
+        return is_inside
 
     def __len__(self):
         return len(self.environment)
 
     def add_obstacle(self, obstacle: SampledObstacle):
         self.environment.append(obstacle)
+        self.reset_tree()
 
     def create_ellipse(self, geometry=None, is_boundary=False, **kwargs):
         if geometry is None:
-            self.environment.append(
+            self.add_obstacle(
                 SampledEllipse.from_obstacle(is_boundary=is_boundary, **kwargs)
             )
         else:
-            self.environment.append(
+            self.add_obstacle(
                 SampledEllipse(geometry=geometry, is_boundary=is_boundary)
             )
 
@@ -226,11 +551,11 @@ class ShapelySamplingContainer:
 
     def create_sphere(self, geometry=None, is_boundary=False, **kwargs):
         if geometry is None:
-            self.environment.append(
+            self.add_obstacle(
                 SampledEllipse.from_obstacle(is_boundary=is_boundary, **kwargs)
             )
         else:
-            self.environment.append(
+            self.add_obstacle(
                 SampledEllipse(geometry=geometry, is_boundary=is_boundary)
             )
 
@@ -238,54 +563,140 @@ class ShapelySamplingContainer:
 
     def create_cuboid(self, geometry=None, is_boundary=False, **kwargs):
         if geometry is None:
-            self.environment.append(
+            self.add_obstacle(
                 SampledCuboid.from_obstacle(is_boundary=is_boundary, **kwargs)
             )
         else:
-            self.environment.append(
-                SampledCuboid(geometry=geometry, is_boundary=is_boundary)
-            )
-
-    def get_surface_points(
-        self, center_position, n_samples=None, null_direction=None, dist_max=1e3
-    ):
-        if not n_samples:
-            n_samples = self.n_samples
-
-        sample_points = np.zeros((self.dimension, n_samples))
-        sample_dist = np.ones(n_samples) * (-1)
+            self.add_obstacle(SampledCuboid(geometry=geometry, is_boundary=is_boundary))
 
+    def get_ray_directions(self, n_samples: int, null_direction=None) -> np.ndarray:
+        """Returns the (unit) directions of shape (dimension, n_samples) of the
+        equally spaced rays."""
         angles = np.linspace(0, 2 * np.pi, n_samples, endpoint=False)
         if null_direction is not None:
             angles = angles + np.arctan2(null_direction[1], null_direction[0])
 
-        for ii in range(n_samples):
-            direction = np.array([np.cos(angles[ii]), np.sin(angles[ii])])
-            shapely_line = shapely.geometry.LineString(
-                [center_position, center_position + direction * dist_max]
+        return np.vstack((np.cos(angles), np.sin(angles)))
+
+    def get_surface_distances(
+        self, positions: np.ndarray, directions: np.ndarray, dist_max: float = 1e3
+    ) -> np.ndarray:
+        """Returns the distances (n_positions, n_rays) to the closest sampled surface
+        point of all obstacles, zero if the position is within an obstacle and
+        np.inf if there is no hit."""
+        distances = np.full((positions.shape[1], directions.shape[1]), np.inf)
+        if not len(self.environment):
+            return distances
+
+        tree = self.get_tree()
+
+        # No hit is further away than the furthest corner of the obstacle bounds
+        dist_corners = np.maximum(
+            np.abs(positions - self._total_bounds[0, :, np.newaxis]),
+            np.abs(positions - self._total_bounds[1, :, np.newaxis]),
+        )
+        ray_length = min(dist_max, np.max(LA.norm(dist_corners, axis=0)))
+
+        # Broad phase from front to back: the obstacles within a growing square
+        # around each position are evaluated, until all of its rays have a hit
+        # within the square (the obstacles outside can not be closer)
+        is_open = np.ones(positions.shape[1], dtype=bool)
+        is_checked = np.zeros((positions.shape[1], len(self.environment)), dtype=bool)
+        radius = self._shell_radius
+        while True:
+            ind_open = np.flatnonzero(is_open)
+            ind_query, ind_obstacles = tree.query(
+                shapely.box(
+                    positions[0, ind_open] - radius,
+                    positions[1, ind_open] - radius,
+                    positions[0, ind_open] + radius,
+                    positions[1, ind_open] + radius,
+                )
             )
+            ind_positions = ind_open[ind_query]
+            is_new = ~is_checked[ind_positions, ind_obstacles]
+            ind_positions = ind_positions[is_new]
+            ind_obstacles = ind_obstacles[is_new]
+            is_checked[ind_positions, ind_obstacles] = True
+
+            # Narrow phase for all new (position, obstacle) pairs
+            ind_sort = np.argsort(ind_obstacles, kind="stable")
+            obstacles, ind_start = np.unique(ind_obstacles[ind_sort], return_index=True)
+            for ii, ind_pos in zip(obstacles, np.split(ind_sort, ind_start[1:])):
+                ind_pos = ind_positions[ind_pos]
+                distances[ind_pos, :] = np.minimum(
+                    distances[ind_pos, :],
+                    self.environment[ii].get_ray_distances(
+                        positions[:, ind_pos], directions, dist_max
+                    ),
+                )
+
+            if radius >= ray_length:
+                break
+
+            is_open[ind_open] = np.any(distances[ind_open, :] > radius, axis=1)
+            if not np.any(is_open):
+                break
+            radius = 2 * radius
+
+        return distances
+
+    def get_surface_points_batch(
+        self, center_positions, n_samples=None, null_direction=None, dist_max=1e3
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the surface points of the virtual laserscans at all center
+        positions (dimension, n_positions).
+
+        Returns
+        -------
+        surface_points: Array of shape (n_positions, dimension, n_samples), the rays
+            without any hit are np.nan
+        is_valid: Mask of the hits of shape (n_positions, n_samples), such that
+            `surface_points[ii][:, is_valid[ii]]` equals `get_surface_points`
+        """
+        if not n_samples:
+            n_samples = self.n_samples
 
-            for obs in self.environment:
-                intersection_line = list(obs.intersection(shapely_line).coords)
+        center_positions = np.array(center_positions, dtype=float).reshape(
+            self.dimension, -1
+        )
+        n_positions = center_positions.shape[1]
+        directions = self.get_ray_directions(n_samples, null_direction)
+
+        sample_dist = np.zeros((n_positions, n_samples))
+        batch_size = max(1, self.max_batch_rays // n_samples)
+        for it in range(0, n_positions, batch_size):
+            sample_dist[it : it + batch_size, :] = self.get_surface_distances(
+                center_positions[:, it : it + batch_size], directions, dist_max
+            )
 
-                if len(intersection_line):
-                    # TODO: if sure, this could be done with only the closest...
-                    # dists = LA.norm(np.array(intersection_line)
-                    # - np.tile(center_position, (len(intersection_line), 1)),
-                    # axis=1)
-                    # min_dist = min(dists)
-                    # breakpoint()
-                    # sample_list[:, ii] = min(sample_list[:, ii], min_dist)
+        is_valid = np.logical_and(np.isfinite(sample_dist), sample_dist > 0)
+        sample_dist[~is_valid] = np.nan
 
-                    if obs.is_boundary:
-                        surface_point = np.array(intersection_line[1])
-                    else:
-                        surface_point = np.array(intersection_line[0])
+        surface_points = (
+            center_positions.T[:, :, np.newaxis]
+            + directions[np.newaxis, :, :] * sample_dist[:, np.newaxis, :]
+        )
+        return surface_points, is_valid
 
-                    min_dist = LA.norm(surface_point - center_position)
+    def get_surface_points(
+        self, center_position, n_samples=None, null_direction=None, dist_max=1e3
+    ):
+        """Returns the surface points (dimension, n_points) of a virtual laserscan
+        with n_samples rays. Rays without any hit are omitted, and all of them if
+        the center is inside of an obstacle."""
+        if not n_samples:
+            n_samples = self.n_samples
+
+        center_position = np.array(center_position, dtype=float)
+        directions = self.get_ray_directions(n_samples, null_direction)
 
-                    if sample_dist[ii] < 0 or sample_dist[ii] > min_dist:
-                        sample_points[:, ii] = surface_point
-                        sample_dist[ii] = min_dist
+        sample_dist = self.get_surface_distances(
+            center_position.reshape(self.dimension, 1), directions, dist_max=dist_max
+        )[0, :]
 
-        return sample_points[:, sample_dist > 0]
+        ind_valid = np.logical_and(np.isfinite(sample_dist), sample_dist > 0)
+        return (
+            center_position.reshape(self.dimension, 1)
+            + directions[:, ind_valid] * sample_dist[ind_valid]
+        )
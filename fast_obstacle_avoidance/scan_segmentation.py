@@ -0,0 +1,245 @@
+"""
+Segmentation of laserscans which are ordered by their bearing, and tracking of the
+clusters over consecutive scans.
+"""
+# Created: 2026-10-17
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+from numpy import linalg as LA
+
+from scipy.spatial import cKDTree
+
+
+class AngularSegmentation:
+    """Clusters a laserscan by splitting it where two consecutive points (ordered
+    by the bearing) are further apart than the gap distance, i.e., at the range
+    discontinuities and gaps the robot could pass through.
+
+    It's a single linear pass over the scan and is deterministic, in contrast to
+    DBSCAN. It follows the sklearn interface (`fit`, `labels_`) such that it can be
+    used as `Clusterer` of the SampledClusterAvoider.
+
+    Attributes
+    ----------
+    gap_distance (float): Points further apart than this are not connected
+    min_samples (int): Segments with fewer points are labeled as outliers (-1)
+    wrap_around (bool): If True, the last and the first segment are merged if they
+        are close, i.e., for a full 360 degree scan.
+    labels_: Labels (n_samples) of the last fit, outliers have label -1
+    """
+
+    def __init__(
+        self,
+        gap_distance: float = 1.0,
+        min_samples: int = 3,
+        wrap_around: bool = True,
+    ) -> None:
+        self.gap_distance = gap_distance
+        self.min_samples = min_samples
+        self.wrap_around = wrap_around
+
+        self.labels_ = np.zeros(0, dtype=int)
+
+    @property
+    def n_clusters(self) -> int:
+        if not self.labels_.shape[0]:
+            return 0
+        return np.max(self.labels_) + 1
+
+    def fit(self, XX: np.ndarray) -> np.ndarray:
+        """Segments the samples of shape (n_samples, n_features) which are
+        ordered by the bearing and returns the labels."""
+        n_samples = XX.shape[0]
+        if not n_samples:
+            self.labels_ = np.zeros(0, dtype=int)
+            return self.labels_
+
+        gaps = LA.norm(np.diff(XX, axis=0), axis=1)
+        segments = np.zeros(n_samples, dtype=int)
+        np.cumsum(gaps > self.gap_distance, out=segments[1:])
+
+        if (
+            self.wrap_around
+            and segments[-1] > 0
+            and LA.norm(XX[-1, :] - XX[0, :]) <= self.gap_distance
+        ):
+            # The last segment is continued by the first one
+            segments[segments == segments[-1]] = 0
+
+        # Remove the small segments and label the remaining ones consecutively
+        is_valid = np.bincount(segments) >= self.min_samples
+        new_labels = np.cumsum(is_valid) - 1
+        self.labels_ = np.where(is_valid[segments], new_labels[segments], -1)
+
+        return self.labels_
+
+    def fit_predict(self, XX: np.ndarray) -> np.ndarray:
+        return self.fit(XX)
+
+
+class ClusterTracker:
+    """Carries the clusters over consecutive scans: the new points are associated
+    with the tracked cluster of the closest point of the previous scans, and only the
+    remaining points are clustered (from scratch) to spawn new clusters.
+
+    The centers are smoothed over time, which damps the switching of the clusters.
+    Clusters which are not observed for more than `max_missed` scans are retired.
+    It follows the `Clusterer` interface (`fit`, `labels_`), where the labels refer
+    to the currently observed clusters (in the order of their creation).
+
+    Attributes
+    ----------
+    clusterer: Clusterer used for the points which don't belong to a tracked cluster
+    association_margin (float): Maximum distance of a point from the (last observed)
+        points of a cluster to be associated with it
+    min_samples (int): Minimum number of points for a cluster to be observed
+    center_smoothing (float): Weight in [0, 1) of the previous center
+    max_missed (int): Number of scans a cluster is kept without being observed
+    cluster_centers_: Centers of the observed clusters (n_clusters, n_features)
+    cluster_ids_: Unique (persistent) ids of the observed clusters
+    labels_: Labels (n_samples) of the last fit, outliers have label -1
+    """
+
+    def __init__(
+        self,
+        clusterer=None,
+        association_margin: float = 0.5,
+        min_samples: int = 3,
+        center_smoothing: float = 0.5,
+        max_missed: int = 2,
+    ) -> None:
+        if clusterer is None:
+            clusterer = AngularSegmentation(
+                gap_distance=2 * association_margin, min_samples=min_samples
+            )
+        self.clusterer = clusterer
+
+        self.association_margin = association_margin
+        self.min_samples = min_samples
+        self.center_smoothing = center_smoothing
+        self.max_missed = max_missed
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Removes all tracked clusters."""
+        self._centers: Optional[np.ndarray] = None
+        self._points = np.zeros((0, 0))
+        self._point_labels = np.zeros(0, dtype=int)
+        self._point_tree: Optional[cKDTree] = None
+        self._ids = np.zeros(0, dtype=int)
+        self._missed = np.zeros(0, dtype=int)
+        self._next_id = 0
+
+        self.labels_ = np.zeros(0, dtype=int)
+        self.cluster_centers_ = np.zeros((0, 0))
+        self.cluster_ids_ = np.zeros(0, dtype=int)
+
+    @property
+    def n_tracked(self) -> int:
+        return self._ids.shape[0]
+
+    @property
+    def n_clusters(self) -> int:
+        return self.cluster_ids_.shape[0]
+
+    def associate(self, XX: np.ndarray) -> np.ndarray:
+        """Returns the index of the tracked cluster for each sample, or -1 if
+        it is not close to any of them."""
+        labels = np.full(XX.shape[0], -1, dtype=int)
+        if not self.n_tracked or not XX.shape[0]:
+            return labels
+
+        # Closest point of all tracked clusters (the distance is inf if none is close)
+        distances, ind_points = self._point_tree.query(
+            XX, distance_upper_bound=self.association_margin
+        )
+        ind_close = np.isfinite(distances)
+        labels[ind_close] = self._point_labels[ind_points[ind_close]]
+        return labels
+
+    def fit(self, XX: np.ndarray) -> np.ndarray:
+        """Updates the clusters with the samples (n_samples, n_features) and
+        returns the labels."""
+        if self._centers is None or self._centers.shape[1] != XX.shape[1]:
+            self.reset()
+            self._centers = np.zeros((0, XX.shape[1]))
+            self._points = np.zeros((0, XX.shape[1]))
+
+        labels = self.associate(XX)
+
+        # Spawn new clusters from the remaining points
+        ind_free = np.flatnonzero(labels < 0)
+        n_clusters = self.n_tracked
+        if ind_free.shape[0] >= self.min_samples:
+            new_labels = np.asarray(self.clusterer.fit(XX[ind_free, :]))
+            ind_new = new_labels >= 0
+            if np.any(ind_new):
+                labels[ind_free[ind_new]] = new_labels[ind_new] + n_clusters
+                n_clusters = n_clusters + np.max(new_labels) + 1
+
+        ind_labeled = labels >= 0
+        counts = np.bincount(labels[ind_labeled], minlength=n_clusters)
+        means = np.zeros((n_clusters, XX.shape[1]))
+        for dd in range(XX.shape[1]):
+            means[:, dd] = np.bincount(
+                labels[ind_labeled], weights=XX[ind_labeled, dd], minlength=n_clusters
+            )
+        is_observed = counts >= self.min_samples
+        means[is_observed, :] = means[is_observed, :] / counts[is_observed, None]
+
+        # Outliers (label -1) index the last entry, which is never observed
+        is_observed_point = np.append(is_observed, False)[labels]
+
+        # Incremental update of the tracked centers and spawning of the new ones
+        n_new = n_clusters - self.n_tracked
+        centers = np.vstack((self._centers, means[self.n_tracked :, :]))
+        ind_update = np.flatnonzero(is_observed[: self.n_tracked])
+        centers[ind_update, :] = (
+            self.center_smoothing * self._centers[ind_update, :]
+            + (1 - self.center_smoothing) * means[ind_update, :]
+        )
+        ids = np.hstack((self._ids, self._next_id + np.arange(n_new)))
+        self._next_id += n_new
+        missed = np.hstack((self._missed, np.zeros(n_new, dtype=int)))
+        missed[is_observed] = 0
+        missed[~is_observed] += 1
+
+        # The observed clusters are represented by their new points, the others
+        # keep the points of their last observation
+        is_kept_point = ~is_observed[self._point_labels]
+        points = np.vstack((self._points[is_kept_point, :], XX[is_observed_point, :]))
+        point_labels = np.hstack(
+            (self._point_labels[is_kept_point], labels[is_observed_point])
+        )
+
+        # Relabel the observed clusters consecutively
+        new_labels = np.cumsum(is_observed) - 1
+        self.labels_ = np.where(
+            is_observed_point, np.append(new_labels, -1)[labels], -1
+        )
+        self.cluster_centers_ = centers[is_observed, :]
+        self.cluster_ids_ = ids[is_observed]
+
+        # Retire the clusters which have not been seen for too long
+        # (and the spawned ones which are too small)
+        ind_keep = missed <= self.max_missed
+        ind_keep[self.n_tracked :] = is_observed[self.n_tracked :]
+        self._centers = centers[ind_keep, :]
+        self._ids = ids[ind_keep]
+        self._missed = missed[ind_keep]
+
+        is_kept_point = ind_keep[point_labels]
+        self._points = points[is_kept_point, :]
+        self._point_labels = (np.cumsum(ind_keep) - 1)[point_labels[is_kept_point]]
+        if self._points.shape[0]:
+            self._point_tree = cKDTree(self._points)
+
+        return self.labels_
+
+    def fit_predict(self, XX: np.ndarray) -> np.ndarray:
+        return self.fit(XX)
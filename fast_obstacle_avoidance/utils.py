@@ -1,47 +1,226 @@
 """
 Various utils used for the fast-obstacle-avoidance
 """
+from __future__ import annotations
+
 import numpy as np
 from numpy import linalg as LA
 
 from scipy.spatial.transform import Rotation as R
 
 
+def buffer_to_numpy(data, dtype=None) -> np.ndarray:
+    """Returns a (flat) numpy view of a laserscan field such as the ranges or the
+    intensities. Buffers (e.g. `array.array` or raw float32 bytes) are viewed
+    without copying, only plain sequences are converted element by element.
+
+    The dtype is the one of the converted sequences (float by default) and the one
+    which raw bytes are interpreted as (float32 by default, as in the messages)."""
+    if isinstance(data, np.ndarray):
+        return data.ravel()
+
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return np.asarray(data, dtype=float if dtype is None else dtype)
+
+    if view.format in ("f", "d"):
+        return np.frombuffer(view, dtype=view.format)
+
+    if view.format in ("B", "b", "c"):
+        # Raw (serialized) bytes
+        return np.frombuffer(view, dtype=np.float32 if dtype is None else dtype)
+
+    return np.asarray(data, dtype=float if dtype is None else dtype)
+
+
 def laserscan_to_numpy(
     msg, dimension=2, delta_angle=0, delta_position=None, pose=None
 ) -> np.ndarray:
     """Returns a numpy array of the a ros-laserscan data."""
-    if pose is not None:
-        delta_angle = pose.orientation
-        if LA.norm(pose.position):
-            delta_position = pose.position
+    projector = LaserscanProjector.from_message(
+        msg,
+        dimension=dimension,
+        delta_angle=delta_angle,
+        delta_position=delta_position,
+        pose=pose,
+    )
+    return projector.project(buffer_to_numpy(msg.ranges))
 
-    num_points = len(msg.ranges)
 
-    ranges = np.array(msg.ranges)
-    ind_real = np.isfinite(ranges)
+class LaserscanProjector:
+    """Projects the ranges of a laserscan to Cartesian positions.
 
-    ranges = ranges[ind_real]
-    angles = np.arange(num_points)[ind_real] * msg.angle_increment + (
-        msg.angle_min + delta_angle
-    )
+    The unit directions (rotated by the mounting angle) and the mounting offset are
+    computed once, since they do not change between the messages of one topic."""
 
-    positions = np.tile(ranges, (dimension, 1)) * np.vstack(
-        (np.cos(angles), np.sin(angles))
-    )
+    def __init__(
+        self,
+        angle_min: float,
+        angle_increment: float,
+        n_points: int,
+        dimension: int = 2,
+        delta_angle: float = 0,
+        delta_position: np.ndarray = None,
+        pose=None,
+    ) -> None:
+        if dimension != 2:
+            raise NotImplementedError("Only implemented for two dimensions.")
+
+        if pose is not None:
+            delta_angle = pose.orientation
+            if LA.norm(pose.position):
+                delta_position = pose.position
+
+        self.angle_min = angle_min
+        self.angle_increment = angle_increment
+
+        angles = np.arange(n_points) * angle_increment + (angle_min + delta_angle)
+        self.directions = np.vstack((np.cos(angles), np.sin(angles)))
+
+        if delta_position is None:
+            self.offset = None
+        else:
+            self.offset = np.reshape(np.array(delta_position, dtype=float), (-1, 1))
+
+    @classmethod
+    def from_message(cls, msg, **kwargs) -> LaserscanProjector:
+        return cls(
+            angle_min=msg.angle_min,
+            angle_increment=msg.angle_increment,
+            n_points=len(msg.ranges),
+            **kwargs,
+        )
+
+    @property
+    def n_points(self) -> int:
+        return self.directions.shape[1]
+
+    def is_compatible(self, msg) -> bool:
+        """Checks if the message has the same angular layout as the projector."""
+        return (
+            len(msg.ranges) == self.n_points
+            and msg.angle_min == self.angle_min
+            and msg.angle_increment == self.angle_increment
+        )
+
+    def project(self, ranges, ind_real: np.ndarray = None) -> np.ndarray:
+        """Returns the positions (dimension, n_finite) of the finite ranges.
+        The finite mask can be passed if it is already known, e.g., since it is
+        shared with the intensities."""
+        ranges = buffer_to_numpy(ranges)
+        if ind_real is None:
+            ind_real = np.isfinite(ranges)
+
+        if np.all(ind_real):
+            positions = self.directions * ranges
+        else:
+            positions = self.directions[:, ind_real] * ranges[ind_real]
+
+        if self.offset is not None:
+            positions += self.offset
+
+        return positions
+
+
+class PolarScan:
+    """Laserscan (of one or several lidars) sorted by the bearing around the origin,
+    i.e., the robot center.
+
+    The Cartesian positions, bearings and ranges are views of one array (no copies).
+    A uniform table of bin start indices allows to find the beginning and end of an
+    angular sector with a binary search within a single bin.
+
+    Attributes
+    ----------
+    order: Indices which sort the initial (concatenated) points by bearing
+    n_bins (int): Number of angular bins of the lookup table
+    """
+
+    def __init__(self, positions: np.ndarray, n_bins: int = 360) -> None:
+        bearings = np.arctan2(positions[1, :], positions[0, :])
+        self.order = np.argsort(bearings, kind="stable")
+
+        self._data = np.empty((positions.shape[0] + 2, positions.shape[1]))
+        self._data[:-2, :] = positions[:, self.order]
+        self._data[-2, :] = bearings[self.order]
+        self._data[-1, :] = LA.norm(self._data[:-2, :], axis=0)
+
+        self.n_bins = n_bins
+        self._bin_width = 2 * np.pi / n_bins
+        self._bin_starts = np.searchsorted(
+            self.bearings, np.linspace(-np.pi, np.pi, n_bins + 1)
+        )
+        # Bearings of exactly pi are part of the last bin
+        self._bin_starts[-1] = self.n_points
+
+    @classmethod
+    def from_scans(cls, scans: list[np.ndarray], **kwargs) -> PolarScan:
+        """Merges the Cartesian scans (in the same frame) of several lidars."""
+        return cls(np.hstack(scans), **kwargs)
+
+    def __len__(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def n_points(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Cartesian positions of shape (dimension, n_points)."""
+        return self._data[:-2, :]
+
+    @property
+    def bearings(self) -> np.ndarray:
+        return self._data[-2, :]
+
+    @property
+    def ranges(self) -> np.ndarray:
+        return self._data[-1, :]
+
+    def get_index(self, angle: float) -> int:
+        """Returns the index of the first point with a bearing larger or equal
+        to the angle (which is in [-pi, pi])."""
+        ind_bin = min(int((angle + np.pi) / self._bin_width), self.n_bins - 1)
+        ind_bin = max(ind_bin, 0)
+
+        index = self._bin_starts[ind_bin]
+        end = self._bin_starts[ind_bin + 1]
+        bearings = self.bearings
+        index += int(np.searchsorted(bearings[index:end], angle))
+
+        # Numerical inaccuracy at the bin edge
+        if index > 0 and bearings[index - 1] >= angle:
+            index = int(np.searchsorted(bearings[:index], angle))
+
+        return index
+
+    def get_sector_slices(self, angle_min: float, angle_max: float) -> list[slice]:
+        """Returns the slices of all points with a bearing in [angle_min, angle_max),
+        a sector which wraps around (-pi / pi) consists of two slices."""
+        if angle_max - angle_min >= 2 * np.pi:
+            return [slice(0, self.n_points)]
+
+        angle_min = (angle_min + np.pi) % (2 * np.pi) - np.pi
+        angle_max = (angle_max + np.pi) % (2 * np.pi) - np.pi
+
+        ind_min = self.get_index(angle_min)
+        ind_max = self.get_index(angle_max)
 
-    if delta_position is not None:
-        # Rotate
-        # cos_val = np.cos(delta_angle)
-        # sin_val = np.sin(delta_angle)
+        if angle_min <= angle_max:
+            return [slice(ind_min, ind_max)]
 
-        # rot_matr = np.array([[cos_val, sin_val],
-        # [-sin_val, cos_val]])
+        return [slice(ind_min, self.n_points), slice(0, ind_max)]
 
-        # delta_position = rot_matr @ delta_position
-        positions = positions + np.tile(delta_position, (positions.shape[1], 1)).T
+    def get_sector(self, angle_min: float, angle_max: float) -> np.ndarray:
+        """Returns the positions within the sector [angle_min, angle_max),
+        as a view if the sector does not wrap around (-pi / pi)."""
+        slices = self.get_sector_slices(angle_min, angle_max)
+        if len(slices) == 1:
+            return self.positions[:, slices[0]]
 
-    return positions
+        return np.hstack([self.positions[:, sl] for sl in slices])
 
 
 def depreciated(*args, **kwargs):
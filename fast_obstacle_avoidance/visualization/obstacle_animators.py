@@ -20,6 +20,7 @@ from vartools.dynamical_systems import LinearSystem
 from dynamic_obstacle_avoidance.visualization import plot_obstacles
 
 from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+from fast_obstacle_avoidance.obstacle_avoider import FastObstacleAvoider
 from fast_obstacle_avoidance.control_robot import QoloRobot
 
 from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
@@ -427,8 +428,12 @@ class FastObstacleAnimator(BaseFastAnimator):
             print(f"It {ii}")
 
         # Update obstacle position:
-        for obs in self.robot.obstacle_environment:
-            obs.do_velocity_step(delta_time=self.dt_simulation)
+        if isinstance(self.avoider, FastObstacleAvoider):
+            # Keeps the obstacle index of the avoider up to date
+            self.avoider.do_velocity_step(delta_time=self.dt_simulation)
+        else:
+            for obs in self.robot.obstacle_environment:
+                obs.do_velocity_step(delta_time=self.dt_simulation)
 
         self.positions[:, ii] = self.robot.pose.position
         # self.avoider.update_reference_direction(position=self.robot.pose.position)
@@ -583,8 +588,14 @@ class MixedObstacleAnimator(BaseFastAnimator):
             print(f"It {ii}")
 
         # Update obstacle position:
-        for obs in self.robot.obstacle_environment:
-            obs.do_velocity_step(delta_time=self.dt_simulation)
+        if hasattr(self.avoider, "obstacle_avoider"):
+            # Keeps the obstacle index and arrays of the avoider up to date
+            self.avoider.obstacle_avoider.do_velocity_step(
+                delta_time=self.dt_simulation
+            )
+        else:
+            for obs in self.robot.obstacle_environment:
+                obs.do_velocity_step(delta_time=self.dt_simulation)
 
         if self.environment is not None:
             data_points = self.environment.get_surface_points(
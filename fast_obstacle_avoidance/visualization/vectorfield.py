@@ -178,19 +178,21 @@ def static_visualization_of_sample_avoidance(
     reference_dirs = np.zeros(positions.shape)
     norm_dirs = np.zeros(positions.shape)
 
+    surface_points, is_valid = main_environment.get_surface_points_batch(positions)
+
+    # Put 1.1 margin for nicer plots
+    is_inside = main_environment.is_inside_batch(
+        positions, margin=robot.control_radius * 1.1
+    )
+
     for it in range(positions.shape[1]):
-        if main_environment.is_inside(
-            positions[:, it], margin=robot.control_radius * 1.1
-        ):
-            # Put 1.1 margin for nicer plots
+        if is_inside[it]:
             continue
 
         robot.pose.position = positions[:, it]
         # robot.pose.position = np.array([-2.5, 3])
 
-        data_points = main_environment.get_surface_points(
-            center_position=positions[:, it],
-        )
+        data_points = surface_points[it][:, is_valid[it]]
 
         _, _, relative_distances = robot.get_relative_positions_and_dists(
             data_points, in_robot_frame=False
@@ -649,6 +651,14 @@ def static_visualization_of_sample_avoidance_mixed(
     reference_dirs = np.zeros(positions.shape)
     norm_dirs = np.zeros(positions.shape)
 
+    if sample_environment is not None:
+        surface_points, is_valid = sample_environment.get_surface_points_batch(
+            positions
+        )
+        is_inside = sample_environment.is_inside_batch(
+            positions, margin=robot.control_radius
+        )
+
     for it in range(positions.shape[1]):
         robot.pose.position = positions[:, it]
 
@@ -661,17 +671,13 @@ def static_visualization_of_sample_avoidance_mixed(
         if is_inside_an_obstacle:
             continue
 
-        if sample_environment is not None and sample_environment.is_inside(
-            position=robot.pose.position, margin=robot.control_radius
-        ):
+        if sample_environment is not None and is_inside[it]:
             continue
 
         # robot.pose.position = np.array([5.41, 5.99])
         # robot.pose.position = np.array([8.00, 2.55])
         if sample_environment is not None:
-            data_points = sample_environment.get_surface_points(
-                center_position=robot.pose.position,
-            )
+            data_points = surface_points[it][:, is_valid[it]]
 
             data_points = cleanup_datapoints(data_points=data_points, robot=robot)
 
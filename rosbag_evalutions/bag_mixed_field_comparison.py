@@ -78,7 +78,7 @@ def run_vectorfield_mixed(qolo):
     for it in range(positions.shape[1]):
         qolo.pose.position = positions[:, it]
         qolo._got_new_obstacles = True
-        temp_scan = reset_laserscan(qolo.get_allscan(), positions[:, it])
+        temp_scan = reset_laserscan(qolo.get_polar_scan(), positions[:, it])
 
         _, _, relative_distances = qolo.get_relative_positions_and_dists(
             temp_scan, in_robot_frame=False
@@ -0,0 +1,13 @@
+""" Shared helpers of the tests. """
+# Created: 2026-10-17
+
+import numpy as np
+
+
+def get_ellipse_datapoints(n_points=100, axes=(3.0, 2.0), noise=0.1, seed=0):
+    """Returns noisy datapoints (dimension, n_points) on the surface of an ellipse
+    which is centered at the origin."""
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    datapoints = np.vstack((axes[0] * np.cos(angles), axes[1] * np.sin(angles)))
+    return datapoints + noise * rng.standard_normal(datapoints.shape)
@@ -0,0 +1,53 @@
+""" Test the batched (multi-position) evaluation of the avoiders. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+
+from conftest import get_ellipse_datapoints
+
+
+def test_batch_equals_sequential(evaluate_velocity_weight=False):
+    datapoints = get_ellipse_datapoints()
+    fast_avoider = SampledAvoider(
+        control_radius=0.5,
+        weight_max_norm=1e4,
+        weight_factor=0.3,
+        evaluate_velocity_weight=evaluate_velocity_weight,
+    )
+    fast_avoider.update_laserscan(datapoints, in_robot_frame=False)
+
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-1.5, 1.5, (2, 50))
+    velocities = rng.standard_normal((2, 50))
+    # Zero velocity is not modulated
+    velocities[:, 3] = 0
+
+    batch_velocities = fast_avoider.avoid_batch(positions, velocities)
+
+    for it in range(positions.shape[1]):
+        velocity = fast_avoider.avoid(velocities[:, it], position=positions[:, it])
+        assert np.allclose(batch_velocities[:, it], velocity)
+
+    assert np.allclose(batch_velocities[:, 3], 0)
+
+
+def test_batch_with_wake_effect():
+    test_batch_equals_sequential(evaluate_velocity_weight=True)
+
+
+def test_batch_without_datapoints():
+    fast_avoider = SampledAvoider(control_radius=0.5)
+    fast_avoider.update_laserscan(np.zeros((2, 0)), in_robot_frame=False)
+
+    positions = np.zeros((2, 3))
+    velocities = np.array([[1.0, 0, -1], [0, 1, 0]])
+
+    assert np.allclose(fast_avoider.avoid_batch(positions, velocities), velocities)
+
+
+if (__name__) == "__main__":
+    test_batch_equals_sequential()
+    test_batch_with_wake_effect()
+    test_batch_without_datapoints()
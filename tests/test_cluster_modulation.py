@@ -0,0 +1,86 @@
+""" Test the vectorized modulation of the SampledClusterAvoider. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from vartools.linalg import get_orthogonal_basis
+
+from fast_obstacle_avoidance.obstacle_avoider.lidar_avoider import (
+    get_relative_positions_and_dists,
+)
+from fast_obstacle_avoidance.obstacle_avoider.sampled_cluster_avoider import (
+    ClustererType,
+    SampledClusterAvoider,
+)
+
+
+def get_wall_scan():
+    """Three walls around the origin, ordered by the bearing."""
+    walls = []
+    for angle, distance in [(0, 2.0), (np.pi / 2, 1.5), (np.pi, 3.0)]:
+        angles = np.linspace(angle - np.pi / 6, angle + np.pi / 6, 25)
+        walls.append(distance * np.vstack((np.cos(angles), np.sin(angles))))
+    return np.hstack(walls)
+
+
+def test_vectorized_equals_cluster_loop():
+    avoider = SampledClusterAvoider(
+        control_radius=0.5, clusterer=ClustererType.ANGULAR_SEGMENTATION
+    )
+    avoider.update_sample_points(get_wall_scan(), in_robot_frame=False)
+    assert avoider.n_obstacles == 3
+
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        position = rng.uniform(-0.5, 0.5, 2)
+        velocity = rng.standard_normal(2)
+        velocity_direction = velocity / np.linalg.norm(velocity)
+
+        avoider.avoid(velocity, position=position)
+
+        _, ref_dirs, relative_distances = get_relative_positions_and_dists(
+            center_position=position,
+            control_radius=avoider.control_radius,
+            datapoints=avoider.datapoints,
+            in_local_frame=False,
+        )
+        local_weights = avoider.sample_handler.get_weight_from_distances(
+            relative_distances,
+            initial_velocity=velocity_direction,
+            directions=ref_dirs,
+        )
+
+        for ii in range(avoider.n_obstacles):
+            ind_cluster = avoider.clusterer.labels_ == ii
+            normal_direction = (-1) * np.sum(
+                ref_dirs[:, ind_cluster] * local_weights[ind_cluster], axis=1
+            )
+            normal_norm = np.linalg.norm(normal_direction)
+            normal_direction = normal_direction / normal_norm
+            assert np.allclose(normal_direction, avoider.normal_directions[:, ii])
+
+            reference_direction = avoider.limit_reference_from_offset(
+                normal_direction, position - avoider.get_cluster_centers()[:, ii]
+            )
+            assert np.allclose(
+                reference_direction, avoider.reference_directions[:, ii]
+            )
+
+            basis_matrix = get_orthogonal_basis(normal_direction)
+            basis_matrix[:, 0] = reference_direction
+            stretch_matrix = avoider.stretching_matrix.get(
+                normal_norm,
+                reference_direction,
+                normal_direction,
+                velocity_direction,
+            )
+            modulated_velocity = avoider.modulate(
+                velocity_direction,
+                decomposition_matrix=basis_matrix,
+                stretching_matrix=stretch_matrix,
+            )
+            assert np.allclose(modulated_velocity, avoider.modulated_velocities[:, ii])
+
+
+if (__name__) == "__main__":
+    test_vectorized_equals_cluster_loop()
@@ -0,0 +1,146 @@
+""" Test the batched stereographic mapping of the directional clustering. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.directional_learning import (
+    DirectionalKMeans,
+    DirectionalSoftKMeans,
+    get_stereographic_bases,
+    get_stereographic_distances,
+    get_stereographic_weighted_sums,
+    map_cartesian_to_infite_stereographic,
+    map_infinite_stereographic_to_cartesian,
+    map_infinite_stereographic_to_cartesian_batch,
+)
+
+
+def test_batched_mapping_equals_mapping_per_cluster(dimension=2):
+    rng = np.random.default_rng(0)
+    datapoints = rng.standard_normal((50, dimension)) + 2.0
+    # Including a parallel and an opposing direction
+    centers = np.vstack((datapoints[:3, :], (-1) * datapoints[3:4, :]))
+    weights = rng.uniform(0, 1, (datapoints.shape[0], centers.shape[0]))
+
+    bases = get_stereographic_bases(centers)
+    distances = get_stereographic_distances(datapoints, centers)
+    weighted_sums = get_stereographic_weighted_sums(
+        datapoints, centers, bases, weights
+    )
+    restored = map_infinite_stereographic_to_cartesian_batch(
+        bases, weighted_sums / datapoints.shape[0]
+    )
+
+    for kk in range(centers.shape[0]):
+        mapped = map_cartesian_to_infite_stereographic(bases[kk], datapoints)
+        mapped_center = np.zeros(dimension)
+        mapped_center[0] = np.linalg.norm(centers[kk])
+
+        assert np.allclose(
+            np.linalg.norm(mapped - mapped_center, axis=1), distances[:, kk]
+        )
+        assert np.allclose(weights[:, kk] @ mapped, weighted_sums[kk])
+        assert np.allclose(
+            map_infinite_stereographic_to_cartesian(
+                bases[kk], weighted_sums[kk : kk + 1] / datapoints.shape[0]
+            ),
+            restored[kk],
+        )
+
+
+def test_batched_mapping_in_3d():
+    test_batched_mapping_equals_mapping_per_cluster(dimension=3)
+
+
+def test_soft_kmeans_prediction():
+    angles = np.linspace(0, 2 * np.pi, 4, endpoint=False)
+    centers = np.vstack((np.cos(angles), np.sin(angles))).T
+
+    kmeans = DirectionalSoftKMeans(n_clusters=4)
+    kmeans.n_features_ = 2
+    kmeans.cluster_centers_ = centers
+
+    labels = kmeans.predict(1.5 * centers + 0.1)
+    assert np.array_equal(labels, np.arange(4))
+
+
+def get_blobs(n_points=40, seed=0):
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, 4, endpoint=False)
+    centers = 2.0 * np.vstack((np.cos(angles), np.sin(angles))).T
+    return centers, np.vstack(
+        [rng.normal(center, 0.2, (n_points, 2)) for center in centers]
+    )
+
+
+def test_partial_fit_finds_blobs():
+    centers, datapoints = get_blobs()
+    blob_labels = np.repeat(np.arange(4), datapoints.shape[0] // 4)
+
+    # Running mean of the (static) blobs
+    kmeans = DirectionalKMeans(n_clusters=4, batch_size=20, forgetting_factor=1.0)
+    kmeans.n_features_ = 2
+    kmeans.cluster_centers_ = centers + 0.5
+
+    np.random.seed(0)
+    for _ in range(50):
+        labels = kmeans.partial_fit(datapoints)
+
+    assert np.array_equal(labels, blob_labels)
+    assert np.isclose(np.sum(kmeans.counts_), 50 * 20)
+    for kk in range(4):
+        assert np.allclose(
+            kmeans.cluster_centers_[kk],
+            np.mean(datapoints[blob_labels == kk], axis=0),
+            atol=0.1,
+        )
+
+
+def test_soft_partial_fit_is_bounded():
+    centers, datapoints = get_blobs()
+
+    kmeans = DirectionalSoftKMeans(n_clusters=4, partial_max_iter=2)
+    kmeans.n_features_ = 2
+    kmeans.cluster_centers_ = np.copy(centers)
+
+    n_steps = []
+    original_step = kmeans.update_step_soft_boundary
+
+    def counting_step(XX, sample_weights=None):
+        n_steps.append(XX.shape[0])
+        return original_step(XX, sample_weights=sample_weights)
+
+    kmeans.update_step_soft_boundary = counting_step
+    labels = kmeans.partial_fit(datapoints)
+
+    assert n_steps == [datapoints.shape[0]] * 2
+    assert labels.shape == (datapoints.shape[0],)
+
+
+def test_partial_fit_follows_moving_blob():
+    rng = np.random.default_rng(0)
+    blob_center = np.array([2.0, 0.0])
+
+    kmeans = DirectionalKMeans(n_clusters=1)
+    kmeans.n_features_ = 2
+    kmeans.cluster_centers_ = np.copy(blob_center).reshape(1, -1)
+
+    # Warm up for long, such that a running mean would freeze
+    for _ in range(500):
+        kmeans.partial_fit(rng.normal(blob_center, 0.1, (20, 2)))
+
+    direction = np.array([0.0, 1.0])
+    for _ in range(100):
+        blob_center = blob_center + 0.01 * direction
+        kmeans.partial_fit(rng.normal(blob_center, 0.1, (20, 2)))
+
+    assert np.allclose(kmeans.cluster_centers_[0], blob_center, atol=0.15)
+
+
+if (__name__) == "__main__":
+    test_batched_mapping_equals_mapping_per_cluster()
+    test_batched_mapping_in_3d()
+    test_soft_kmeans_prediction()
+    test_partial_fit_finds_blobs()
+    test_soft_partial_fit_is_bounded()
+    test_partial_fit_follows_moving_blob()
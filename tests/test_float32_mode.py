@@ -0,0 +1,86 @@
+""" Test the float32 evaluation of the avoiders against the float64 results. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+
+from conftest import get_ellipse_datapoints
+
+
+def get_avoider_pair(**kwargs):
+    kwargs = {
+        "control_radius": 0.5,
+        "weight_max_norm": 1e4,
+        "weight_factor": 0.03,
+        **kwargs,
+    }
+    return SampledAvoider(**kwargs), SampledAvoider(dtype=np.float32, **kwargs)
+
+
+def test_float32_deviation(rtol=1e-4, **kwargs):
+    avoider_64, avoider_32 = get_avoider_pair(**kwargs)
+
+    datapoints = get_ellipse_datapoints(n_points=360)
+    avoider_64.update_laserscan(datapoints, in_robot_frame=False)
+    avoider_32.update_laserscan(datapoints, in_robot_frame=False)
+    assert avoider_32.datapoints.dtype == np.float32
+
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        position = rng.uniform(-1.5, 1.5, 2)
+        velocity = rng.standard_normal(2)
+
+        velocity_64 = avoider_64.avoid(velocity, position=position)
+        velocity_32 = avoider_32.avoid(velocity, position=position)
+
+        # Scan-sized data stays in single precision
+        assert avoider_32.weights.dtype == np.float32
+        assert avoider_32.reference_direction.dtype == np.float32
+
+        reference_norm = np.linalg.norm(avoider_64.reference_direction)
+        assert (
+            np.linalg.norm(
+                avoider_64.reference_direction - avoider_32.reference_direction
+            )
+            <= rtol * reference_norm
+        )
+        # The wake effect amplifies the relative error of (negligibly) small weights
+        assert np.allclose(
+            avoider_64.weights,
+            avoider_32.weights,
+            rtol=rtol,
+            atol=rtol * np.max(avoider_64.weights),
+        )
+        assert np.allclose(velocity_64, velocity_32, rtol=10 * rtol, atol=1e-5)
+
+
+def test_float32_deviation_with_workspace():
+    test_float32_deviation(use_workspace=True, evaluate_velocity_weight=True)
+
+
+def test_float32_deviation_batch(rtol=1e-3):
+    avoider_64, avoider_32 = get_avoider_pair(evaluate_velocity_weight=True)
+
+    datapoints = get_ellipse_datapoints(n_points=360)
+    avoider_64.update_laserscan(datapoints, in_robot_frame=False)
+    avoider_32.update_laserscan(datapoints, in_robot_frame=False)
+
+    rng = np.random.default_rng(2)
+    positions = rng.uniform(-1.5, 1.5, (2, 30))
+    velocities = rng.standard_normal((2, 30))
+
+    velocities_32 = avoider_32.avoid_batch(positions, velocities)
+    assert velocities_32.dtype == np.float32
+    assert np.allclose(
+        avoider_64.avoid_batch(positions, velocities),
+        velocities_32,
+        rtol=rtol,
+        atol=1e-5,
+    )
+
+
+if (__name__) == "__main__":
+    test_float32_deviation()
+    test_float32_deviation_with_workspace()
+    test_float32_deviation_batch()
@@ -0,0 +1,84 @@
+""" Test the projection of laserscans with cached directions. """
+# Created: 2026-10-17
+
+from array import array
+from types import SimpleNamespace
+
+import numpy as np
+
+from fast_obstacle_avoidance.utils import buffer_to_numpy, LaserscanProjector
+
+
+def get_laserscan_message(n_points=360, angle_min=-np.pi, seed=0):
+    rng = np.random.default_rng(seed)
+    ranges = rng.uniform(0.5, 5, n_points)
+    ranges[::17] = np.inf
+    ranges[5] = np.nan
+    return SimpleNamespace(
+        angle_min=angle_min,
+        angle_increment=2 * np.pi / n_points,
+        ranges=list(ranges),
+    )
+
+
+def get_reference_positions(msg, delta_angle, delta_position):
+    ranges = np.array(msg.ranges)
+    ind_real = np.isfinite(ranges)
+    angles = (
+        np.arange(ranges.shape[0])[ind_real] * msg.angle_increment
+        + msg.angle_min
+        + delta_angle
+    )
+    positions = ranges[ind_real] * np.vstack((np.cos(angles), np.sin(angles)))
+    return positions + np.reshape(delta_position, (-1, 1))
+
+
+def test_projection_equals_direct_evaluation():
+    pose = SimpleNamespace(orientation=0.3, position=np.array([0.035, -0.1]))
+    msg = get_laserscan_message()
+
+    projector = LaserscanProjector.from_message(msg, pose=pose)
+    assert projector.is_compatible(msg)
+
+    # Same layout, new ranges
+    for seed in range(3):
+        msg = get_laserscan_message(seed=seed)
+        assert np.allclose(
+            projector.project(msg.ranges),
+            get_reference_positions(msg, pose.orientation, pose.position),
+        )
+
+    assert not projector.is_compatible(get_laserscan_message(n_points=720))
+    assert not projector.is_compatible(get_laserscan_message(angle_min=0))
+
+
+def test_buffer_ingestion_without_copy():
+    msg = get_laserscan_message()
+    ranges_list = msg.ranges
+    msg.ranges = array("f", ranges_list)
+
+    ranges = buffer_to_numpy(msg.ranges)
+    assert ranges.dtype == np.float32
+    assert np.shares_memory(ranges, np.frombuffer(msg.ranges, dtype=np.float32))
+
+    # Raw bytes are interpreted as float32
+    assert np.array_equal(
+        buffer_to_numpy(msg.ranges.tobytes()), ranges, equal_nan=True
+    )
+
+    # Python sequences keep the double precision (unless requested otherwise)
+    assert buffer_to_numpy(ranges_list).dtype == np.float64
+    assert buffer_to_numpy(ranges_list, dtype=np.float32).dtype == np.float32
+
+    # The projection equals the one of the python sequence (up to float32)
+    projector = LaserscanProjector.from_message(msg)
+    assert np.allclose(
+        projector.project(msg.ranges),
+        projector.project(ranges_list),
+        atol=1e-5,
+    )
+
+
+if (__name__) == "__main__":
+    test_projection_equals_direct_evaluation()
+    test_buffer_ingestion_without_copy()
@@ -0,0 +1,99 @@
+""" Test the pruning of far away laser points. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+
+
+def get_far_reaching_scan(n_points=720, max_range=30, seed=0):
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    ranges = rng.uniform(1, max_range, n_points)
+    return np.vstack((ranges * np.cos(angles), ranges * np.sin(angles)))
+
+
+def test_pruning_error_bound(
+    use_kdtree=False, weight_factor=0.05, evaluate_velocity_weight=False
+):
+    datapoints = get_far_reaching_scan()
+    kwargs = {
+        "control_radius": 0.5,
+        "weight_factor": weight_factor,
+        "weight_max_norm": 1e4,
+        "evaluate_velocity_weight": evaluate_velocity_weight,
+    }
+
+    full_avoider = SampledAvoider(**kwargs)
+    pruned_avoider = SampledAvoider(
+        influence_radius=3.0, use_kdtree=use_kdtree, **kwargs
+    )
+    full_avoider.update_laserscan(datapoints, in_robot_frame=False)
+    pruned_avoider.update_laserscan(datapoints, in_robot_frame=False)
+
+    position = np.array([0.2, 0.1])
+    velocity = np.array([1.0, 0.3])
+    full_avoider.update_reference_direction(
+        position=position, initial_velocity=velocity
+    )
+    pruned_avoider.update_reference_direction(
+        position=position, initial_velocity=velocity
+    )
+
+    # Only a fraction of the points is weighted
+    assert np.count_nonzero(pruned_avoider.weights) < datapoints.shape[1] / 2
+    assert pruned_avoider.weights.shape[0] == datapoints.shape[1]
+
+    weight_bound = pruned_avoider.pruning_weight_bound
+    assert weight_bound > 0
+    assert (
+        full_avoider.distance_weight_sum - pruned_avoider.distance_weight_sum
+        <= weight_bound
+    )
+
+    # The error of the returned reference is bounded
+    error_bound = pruned_avoider.pruning_error_bound
+    assert error_bound > 0
+    assert (
+        np.linalg.norm(
+            full_avoider.reference_direction - pruned_avoider.reference_direction
+        )
+        <= error_bound
+    )
+
+
+def test_pruning_with_kdtree():
+    test_pruning_error_bound(use_kdtree=True)
+
+
+def test_pruning_error_bound_with_normalization():
+    # The weight sum is above one, hence the weights are normalized
+    test_pruning_error_bound(weight_factor=1.0)
+
+
+def test_pruning_error_bound_with_wake_effect():
+    test_pruning_error_bound(weight_factor=1.0, evaluate_velocity_weight=True)
+
+
+def test_pruned_batch_equals_sequential():
+    fast_avoider = SampledAvoider(
+        control_radius=0.5, weight_factor=0.05, influence_radius=3.0
+    )
+    fast_avoider.update_laserscan(get_far_reaching_scan(), in_robot_frame=False)
+
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-1, 1, (2, 20))
+    velocities = rng.standard_normal((2, 20))
+
+    batch_velocities = fast_avoider.avoid_batch(positions, velocities)
+    for it in range(positions.shape[1]):
+        velocity = fast_avoider.avoid(velocities[:, it], position=positions[:, it])
+        assert np.allclose(batch_velocities[:, it], velocity)
+
+
+if (__name__) == "__main__":
+    test_pruning_error_bound()
+    test_pruning_with_kdtree()
+    test_pruning_error_bound_with_normalization()
+    test_pruning_error_bound_with_wake_effect()
+    test_pruned_batch_equals_sequential()
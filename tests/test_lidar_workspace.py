@@ -0,0 +1,65 @@
+""" Test the evaluation of the lidar avoider in preallocated buffers. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+
+
+def test_workspace_equals_allocation(
+    evaluate_velocity_weight=False, influence_radius=None
+):
+    kwargs = {
+        "control_radius": 0.5,
+        "weight_max_norm": 1e4,
+        "weight_factor": 0.03,
+        "evaluate_velocity_weight": evaluate_velocity_weight,
+        "influence_radius": influence_radius,
+    }
+    fast_avoider = SampledAvoider(**kwargs)
+    workspace_avoider = SampledAvoider(use_workspace=True, max_scan_size=360, **kwargs)
+
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, 720, endpoint=False)
+
+    # Scans of varying length (the last ones are larger than the workspace)
+    for n_points in [360, 200, 300, 720, 100]:
+        datapoints = np.vstack(
+            (3 * np.cos(angles[:n_points]), 2 * np.sin(angles[:n_points]))
+        )
+        datapoints = datapoints + 0.1 * rng.standard_normal(datapoints.shape)
+
+        position = rng.uniform(-1, 1, 2)
+        velocity = rng.standard_normal(2)
+
+        fast_avoider.update_laserscan(datapoints, in_robot_frame=False)
+        workspace_avoider.update_laserscan(datapoints, in_robot_frame=False)
+
+        assert np.allclose(
+            fast_avoider.avoid(velocity, position=position),
+            workspace_avoider.avoid(velocity, position=position),
+        )
+        assert np.allclose(fast_avoider.weights, workspace_avoider.weights)
+
+        if influence_radius is not None:
+            # The weights of all datapoints are stored in the workspace, too
+            assert np.shares_memory(
+                workspace_avoider.weights,
+                workspace_avoider.workspace.get_buffer("scan_weights", n_points),
+            )
+
+    assert workspace_avoider.workspace.max_scan_size == 720
+
+
+def test_workspace_with_wake_effect():
+    test_workspace_equals_allocation(evaluate_velocity_weight=True)
+
+
+def test_workspace_with_influence_radius():
+    test_workspace_equals_allocation(influence_radius=2.0)
+
+
+if (__name__) == "__main__":
+    test_workspace_equals_allocation()
+    test_workspace_with_wake_effect()
+    test_workspace_with_influence_radius()
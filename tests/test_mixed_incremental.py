@@ -0,0 +1,196 @@
+""" Test that the incremental update of the mixed avoider equals the full update. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from vartools.states import ObjectPose
+
+from dynamic_obstacle_avoidance.containers import ObstacleContainer
+from dynamic_obstacle_avoidance.obstacles import CircularObstacle, Ellipse
+
+from fast_obstacle_avoidance.control_robot import QoloRobot
+from fast_obstacle_avoidance.obstacle_avoider import MixedEnvironmentAvoider
+
+
+def get_obstacle_environment():
+    obstacle_environment = ObstacleContainer()
+    obstacle_environment.append(
+        Ellipse(
+            center_position=np.array([3, 1]),
+            orientation=30 * np.pi / 180,
+            axes_length=np.array([1.0, 2.4]),
+            margin_absolut=0.5,
+        )
+    )
+    obstacle_environment.append(
+        CircularObstacle(center_position=np.array([0, -3.5]), radius=0.8)
+    )
+    return obstacle_environment
+
+
+def get_laserscan(rng, n_points=200):
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    ranges = rng.uniform(0.8, 3.5, n_points)
+    return np.vstack((ranges * np.cos(angles), ranges * np.sin(angles)))
+
+
+def test_incremental_equals_full_recomputation():
+    obstacle_environment = get_obstacle_environment()
+    avoiders = [
+        MixedEnvironmentAvoider(
+            QoloRobot(
+                pose=ObjectPose(position=np.zeros(2), orientation=0),
+                obstacle_environment=obstacle_environment,
+            ),
+            recompute_all=recompute_all,
+        )
+        for recompute_all in [True, False]
+    ]
+
+    rng = np.random.default_rng(0)
+    position = np.zeros(2)
+    velocity = np.array([1.0, 0.2])
+    # Sequence of (new scan, new obstacles, moved robot)
+    events = [
+        (True, True, True),
+        (False, False, False),
+        (False, False, True),
+        (True, False, False),
+        (False, True, False),
+        (False, False, False),
+        (True, True, True),
+        (False, False, True),
+    ]
+    for new_scan, new_obstacles, has_moved in events:
+        if new_scan:
+            laserscan = get_laserscan(rng)
+            for avoider in avoiders:
+                avoider.update_laserscan(laserscan, in_robot_frame=False)
+
+        if new_obstacles:
+            obstacle_environment[0].center_position = obstacle_environment[
+                0
+            ].center_position + rng.uniform(-0.2, 0.2, 2)
+            for avoider in avoiders:
+                avoider.robot._got_new_obstacles = True
+
+        if has_moved:
+            position = position + rng.uniform(-0.3, 0.3, 2)
+            for avoider in avoiders:
+                avoider.robot.pose.position = position
+
+        velocities = [
+            avoider.avoid(velocity, position=position) for avoider in avoiders
+        ]
+        assert np.allclose(velocities[0], velocities[1])
+        assert np.allclose(
+            avoiders[0].reference_direction, avoiders[1].reference_direction
+        )
+        assert np.allclose(avoiders[0].weights, avoiders[1].weights)
+
+
+def test_static_step_reuses_references():
+    avoider = MixedEnvironmentAvoider(
+        QoloRobot(
+            pose=ObjectPose(position=np.zeros(2), orientation=0),
+            obstacle_environment=get_obstacle_environment(),
+        ),
+        recompute_all=False,
+    )
+    avoider.update_laserscan(
+        get_laserscan(np.random.default_rng(1)), in_robot_frame=False
+    )
+
+    position = np.array([0.1, 0.2])
+    velocity = np.array([1.0, 0.0])
+    avoider.avoid(velocity, position=position)
+    cleanscan = avoider._cleanscan
+    lidar_reference = avoider.lidar_avoider.reference_direction
+
+    avoider.avoid(velocity, position=position)
+    assert avoider._cleanscan is cleanscan
+    assert avoider.lidar_avoider.reference_direction is lidar_reference
+
+    # Moving the robot updates the reference but keeps the occlusion mask
+    avoider.avoid(velocity, position=position + 0.1)
+    assert avoider._cleanscan is cleanscan
+    assert avoider.lidar_avoider.reference_direction is not lidar_reference
+
+
+def test_slow_motion_below_tolerance():
+    obstacle_environment = get_obstacle_environment()
+    avoiders = [
+        MixedEnvironmentAvoider(
+            QoloRobot(
+                pose=ObjectPose(position=np.zeros(2), orientation=0),
+                obstacle_environment=obstacle_environment,
+            ),
+            recompute_all=recompute_all,
+            pose_tolerance=0.05,
+        )
+        for recompute_all in [True, False]
+    ]
+    laserscan = get_laserscan(np.random.default_rng(2))
+    for avoider in avoiders:
+        avoider.update_laserscan(laserscan, in_robot_frame=False)
+
+    velocity = np.array([1.0, 0.2])
+    step = np.array([0.01, 0.005])
+    for it in range(50):
+        position = it * step
+        for avoider in avoiders:
+            avoider.robot.pose.position = position
+        avoiders[1].avoid(velocity, position=position)
+
+        # The references are never older than the tolerance
+        for last_pose in [
+            avoiders[1]._last_lidar_pose,
+            avoiders[1]._last_obstacle_pose,
+        ]:
+            assert np.max(np.abs(last_pose[:2] - position)) <= 0.05
+
+        # ... and equal the full recomputation at that pose
+        last_position = avoiders[1]._last_lidar_pose[:2]
+        avoiders[0].robot.pose.position = last_position
+        avoiders[0].avoid(velocity, position=last_position)
+        assert np.allclose(
+            avoiders[0].lidar_avoider.reference_direction,
+            avoiders[1].lidar_avoider.reference_direction,
+        )
+
+
+def test_moving_obstacle_with_static_robot():
+    obstacle_environment = get_obstacle_environment()
+    obstacle_environment[1].linear_velocity = np.array([0, 1.0])
+    avoiders = [
+        MixedEnvironmentAvoider(
+            QoloRobot(
+                pose=ObjectPose(position=np.zeros(2), orientation=0),
+                obstacle_environment=obstacle_environment,
+            ),
+            recompute_all=recompute_all,
+        )
+        for recompute_all in [True, False]
+    ]
+    laserscan = get_laserscan(np.random.default_rng(3))
+    for avoider in avoiders:
+        avoider.update_laserscan(laserscan, in_robot_frame=False)
+
+    position = np.array([0.2, -1.0])
+    velocity = np.array([1.0, 0.2])
+    for _ in range(10):
+        velocities = [
+            avoider.avoid(velocity, position=position) for avoider in avoiders
+        ]
+        assert np.allclose(velocities[0], velocities[1])
+        assert np.array_equal(avoiders[0]._cleanscan, avoiders[1]._cleanscan)
+
+        # The obstacle approaches the (static) robot
+        avoiders[1].obstacle_avoider.do_velocity_step(delta_time=0.1)
+
+
+if (__name__) == "__main__":
+    test_incremental_equals_full_recomputation()
+    test_static_step_reuses_references()
+    test_slow_motion_below_tolerance()
+    test_moving_obstacle_with_static_robot()
@@ -0,0 +1,46 @@
+""" Test the closed-form modulation kernels against the general decomposition. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.obstacle_avoider import SampledAvoider
+from fast_obstacle_avoidance.obstacle_avoider.stretching_matrix import (
+    StretchingMatrixExponential,
+)
+
+
+def test_closed_form_kernel(dimension=2, stretching_matrix=None, n_tests=200):
+    fast_avoider = SampledAvoider(
+        control_radius=0.5, stretching_matrix=stretching_matrix
+    )
+
+    rng = np.random.default_rng(0)
+    for it in range(n_tests):
+        velocity = rng.standard_normal(dimension)
+        reference = rng.standard_normal(dimension) * rng.uniform(0.1, 5)
+
+        if it % 3:
+            normal = rng.standard_normal(dimension)
+            normal = normal / np.linalg.norm(normal)
+        else:
+            normal = None
+
+        modulated = fast_avoider.get_modulated_velocity(velocity, reference, normal)
+        modulated_basis = fast_avoider._get_modulated_velocity_from_basis(
+            velocity, reference, normal
+        )
+        assert np.allclose(modulated, modulated_basis)
+
+
+def test_closed_form_kernel_exponential():
+    test_closed_form_kernel(stretching_matrix=StretchingMatrixExponential())
+
+
+def test_closed_form_kernel_3d():
+    test_closed_form_kernel(dimension=3)
+
+
+if (__name__) == "__main__":
+    test_closed_form_kernel()
+    test_closed_form_kernel_exponential()
+    test_closed_form_kernel_3d()
@@ -0,0 +1,193 @@
+"""Test the packed (struct-of-arrays) evaluation of the obstacles."""
+
+# Created: 2026-10-17
+
+import numpy as np
+
+from dynamic_obstacle_avoidance.containers import ObstacleContainer
+from dynamic_obstacle_avoidance.obstacles import CircularObstacle, CuboidXd
+from dynamic_obstacle_avoidance.obstacles import Ellipse, EllipseWithAxes, Sphere
+
+from fast_obstacle_avoidance.obstacle_avoider import FastObstacleAvoider
+from fast_obstacle_avoidance.obstacle_avoider._obstacle_arrays import (
+    CUBOID_OBSTACLE_TYPES,
+    ELLIPTIC_OBSTACLE_TYPES,
+    ObstacleArrays,
+)
+
+
+def get_mixed_environment():
+    obstacle_environment = ObstacleContainer()
+    obstacle_environment.append(
+        Ellipse(
+            center_position=np.array([2, 6]),
+            orientation=30 * np.pi / 180,
+            axes_length=np.array([0.4, 0.8]),
+            margin_absolut=0.3,
+        )
+    )
+    obstacle_environment.append(
+        CuboidXd(
+            center_position=np.array([5.5, 2]),
+            orientation=-40 * np.pi / 180,
+            axes_length=np.array([0.8, 0.8]),
+            margin_absolut=0.3,
+        )
+    )
+    obstacle_environment.append(
+        EllipseWithAxes(
+            center_position=np.array([0.5, -1.0]),
+            orientation=-20 * np.pi / 180,
+            axes_length=np.array([1.2, 0.5]),
+            margin_absolut=0.2,
+        )
+    )
+    obstacle_environment.append(
+        CircularObstacle(
+            center_position=np.array([8.0, 0.5]), radius=0.4, margin_absolut=0.3
+        )
+    )
+    for center in [[-1.0, 3.0], [4.0, -1.0], [7.0, 5.0]]:
+        obstacle_environment.append(
+            Sphere(center_position=np.array(center), radius=0.6, margin_absolut=0.3)
+        )
+    return obstacle_environment
+
+
+class SquaredGammaEllipse(Ellipse):
+    """Ellipse with another gamma type than the packed kernel."""
+
+    def get_gamma(self, *args, **kwargs):
+        return super().get_gamma(*args, **kwargs) ** 2
+
+
+def test_packed_equals_iterative():
+    obstacle_environment = get_mixed_environment()
+
+    # All packed types are covered
+    for obstacle_type in ELLIPTIC_OBSTACLE_TYPES + CUBOID_OBSTACLE_TYPES:
+        assert any(type(obs) is obstacle_type for obs in obstacle_environment)
+
+    iterative_avoider = FastObstacleAvoider(
+        obstacle_environment, consider_relative_velocity=False
+    )
+    packed_avoider = FastObstacleAvoider(
+        obstacle_environment,
+        consider_relative_velocity=False,
+        use_obstacle_arrays=True,
+    )
+
+    rng = np.random.default_rng(0)
+    positions = rng.uniform([-2, -2], [9, 8], (50, 2))
+    for position in positions:
+        ref_dirs, norm_dirs, gammas = iterative_avoider.evaluate_obstacles(position)
+
+        packed_avoider.update_reference_direction(position=position)
+        (
+            packed_ref_dirs,
+            packed_norm_dirs,
+            packed_gammas,
+        ) = packed_avoider.evaluate_obstacle_arrays(position)
+
+        assert np.allclose(ref_dirs, packed_ref_dirs)
+        assert np.allclose(gammas, packed_gammas)
+
+        # The normals of the points outside the obstacles have to match
+        ind_outside = gammas > 1
+        assert np.allclose(norm_dirs[:, ind_outside], packed_norm_dirs[:, ind_outside])
+
+        iterative_avoider.update_reference_direction(position=position)
+        assert np.allclose(
+            iterative_avoider.reference_direction, packed_avoider.reference_direction
+        )
+
+    assert packed_avoider.obstacle_arrays.n_obstacles == len(obstacle_environment)
+
+
+def test_other_gamma_type_is_not_packed():
+    obstacle_environment = get_mixed_environment()
+    obstacle_environment.append(
+        SquaredGammaEllipse(
+            center_position=np.array([3.0, 3.0]),
+            axes_length=np.array([0.8, 0.4]),
+            margin_absolut=0.3,
+        )
+    )
+    assert ObstacleArrays.from_environment(obstacle_environment) is None
+
+    iterative_avoider = FastObstacleAvoider(
+        obstacle_environment, consider_relative_velocity=False
+    )
+    packed_avoider = FastObstacleAvoider(
+        obstacle_environment,
+        consider_relative_velocity=False,
+        use_obstacle_arrays=True,
+    )
+    position = np.array([3.0, 4.0])
+    iterative_avoider.update_reference_direction(position=position)
+    packed_avoider.update_reference_direction(position=position)
+    assert packed_avoider.obstacle_arrays is None
+    assert np.allclose(
+        iterative_avoider.reference_direction, packed_avoider.reference_direction
+    )
+
+
+def test_cached_arrays_follow_velocity_step():
+    obstacle_environment = get_mixed_environment()
+    obstacle_environment[0].linear_velocity = np.array([0.3, -0.2])
+    obstacle_environment[0].angular_velocity = 0.4
+    obstacle_environment[1].angular_velocity = -0.7
+    obstacle_environment[2].linear_velocity = np.array([-0.5, 0.1])
+
+    iterative_avoider = FastObstacleAvoider(
+        obstacle_environment, consider_relative_velocity=False
+    )
+    packed_avoider = FastObstacleAvoider(
+        obstacle_environment,
+        consider_relative_velocity=False,
+        use_obstacle_arrays=True,
+    )
+
+    position = np.array([3.0, 2.5])
+    packed_avoider.update_reference_direction(position=position)
+    obstacle_arrays = packed_avoider.obstacle_arrays
+
+    for _ in range(10):
+        packed_avoider.do_velocity_step(delta_time=0.2)
+
+        packed_avoider.update_reference_direction(position=position)
+        iterative_avoider.update_reference_direction(position=position)
+        assert np.allclose(
+            iterative_avoider.reference_direction, packed_avoider.reference_direction
+        )
+
+    # The arrays are moved, not repacked
+    assert packed_avoider.obstacle_arrays is obstacle_arrays
+
+    repacked_arrays = ObstacleArrays.from_environment(obstacle_environment)
+    assert np.allclose(
+        obstacle_arrays.center_positions, repacked_arrays.center_positions
+    )
+    assert np.allclose(
+        obstacle_arrays.reference_points, repacked_arrays.reference_points
+    )
+    assert np.allclose(
+        obstacle_arrays.rotation_matrices, repacked_arrays.rotation_matrices
+    )
+
+    # Added obstacles are packed on the next update
+    obstacle_environment.append(
+        Sphere(center_position=np.array([3.5, 2.5]), radius=0.3, margin_absolut=0.1)
+    )
+    packed_avoider.update_reference_direction(position=position)
+    iterative_avoider.update_reference_direction(position=position)
+    assert packed_avoider.obstacle_arrays.n_obstacles == len(obstacle_environment)
+    assert np.allclose(
+        iterative_avoider.reference_direction, packed_avoider.reference_direction
+    )
+
+
+if (__name__) == "__main__":
+    test_packed_equals_iterative()
+    test_other_gamma_type_is_not_packed()
+    test_cached_arrays_follow_velocity_step()
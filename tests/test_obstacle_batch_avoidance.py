@@ -0,0 +1,128 @@
+""" Test the batched avoidance of (moving) analytic obstacles. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from dynamic_obstacle_avoidance.containers import ObstacleContainer
+from dynamic_obstacle_avoidance.obstacles import CuboidXd, Ellipse, Sphere
+
+from fast_obstacle_avoidance.obstacle_avoider import FastObstacleAvoider
+from fast_obstacle_avoidance.obstacle_avoider.obstacle_avoider import (
+    get_relative_velocities,
+)
+
+
+def get_moving_environment():
+    obstacle_environment = ObstacleContainer()
+    obstacle_environment.append(
+        Ellipse(
+            center_position=np.array([2, 4]),
+            orientation=30 * np.pi / 180,
+            axes_length=np.array([0.6, 1.6]),
+            margin_absolut=0.3,
+            angular_velocity=10 * np.pi / 180,
+        )
+    )
+    obstacle_environment.append(
+        CuboidXd(
+            center_position=np.array([5.5, 2]),
+            orientation=-40 * np.pi / 180,
+            axes_length=np.array([0.8, 0.8]),
+            margin_absolut=0.3,
+            angular_velocity=-20 * np.pi / 180,
+        )
+    )
+    for center, velocity in [([-1.0, 3.0], [0.5, 0]), ([4.0, -1.0], [0, -0.3])]:
+        obstacle_environment.append(
+            Sphere(
+                center_position=np.array(center),
+                radius=0.6,
+                margin_absolut=0.3,
+                linear_velocity=np.array(velocity),
+            )
+        )
+    return obstacle_environment
+
+
+def test_relative_velocities_of_rotating_obstacle():
+    weights = np.array([[0.0, 0.5], [1.0, 0.0]])
+    positions = np.array([[1.0, 0.0], [0.0, 2.0]])
+    center_positions = np.zeros((2, 2))
+    linear_velocities = np.array([[1.0, 0.0], [0.0, 0.0]])
+    angular_velocities = np.array([0.0, 2.0])
+
+    relative_velocities = get_relative_velocities(
+        weights,
+        positions,
+        center_positions,
+        linear_velocities,
+        angular_velocities,
+        velocity_scaling=1.0,
+    )
+
+    # Only rotation with full weight: exp(1 - 1/1) * w x r
+    assert np.allclose(relative_velocities[:, 0], [0.0, 2.0])
+    # Only translation
+    assert np.allclose(relative_velocities[:, 1], [1.0, 0.0])
+
+
+def get_symmetric_environment():
+    """Two moving spheres, such that the reference vanishes in between them."""
+    obstacle_environment = ObstacleContainer()
+    for center in [[-2.0, 0], [2.0, 0]]:
+        obstacle_environment.append(
+            Sphere(
+                center_position=np.array(center),
+                radius=0.6,
+                margin_absolut=0.3,
+                linear_velocity=np.array([0, 0.8]),
+            )
+        )
+    return obstacle_environment
+
+
+def assert_batch_equals_sequential(fast_avoider, positions, velocities):
+    batch_velocities = fast_avoider.avoid_batch(positions, velocities)
+
+    for it in range(positions.shape[1]):
+        fast_avoider.update_reference_direction(position=positions[:, it])
+        velocity = fast_avoider.avoid(velocities[:, it])
+        assert np.allclose(batch_velocities[:, it], velocity)
+
+
+def test_batch_equals_sequential(use_obstacle_arrays=False):
+    fast_avoider = FastObstacleAvoider(
+        get_moving_environment(),
+        reference_update_before_modulation=False,
+        use_obstacle_arrays=use_obstacle_arrays,
+    )
+
+    rng = np.random.default_rng(0)
+    positions = rng.uniform([-2, -2], [7, 6], (60, 2)).T
+    velocities = rng.standard_normal((2, 60))
+    # Zero velocities close to the moving obstacles are not modulated
+    velocities[:, 5:8] = 0
+    assert_batch_equals_sequential(fast_avoider, positions, velocities)
+
+    # The moving obstacles do not affect the unmodulated position in between them
+    fast_avoider = FastObstacleAvoider(
+        get_symmetric_environment(),
+        reference_update_before_modulation=False,
+        use_obstacle_arrays=use_obstacle_arrays,
+    )
+    positions = np.array([[-1.0, 0.0, 1.0, 0.0], [0.5, 0.0, -0.5, 0.0]])
+    velocities = np.array([[1.0, 1.0, -0.5, 0.0], [0.3, 0.3, 0.2, 0.0]])
+    fast_avoider.update_reference_direction(position=positions[:, 1])
+    assert not np.linalg.norm(fast_avoider.reference_direction)
+    assert_batch_equals_sequential(fast_avoider, positions, velocities)
+    assert np.allclose(fast_avoider.avoid(velocities[:, 1]), velocities[:, 1])
+
+
+def test_batch_equals_sequential_with_arrays():
+    test_batch_equals_sequential(use_obstacle_arrays=True)
+
+
+if (__name__) == "__main__":
+    test_relative_velocities_of_rotating_obstacle()
+    test_batch_equals_sequential()
+    test_batch_equals_sequential_with_arrays()
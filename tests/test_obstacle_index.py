@@ -0,0 +1,156 @@
+"""Test the culling of far away obstacles with the grid index."""
+
+# Created: 2026-10-17
+
+import numpy as np
+from numpy import linalg as LA
+
+from dynamic_obstacle_avoidance.containers import ObstacleContainer
+from dynamic_obstacle_avoidance.obstacles import Sphere
+
+from fast_obstacle_avoidance.control_robot import BaseRobot
+from fast_obstacle_avoidance.obstacle_avoider import FastObstacleAvoider
+from fast_obstacle_avoidance.obstacle_avoider._obstacle_index import (
+    ObstacleGridIndex,
+)
+
+
+def get_sphere_environment(n_obstacles=200, seed=0):
+    rng = np.random.default_rng(seed)
+    obstacle_environment = ObstacleContainer()
+    for it in range(n_obstacles):
+        obstacle_environment.append(
+            Sphere(
+                center_position=rng.uniform(-50, 50, 2),
+                radius=rng.uniform(0.3, 1.5),
+                margin_absolut=0.3,
+                linear_velocity=rng.standard_normal(2) if it % 4 else np.zeros(2),
+            )
+        )
+    return obstacle_environment
+
+
+def get_indices_brute_force(index, position, influence_distance):
+    distances = (
+        LA.norm(index.center_positions - position.reshape(-1, 1), axis=0)
+        - index.bounding_radii
+    )
+    return np.flatnonzero(distances <= influence_distance)
+
+
+def test_grid_index_equals_brute_force():
+    obstacle_environment = get_sphere_environment()
+    index = ObstacleGridIndex.from_environment(obstacle_environment)
+
+    rng = np.random.default_rng(1)
+    for position in rng.uniform(-60, 60, (30, 2)):
+        for influence_distance in [0.5, 5.0, 200.0]:
+            assert np.array_equal(
+                index.get_indices_in_range(position, influence_distance),
+                get_indices_brute_force(index, position, influence_distance),
+            )
+
+
+def test_incremental_update_after_velocity_step():
+    obstacle_environment = get_sphere_environment()
+    fast_avoider = FastObstacleAvoider(
+        obstacle_environment, consider_relative_velocity=False, influence_distance=5.0
+    )
+    position = np.array([1.0, -2.0])
+    fast_avoider.update_reference_direction(position=position)
+
+    for _ in range(20):
+        fast_avoider.do_velocity_step(delta_time=0.5)
+
+    rebuilt_index = ObstacleGridIndex.from_environment(
+        obstacle_environment, cell_size=fast_avoider.obstacle_index.cell_size
+    )
+    for position in np.random.default_rng(2).uniform(-50, 50, (20, 2)):
+        assert np.array_equal(
+            fast_avoider.obstacle_index.get_indices_in_range(position, 5.0),
+            rebuilt_index.get_indices_in_range(position, 5.0),
+        )
+
+
+def test_culling_without_neglected_obstacles():
+    # All obstacles are within the influence distance
+    obstacle_environment = get_sphere_environment(n_obstacles=30)
+    full_avoider = FastObstacleAvoider(
+        obstacle_environment, consider_relative_velocity=False
+    )
+    culled_avoider = FastObstacleAvoider(
+        obstacle_environment,
+        consider_relative_velocity=False,
+        influence_distance=500.0,
+        use_obstacle_arrays=True,
+    )
+
+    position = np.array([0.5, 0.3])
+    full_avoider.update_reference_direction(position=position)
+    culled_avoider.update_reference_direction(position=position)
+    assert np.allclose(
+        full_avoider.reference_direction, culled_avoider.reference_direction
+    )
+
+
+def test_replaced_obstacles_with_same_count():
+    obstacle_environment = get_sphere_environment(n_obstacles=30)
+    robot = BaseRobot(obstacle_environment=obstacle_environment)
+    position = np.zeros(2)
+
+    for use_obstacle_arrays in [False, True]:
+        kwargs = {
+            "consider_relative_velocity": False,
+            "influence_distance": 3.0,
+            "use_obstacle_arrays": use_obstacle_arrays,
+        }
+        culled_avoider = FastObstacleAvoider(
+            obstacle_environment, robot=robot, **kwargs
+        )
+        culled_avoider.update_reference_direction(position=position)
+
+        # Replace the furthest obstacle by one in front of the robot (as a new
+        # crowd message would do)
+        it_far = np.argmax(
+            [LA.norm(obs.center_position) for obs in obstacle_environment]
+        )
+        del obstacle_environment[it_far]
+        obstacle_environment.append(
+            Sphere(center_position=np.array([1.0, 0]), radius=0.3, margin_absolut=0.1)
+        )
+        robot._got_new_obstacles = True
+
+        # Same result as with a newly built index
+        new_avoider = FastObstacleAvoider(obstacle_environment, **kwargs)
+        new_avoider.update_reference_direction(position=position)
+        culled_avoider.update_reference_direction(position=position)
+        assert LA.norm(culled_avoider.reference_direction)
+        assert np.allclose(
+            new_avoider.reference_direction, culled_avoider.reference_direction
+        )
+
+
+def test_culled_obstacles_have_no_relative_velocity():
+    obstacle_environment = get_sphere_environment(n_obstacles=30)
+    fast_avoider = FastObstacleAvoider(obstacle_environment, influence_distance=3.0)
+
+    moving_obstacle = obstacle_environment[1]
+    fast_avoider.update_reference_direction(
+        position=moving_obstacle.center_position + [2.0, 0]
+    )
+    assert LA.norm(fast_avoider.relative_velocity)
+
+    # Far away from all obstacles
+    position = np.array([500.0, 500.0])
+    fast_avoider.update_reference_direction(position=position)
+    velocity = np.array([1.0, 0.5])
+    assert fast_avoider.relative_velocity is None
+    assert np.allclose(fast_avoider.avoid(velocity, position=position), velocity)
+
+
+if (__name__) == "__main__":
+    test_grid_index_equals_brute_force()
+    test_incremental_update_after_velocity_step()
+    test_culling_without_neglected_obstacles()
+    test_replaced_obstacles_with_same_count()
+    test_culled_obstacles_have_no_relative_velocity()
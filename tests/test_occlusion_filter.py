@@ -0,0 +1,82 @@
+""" Test the removal of the laserscan points which are inside of obstacles. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from vartools.states import ObjectPose
+
+from dynamic_obstacle_avoidance.containers import ObstacleContainer
+from dynamic_obstacle_avoidance.obstacles import CircularObstacle, CuboidXd, Ellipse
+
+from fast_obstacle_avoidance.control_robot import QoloRobot
+from fast_obstacle_avoidance.obstacle_avoider import MixedEnvironmentAvoider
+
+
+class DiskObstacle:
+    """Obstacle type which is not packed (evaluated point-by-point)."""
+
+    def __init__(self, center_position, radius):
+        self.center_position = np.array(center_position)
+        self.radius = radius
+        self.is_boundary = False
+
+    def get_gamma(self, position, in_global_frame=True, margin_absolut=0):
+        return np.linalg.norm(position - self.center_position) / self.radius
+
+
+def get_mixed_avoider():
+    obstacle_environment = ObstacleContainer()
+    obstacle_environment.append(
+        Ellipse(
+            center_position=np.array([2, 1]),
+            orientation=30 * np.pi / 180,
+            axes_length=np.array([1.0, 2.4]),
+            margin_absolut=0.5,
+        )
+    )
+    obstacle_environment.append(
+        CuboidXd(
+            center_position=np.array([-2, 0.5]),
+            orientation=-40 * np.pi / 180,
+            axes_length=np.array([1.6, 1.0]),
+            margin_absolut=0.5,
+        )
+    )
+    obstacle_environment.append(
+        CircularObstacle(center_position=np.array([0, -2.0]), radius=0.8)
+    )
+    obstacle_environment.append(DiskObstacle(center_position=[0, 2.5], radius=0.7))
+
+    robot = QoloRobot(
+        pose=ObjectPose(position=np.zeros(2), orientation=0),
+        obstacle_environment=obstacle_environment,
+    )
+    return MixedEnvironmentAvoider(robot)
+
+
+def test_single_pass_mask_equals_pointwise_evaluation():
+    mixed_avoider = get_mixed_avoider()
+
+    rng = np.random.default_rng(0)
+    laserscan = rng.uniform(-4, 4, (2, 500))
+    mixed_avoider.update_laserscan(laserscan, in_robot_frame=False)
+
+    is_outside = np.ones(laserscan.shape[1], dtype=bool)
+    for ii in range(laserscan.shape[1]):
+        for obs in mixed_avoider.obstacle_environment:
+            if isinstance(obs, CircularObstacle):
+                gamma = np.linalg.norm(laserscan[:, ii] - obs.position) - obs.radius
+                is_outside[ii] &= gamma > 0
+            else:
+                gamma = obs.get_gamma(
+                    laserscan[:, ii], in_global_frame=True, margin_absolut=0
+                )
+                is_outside[ii] &= gamma > 1
+
+    cleanscan = mixed_avoider.get_scan_without_ocluded_points()
+    assert 0 < cleanscan.shape[1] < laserscan.shape[1]
+    assert np.allclose(cleanscan, laserscan[:, is_outside])
+
+
+if (__name__) == "__main__":
+    test_single_pass_mask_equals_pointwise_evaluation()
@@ -0,0 +1,78 @@
+""" Test the bearing-sorted laserscan. """
+# Created: 2026-10-17
+
+import numpy as np
+
+from fast_obstacle_avoidance.utils import PolarScan
+
+
+def get_two_lidar_scans(n_points=360, seed=0):
+    rng = np.random.default_rng(seed)
+    scans = []
+    for offset in [0.035, -0.505]:
+        angles = np.linspace(-np.pi, np.pi, n_points, endpoint=False)
+        ranges = rng.uniform(0.5, 5, n_points)
+        scan = np.vstack((ranges * np.cos(angles), ranges * np.sin(angles)))
+        scan[0, :] = scan[0, :] + offset
+        scans.append(scan)
+    return scans
+
+
+def test_sorted_views():
+    scans = get_two_lidar_scans()
+    polar_scan = PolarScan.from_scans(scans)
+
+    assert polar_scan.n_points == 720
+    assert np.all(np.diff(polar_scan.bearings) >= 0)
+
+    # Same points as the merged input
+    merged = np.hstack(scans)
+    assert np.allclose(polar_scan.positions, merged[:, polar_scan.order])
+    assert np.allclose(
+        polar_scan.ranges, np.linalg.norm(merged, axis=0)[polar_scan.order]
+    )
+
+    # Views of the same array
+    assert polar_scan.positions.base is polar_scan.bearings.base
+
+
+def test_sector_query():
+    polar_scan = PolarScan.from_scans(get_two_lidar_scans(), n_bins=36)
+    bearings = polar_scan.bearings
+
+    for angle_min, angle_max in [(-0.3, 0.2), (1.0, 2.5), (2.8, -2.9), (-4, -3.0)]:
+        sector = polar_scan.get_sector(angle_min, angle_max)
+
+        angle_min_wrapped = (angle_min + np.pi) % (2 * np.pi) - np.pi
+        angle_max_wrapped = (angle_max + np.pi) % (2 * np.pi) - np.pi
+        if angle_min_wrapped <= angle_max_wrapped:
+            ind_sector = np.logical_and(
+                bearings >= angle_min_wrapped, bearings < angle_max_wrapped
+            )
+        else:
+            ind_sector = np.logical_or(
+                bearings >= angle_min_wrapped, bearings < angle_max_wrapped
+            )
+
+        assert sector.shape[1] == np.sum(ind_sector)
+        sector_bearings = np.arctan2(sector[1, :], sector[0, :])
+        assert np.allclose(np.sort(sector_bearings), np.sort(bearings[ind_sector]))
+
+    # Not wrapping sectors are views
+    assert np.shares_memory(polar_scan.get_sector(-0.3, 0.2), polar_scan.positions)
+
+
+def test_index_in_dense_bins():
+    # Many points per bin, e.g., several merged dense scans
+    polar_scan = PolarScan.from_scans(get_two_lidar_scans(n_points=5000), n_bins=4)
+    bearings = polar_scan.bearings
+
+    angles = np.hstack((np.linspace(-np.pi, np.pi, 101), bearings[::97]))
+    for angle in angles:
+        assert polar_scan.get_index(angle) == np.searchsorted(bearings, angle)
+
+
+if (__name__) == "__main__":
+    test_sorted_views()
+    test_sector_query()
+    test_index_in_dense_bins()
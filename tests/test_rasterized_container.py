@@ -0,0 +1,101 @@
+""" Test the rasterized sampling container. """
+# Created: 2026-10-17
+
+import os
+import tempfile
+
+import numpy as np
+
+import shapely
+
+from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
+from fast_obstacle_avoidance.rasterized_container import RasterizedSamplingContainer
+
+
+def get_test_container():
+    container = ShapelySamplingContainer(n_samples=72)
+    container.create_cuboid(position=[3, 0], axes_length=[1, 2], orientation=0.3)
+    container.create_ellipse(position=[-2, 1], axes_length=[2, 1], orientation=-0.5)
+    container.create_cuboid(position=[0, 0], axes_length=[12, 10], is_boundary=True)
+    return container
+
+
+def test_rasterized_is_inside():
+    container = get_test_container()
+    rasterized = RasterizedSamplingContainer.from_container(container, resolution=0.05)
+
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-7, 7, (2, 500))
+    is_inside = rasterized.is_inside_batch(positions)
+
+    # Only the points close to the surface can be on the wrong cell
+    dist_surface = np.min(
+        [
+            shapely.distance(obs.geometry.boundary, shapely.points(positions.T))
+            for obs in container.environment
+        ],
+        axis=0,
+    )
+    ind_far = dist_surface > 2 * rasterized.resolution
+    assert np.array_equal(
+        is_inside[ind_far], container.is_inside_batch(positions)[ind_far]
+    )
+
+    # The margin has the same meaning as for the shapely container
+    for margin in [0.2, 1.0]:
+        assert np.array_equal(
+            rasterized.is_inside_batch(positions, margin=margin),
+            container.is_inside_batch(positions, margin=margin),
+        )
+
+
+def test_rasterized_surface_points():
+    container = get_test_container()
+    rasterized = RasterizedSamplingContainer.from_container(container, resolution=0.05)
+
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-5, 5, (2, 20))
+    surface_points, is_valid = container.get_surface_points_batch(positions)
+    raster_points, raster_valid = rasterized.get_surface_points_batch(positions)
+
+    is_both = np.logical_and(is_valid, raster_valid)
+    assert np.mean(is_both) > 0.95 * np.mean(is_valid)
+
+    # Apart from the rays which graze an obstacle, they are accurate to the cells
+    errors = np.linalg.norm(surface_points - raster_points, axis=1)[is_both]
+    assert np.mean(errors < 2 * rasterized.resolution) > 0.95
+
+
+def test_raster_cache():
+    container = get_test_container()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rasterized = RasterizedSamplingContainer.from_container(
+            container, cache_dir=cache_dir
+        )
+        signed_distances = np.array(rasterized.get_signed_distances())
+        assert os.path.isfile(
+            os.path.join(cache_dir, rasterized.get_environment_hash() + ".npy")
+        )
+
+        # Loaded from the memory mapped cache
+        cached = RasterizedSamplingContainer.from_container(
+            container, cache_dir=cache_dir
+        )
+        assert isinstance(cached.get_signed_distances(), np.memmap)
+        assert np.array_equal(cached.get_signed_distances(), signed_distances)
+
+        # A new obstacle results in a new raster
+        environment_hash = cached.get_environment_hash()
+        position = np.array([-3.0, -3.0])
+        assert not cached.is_inside(position)
+        cached.create_cuboid(position=position, axes_length=[1, 1])
+        assert cached.is_inside(position)
+        assert cached.get_environment_hash() != environment_hash
+        assert len(os.listdir(cache_dir)) == 2
+
+
+if (__name__) == "__main__":
+    test_rasterized_is_inside()
+    test_rasterized_surface_points()
+    test_raster_cache()
@@ -0,0 +1,156 @@
+""" Test the (analytic) ray casting of the sampling container. """
+# Created: 2026-10-17
+
+import numpy as np
+
+import shapely
+
+from fast_obstacle_avoidance.sampling_container import SampledObstacle
+from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
+
+
+def get_line_intersections(container, center_position, n_samples, dist_max=1e3):
+    """Reference implementation with one shapely line per ray."""
+    directions = container.get_ray_directions(n_samples)
+    distances = np.full(n_samples, np.inf)
+    for ii in range(n_samples):
+        line = shapely.geometry.LineString(
+            [center_position, center_position + directions[:, ii] * dist_max]
+        )
+        for obs in container.environment:
+            coords = np.array(obs.geometry.intersection(line).coords)
+            if not coords.shape[0]:
+                continue
+            point = coords[1] if obs.is_boundary else coords[0]
+            distances[ii] = min(distances[ii], np.linalg.norm(point - center_position))
+
+    ind_valid = np.logical_and(np.isfinite(distances), distances > 0)
+    return (
+        center_position.reshape(2, 1) + directions[:, ind_valid] * distances[ind_valid]
+    )
+
+
+def get_test_container():
+    container = ShapelySamplingContainer(n_samples=72)
+    container.create_cuboid(position=[3, 0], axes_length=[1, 2], orientation=0.3)
+    container.create_cuboid(position=[0, 0], axes_length=[12, 10], is_boundary=True)
+    return container
+
+
+def test_cuboid_surface_points():
+    container = get_test_container()
+
+    rng = np.random.default_rng(0)
+    for position in rng.uniform(-5, 5, (20, 2)):
+        surface_points = container.get_surface_points(position)
+        reference_points = get_line_intersections(container, position, 72)
+
+        assert surface_points.shape == reference_points.shape
+        assert np.allclose(surface_points, reference_points)
+
+
+def test_ellipse_surface_points():
+    container = get_test_container()
+    container.create_ellipse(position=[-2, 1], axes_length=[2, 1], orientation=-0.5)
+
+    # The analytic ellipse is close to its polygon approximation
+    position = np.array([-4.0, -2.0])
+    surface_points = container.get_surface_points(position)
+    reference_points = get_line_intersections(container, position, 72)
+
+    assert surface_points.shape == reference_points.shape
+    assert np.allclose(surface_points, reference_points, atol=1e-2)
+
+    # No surface points from inside of an obstacle
+    assert not container.get_surface_points(np.array([-2.0, 1.0])).shape[1]
+
+
+def test_polygon_surface_points():
+    container = ShapelySamplingContainer(n_samples=36)
+    container.add_obstacle(
+        SampledObstacle(shapely.geometry.Polygon([[0, 0], [2, 0], [1, 2]]))
+    )
+
+    position = np.array([1.0, -2.0])
+    surface_points = container.get_surface_points(position)
+    reference_points = get_line_intersections(container, position, 36)
+
+    assert surface_points.shape == reference_points.shape
+    assert np.allclose(surface_points, reference_points)
+
+
+def test_batch_equals_sequential():
+    container = get_test_container()
+    container.create_ellipse(position=[-2, 1], axes_length=[2, 1], orientation=-0.5)
+    container.add_obstacle(
+        SampledObstacle(shapely.geometry.Polygon([[0, -4], [2, -4], [1, -2]]))
+    )
+    # Multiple passes
+    container.max_batch_rays = 100
+
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-5, 5, (2, 30))
+    surface_points, is_valid = container.get_surface_points_batch(positions)
+    assert surface_points.shape == (30, 2, 72)
+
+    for it in range(positions.shape[1]):
+        reference_points = container.get_surface_points(positions[:, it])
+        assert np.allclose(surface_points[it][:, is_valid[it]], reference_points)
+        assert np.all(np.isnan(surface_points[it][:, ~is_valid[it]]))
+
+
+def test_cluttered_broad_phase():
+    container = ShapelySamplingContainer(n_samples=90)
+    container.create_cuboid(position=[0, 0], axes_length=[30, 30], is_boundary=True)
+
+    rng = np.random.default_rng(2)
+    for it in range(100):
+        container.create_ellipse(
+            position=rng.uniform(-13, 13, 2),
+            axes_length=rng.uniform(0.5, 2, 2),
+            orientation=rng.uniform(0, np.pi),
+        )
+
+    positions = rng.uniform(-14, 14, (2, 20))
+    directions = container.get_ray_directions(90)
+    distances = container.get_surface_distances(positions, directions)
+
+    brute_distances = np.full(distances.shape, np.inf)
+    for obs in container.environment:
+        brute_distances = np.minimum(
+            brute_distances, obs.get_ray_distances(positions, directions, 1e3)
+        )
+    assert np.allclose(distances, brute_distances)
+
+    # The broad phase is updated with the new obstacles
+    position = np.array([10.0, 10.0])
+    assert not container.is_inside(position)
+    container.create_cuboid(position=position, axes_length=[1, 1])
+    assert container.is_inside(position)
+    assert not container.get_surface_points(position).shape[1]
+
+
+def test_is_inside_batch():
+    container = get_test_container()
+    container.create_ellipse(position=[-2, 1], axes_length=[2, 1], orientation=-0.5)
+
+    rng = np.random.default_rng(3)
+    positions = rng.uniform(-7, 7, (2, 200))
+    for margin in [0, 0.5]:
+        is_inside = container.is_inside_batch(positions, margin=margin)
+
+        assert np.any(is_inside) and not np.all(is_inside)
+        for it in range(positions.shape[1]):
+            assert is_inside[it] == container.is_inside(positions[:, it], margin)
+
+    # Outside of the boundary
+    assert container.is_inside_batch(np.array([[7.0], [0.0]]))[0]
+
+
+if (__name__) == "__main__":
+    test_cuboid_surface_points()
+    test_ellipse_surface_points()
+    test_polygon_surface_points()
+    test_batch_equals_sequential()
+    test_cluttered_broad_phase()
+    test_is_inside_batch()
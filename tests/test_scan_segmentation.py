@@ -0,0 +1,169 @@
+""" Test the angular segmentation of ordered laserscans. """
+# Created: 2026-10-17
+
+import numpy as np
+import pytest
+
+from sklearn.cluster import DBSCAN
+
+from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
+from fast_obstacle_avoidance.scan_segmentation import (
+    AngularSegmentation,
+    ClusterTracker,
+)
+from fast_obstacle_avoidance.obstacle_avoider.sampled_cluster_avoider import (
+    ClustererType,
+    SampledClusterAvoider,
+)
+
+
+def get_two_wall_scan():
+    """Two walls at different ranges and a single (outlier) point, ordered by
+    the bearing."""
+    angles = np.linspace(-np.pi / 4, np.pi / 4, 30)
+    first_wall = 2.0 * np.vstack((np.cos(angles), np.sin(angles)))
+
+    angles = np.linspace(3 * np.pi / 4, 5 * np.pi / 4, 30)
+    second_wall = 4.0 * np.vstack((np.cos(angles), np.sin(angles)))
+
+    outlier = np.array([[0], [-3.0]])
+    return np.hstack((first_wall, second_wall, outlier))
+
+
+def test_segmentation_of_two_walls():
+    datapoints = get_two_wall_scan()
+
+    clusterer = AngularSegmentation(gap_distance=1.0, min_samples=3)
+    labels = clusterer.fit(datapoints.T)
+
+    assert clusterer.n_clusters == 2
+    assert np.all(labels[:30] == 0)
+    assert np.all(labels[30:60] == 1)
+    assert labels[-1] == -1
+
+    # Same clusters as DBSCAN (which does not rely on the order)
+    dbscan = DBSCAN(eps=1.0, min_samples=3).fit(datapoints.T)
+    assert np.array_equal(labels, dbscan.labels_)
+
+
+def test_segmentation_wraps_around():
+    angles = np.linspace(0, 2 * np.pi, 100, endpoint=False)
+    datapoints = np.vstack((np.cos(angles), np.sin(angles)))
+    # Remove a sector (the gap is not at the start of the scan)
+    datapoints = datapoints[:, np.abs(angles - np.pi) > 0.6]
+
+    labels = AngularSegmentation(gap_distance=0.5).fit(datapoints.T)
+    assert np.all(labels == 0)
+
+    labels = AngularSegmentation(gap_distance=0.5, wrap_around=False).fit(
+        datapoints.T
+    )
+    assert np.max(labels) == 1
+
+
+def test_cluster_avoider_with_segmentation():
+    datapoints = get_two_wall_scan()
+    avoider = SampledClusterAvoider(
+        control_radius=0.5, clusterer=ClustererType.ANGULAR_SEGMENTATION
+    )
+    avoider.update_sample_points(datapoints, in_robot_frame=False)
+
+    assert avoider.n_obstacles == 2
+    assert np.allclose(
+        avoider.get_cluster_centers()[:, 0], np.mean(datapoints[:, :30], axis=1)
+    )
+
+
+def test_tracker_keeps_clusters_over_scans():
+    rng = np.random.default_rng(0)
+    datapoints = get_two_wall_scan()[:, :60]
+
+    tracker = ClusterTracker(association_margin=0.5, center_smoothing=0.5)
+    tracker.fit(datapoints.T)
+    assert np.array_equal(tracker.cluster_ids_, [0, 1])
+    centers = np.copy(tracker.cluster_centers_)
+
+    # Noisy scan -> same clusters, smoothed centers
+    noisy_points = datapoints + 0.05 * rng.standard_normal(datapoints.shape)
+    labels = tracker.fit(noisy_points.T)
+    assert np.array_equal(tracker.cluster_ids_, [0, 1])
+    assert np.all(labels[:30] == 0) and np.all(labels[30:] == 1)
+
+    new_mean = np.mean(noisy_points[:, :30], axis=1)
+    assert np.allclose(tracker.cluster_centers_[0], 0.5 * (centers[0] + new_mean))
+
+    # A new obstacle is spawned
+    angles = np.linspace(-np.pi / 8, np.pi / 8, 10)
+    new_wall = np.vstack((np.cos(angles), np.sin(angles) - 6.0))
+    labels = tracker.fit(np.hstack((datapoints, new_wall)).T)
+    assert np.array_equal(tracker.cluster_ids_, [0, 1, 2])
+    assert np.all(labels[60:] == 2)
+
+    # ... and retired when it is not observed anymore
+    for _ in range(tracker.max_missed + 1):
+        labels = tracker.fit(datapoints.T)
+        assert np.array_equal(tracker.cluster_ids_, [0, 1])
+    assert tracker.n_tracked == 2
+
+
+def test_tracker_obstacle_inside_of_surrounding_cluster():
+    room = ShapelySamplingContainer(n_samples=360)
+    room.create_cuboid(position=[0, 0], axes_length=[4, 4], is_boundary=True)
+    wall_points = room.get_surface_points(np.zeros(2))
+
+    room.create_ellipse(position=[1, 0], axes_length=[0.4, 0.4])
+    scan_with_person = room.get_surface_points(np.zeros(2))
+    segmentation = AngularSegmentation(gap_distance=1.0)
+    segmentation.fit(scan_with_person.T)
+    assert segmentation.n_clusters == 2
+
+    # The person enters the room (within the extent of the wall cluster)
+    tracker = ClusterTracker(association_margin=0.5)
+    tracker.fit(wall_points.T)
+    assert tracker.n_clusters == 1
+
+    is_person = np.linalg.norm(scan_with_person.T - [1, 0], axis=1) < 0.3
+    for _ in range(3):
+        labels = tracker.fit(scan_with_person.T)
+        assert tracker.n_clusters == 2
+        assert np.array_equal(tracker.cluster_ids_, [0, 1])
+        assert np.all(labels[is_person] == 1) and np.all(labels[~is_person] == 0)
+
+
+def test_cluster_avoider_with_tracking():
+    datapoints = get_two_wall_scan()
+    avoider = SampledClusterAvoider(
+        control_radius=0.5,
+        clusterer=ClustererType.ANGULAR_SEGMENTATION,
+        track_clusters=True,
+    )
+    for _ in range(3):
+        avoider.update_sample_points(datapoints, in_robot_frame=False)
+        assert avoider.n_obstacles == 2
+        assert np.allclose(
+            avoider.get_cluster_centers()[:, 1], np.mean(datapoints[:, 30:60], axis=1)
+        )
+
+
+def test_online_clustering_requires_partial_fit():
+    for clusterer, track_clusters in [
+        (ClustererType.ANGULAR_SEGMENTATION, True),
+        (ClustererType.DBSCAN, False),
+    ]:
+        with pytest.raises(ValueError):
+            SampledClusterAvoider(
+                control_radius=0.5,
+                clusterer=clusterer,
+                track_clusters=track_clusters,
+                online_clustering=True,
+            )
+
+
+if (__name__) == "__main__":
+    test_segmentation_of_two_walls()
+    test_segmentation_wraps_around()
+    test_cluster_avoider_with_segmentation()
+    test_tracker_keeps_clusters_over_scans()
+    test_tracker_obstacle_inside_of_surrounding_cluster()
+    test_cluster_avoider_with_tracking()
+    test_online_clustering_requires_partial_fit()
@@ -6,6 +6,8 @@
 from vartools.dynamical_systems import LinearSystem
 
 from fast_obstacle_avoidance.obstacle_avoider._base import StretchingMatrixTrigonometric
+from fast_obstacle_avoidance.obstacle_avoider._base import StretchingMatrixExponential
+from fast_obstacle_avoidance.obstacle_avoider._base import StretchingMatrixLUT
 from fast_obstacle_avoidance.sampling_container import ShapelySamplingContainer
 from fast_obstacle_avoidance.sampling_container import SampledEllipse
 
@@ -41,6 +43,61 @@ def test_trigonometric_eigenvalues():
     plt.plot(ref_norms, vals_tan)
 
 
+def test_batch_eigenvalues():
+    n_samples = 200
+    rng = np.random.default_rng(0)
+
+    importances = rng.uniform(0, 5, n_samples)
+    ref_dirs = rng.standard_normal((2, n_samples))
+    normal_dirs = rng.standard_normal((2, n_samples))
+    velocities = rng.standard_normal((2, n_samples))
+
+    for stretching_matrix in [
+        StretchingMatrixTrigonometric(),
+        StretchingMatrixExponential(),
+    ]:
+        stretching_vectors = stretching_matrix.get_batch(
+            importances, ref_dirs, normal_dirs, velocities
+        )
+
+        for ii in range(n_samples):
+            diag_matr = stretching_matrix.get(
+                importances[ii], ref_dirs[:, ii], normal_dirs[:, ii], velocities[:, ii]
+            )
+            assert np.allclose(np.diag(diag_matr), stretching_vectors[:, ii])
+
+
+def test_lookup_table_eigenvalues(error_tolerance=1e-3):
+    n_samples = 1000
+    rng = np.random.default_rng(1)
+
+    # Include values outside of the table
+    importances = rng.uniform(0, 12, n_samples)
+    weights_vel = rng.uniform(-1, 1, n_samples)
+
+    for functor in [StretchingMatrixTrigonometric(), StretchingMatrixExponential()]:
+        lookup_table = StretchingMatrixLUT(
+            functor, importance_range=(0, 10), error_tolerance=error_tolerance
+        )
+        assert lookup_table.estimated_interpolation_error <= error_tolerance
+
+        lambdas_ref, lambdas_tang = lookup_table.get_lambda_weights_batch(
+            importances, weights_vel
+        )
+
+        for ii in range(n_samples):
+            lambdas = functor.get_lambda_weights(importances[ii], weights_vel[ii])
+            lambdas_table = lookup_table.get_lambda_weights(
+                importances[ii], weights_vel[ii]
+            )
+
+            # The error is estimated on a subset of points only
+            assert np.allclose(lambdas_table, lambdas, atol=2 * error_tolerance)
+            assert np.allclose(
+                lambdas_table, [lambdas_ref[ii], lambdas_tang[ii]], atol=1e-12
+            )
+
+
 def test_various_surface_points():
     start_point = np.array([-2.5, 3])
     x_lim = [-4, 4]
@@ -110,4 +167,6 @@ def test_various_surface_points():
 
 if (__name__) == "__main__":
     # test_trigonometric_eigenvalues()
+    # test_batch_eigenvalues()
+    # test_lookup_table_eigenvalues()
     test_various_surface_points()